@@ -5,25 +5,30 @@ Uses sentence-transformers all-MiniLM-L6-v2 for semantic search capabilities
 """
 
 import os
+import io
 import json
 import sqlite3
 import logging
 import numpy as np
 from typing import Dict, List, Optional, Any, Tuple, Union
-from datetime import datetime
+from datetime import datetime, timezone
 import pickle
 from dataclasses import dataclass, asdict
 import hashlib
-from sentence_transformers import SentenceTransformer
 import faiss
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
 import threading
+import atexit
+import asyncio
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -54,21 +59,324 @@ class Document:
     embedding: Optional[np.ndarray] = None
     indexed_at: str = None
 
+# Approximate nearest-neighbour index tiers
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+FLAT_MAX_VECTORS = 50_000  # exact search below this corpus size
+IVF_PQ_MIN_VECTORS = 500_000  # compressed codes above this corpus size
+PQ_SUBQUANTIZERS = 48  # 384 dims -> 48 bytes per vector
+HNSW_M = 32
+
+def select_index_type(num_vectors: int) -> str:
+    """Pick an index tier for a corpus size"""
+    if num_vectors < FLAT_MAX_VECTORS:
+        return "flat"
+    if num_vectors < IVF_PQ_MIN_VECTORS:
+        return "ivf_flat"
+    return "ivf_pq"
+
+def ivf_list_count(num_vectors: int) -> int:
+    """Number of IVF lists, keeping ~39 training points per centroid"""
+    return int(min(4 * np.sqrt(num_vectors), num_vectors // 39, 65536))
+
+def create_ann_index(index_type: str, dim: int, num_vectors: int):
+    """Create an empty (untrained for IVF tiers) inner-product index that accepts custom ids"""
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    if index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = 80
+        return faiss.IndexIDMap2(hnsw)
+    
+    nlist = max(ivf_list_count(num_vectors), 1)
+    quantizer = faiss.IndexFlatIP(dim)
+    if index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "ivf_pq":
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_SUBQUANTIZERS, 8, faiss.METRIC_INNER_PRODUCT)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    # Hashtable direct map allows reconstruct and remove_ids by custom id
+    index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+def ann_index_type(index) -> str:
+    """Tier of an existing FAISS index"""
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    inner = faiss.downcast_index(index.index) if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+def ann_search_params(index_type: str, nprobe: int, ef_search: int):
+    """Per-query search parameters for a tier (None for exact search)"""
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
+class _NumpyUnpickler(pickle.Unpickler):
+    """Unpickler for legacy embedding blobs that only resolves numpy array types"""
+    
+    ALLOWED = {
+        ('numpy.core.multiarray', '_reconstruct'), ('numpy._core.multiarray', '_reconstruct'),
+        ('numpy', 'ndarray'), ('numpy', 'dtype'), ('numpy.core.multiarray', 'scalar'),
+        ('numpy._core.multiarray', 'scalar'),
+    }
+    
+    def find_class(self, module, name):
+        if (module, name) in self.ALLOWED:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name}")
+
+def load_legacy_pickle(data: bytes):
+    """Load a pickled embedding or id list written by older versions"""
+    return _NumpyUnpickler(io.BytesIO(data)).load()
+
+class EmbeddingMatrixStore:
+    """Append-only float32 matrix file of embeddings, read through a memory map.
+    
+    Each embedding is one fixed-width row; the documents table stores only
+    its row number. Replacing a document appends a new row, and rebuilds
+    gather rows straight from the map without per-row deserialization.
+    The replaced rows stay in the file as dead rows until compact()
+    rewrites it with only the live ones.
+    """
+    
+    def __init__(self, path: str, dim: int = 384):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self._map = None
+        self._lock = threading.Lock()
+        
+    @property
+    def rows(self) -> int:
+        # A torn final row from a crash is ignored
+        return os.path.getsize(self.path) // self.row_bytes if os.path.exists(self.path) else 0
+        
+    def append(self, embeddings: np.ndarray) -> int:
+        """Append embeddings; returns the row number of the first one"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                if offset % self.row_bytes:
+                    # Drop a torn row left by an interrupted write
+                    f.truncate(offset - offset % self.row_bytes)
+                    f.seek(0, os.SEEK_END)
+                    offset = f.tell()
+                f.write(embeddings.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            return offset // self.row_bytes
+            
+    def matrix(self) -> np.ndarray:
+        """Read-only (rows, dim) view of the whole file"""
+        with self._lock:
+            rows = self.rows
+            if self._map is None or self._map.shape[0] != rows:
+                self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(rows, self.dim)) \
+                    if rows else np.zeros((0, self.dim), dtype=np.float32)
+            return self._map
+            
+    def get(self, rows: List[int]) -> np.ndarray:
+        """Gather rows into a contiguous array"""
+        return np.asarray(self.matrix()[np.asarray(rows, dtype=np.int64)])
+        
+    @property
+    def compact_path(self) -> str:
+        return self.path + ".compact"
+        
+    def compact(self, live_rows: List[int], commit) -> Dict[int, int]:
+        """Rewrite the file with only live_rows, keeping their order.
+        
+        The compacted copy is written and synced first; commit(remap) must
+        then durably record the new row numbers (old row -> new row) before
+        the copy replaces the file. Appends wait until the swap is done.
+        Returns the remap.
+        """
+        with self._lock:
+            total = self.rows
+            live = sorted(set(row for row in live_rows if row < total))
+            source = np.memmap(self.path, dtype=np.float32, mode="r", shape=(total, self.dim)) \
+                if total else np.zeros((0, self.dim), dtype=np.float32)
+            with open(self.compact_path, "wb") as f:
+                for start in range(0, len(live), 65536):
+                    f.write(np.asarray(source[live[start:start + 65536]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            del source
+            
+            remap = {row: new_row for new_row, row in enumerate(live)}
+            commit(remap)
+            self._swap_compacted()
+            return remap
+            
+    def recover_compaction(self, committed: bool):
+        """Finish or discard a compaction interrupted by a crash"""
+        with self._lock:
+            if not os.path.exists(self.compact_path):
+                return
+            if committed:
+                self._swap_compacted()
+            else:
+                os.remove(self.compact_path)
+                
+    def _swap_compacted(self):
+        os.replace(self.compact_path, self.path)
+        self._map = None
+        dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+class EmbeddingCache:
+    """Content-hash keyed embedding cache: in-process LRU in front of SQLite.
+    
+    Keys hash the cleaned text together with the model namespace
+    ("name@version"), so switching models never serves stale vectors.
+    Embeddings are stored as raw float32 bytes.
+    """
+    
+    def __init__(self, db_path: str, namespace: str, dim: int = 384, max_memory_entries: int = None):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.dim = dim
+        self.max_memory_entries = max_memory_entries or int(os.getenv("MITO_EMBEDDING_CACHE_SIZE", "10000"))
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'writes': 0}
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings_cache (
+                text_hash TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                model_name TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._conn.commit()
+        
+    def key(self, cleaned_text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{cleaned_text}".encode()).hexdigest()
+        
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up several keys; returns only the hits"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = embedding
+            self.stats['memory_hits'] += len(found)
+            
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = self._conn.execute(f"""
+                    SELECT text_hash, embedding FROM embeddings_cache
+                    WHERE model_name = ? AND text_hash IN ({','.join('?' * len(chunk))})
+                """, [self.namespace] + chunk).fetchall()
+                for key, blob in rows:
+                    if len(blob) != self.dim * 4:
+                        continue
+                    embedding = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = embedding
+                    self._remember(key, embedding)
+                    self.stats['db_hits'] += 1
+            self.stats['misses'] += sum(1 for key in missing if key not in found)
+            
+        return {key: embedding.copy() for key, embedding in found.items()}
+        
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Store freshly computed embeddings"""
+        if not items:
+            return
+        rows = []
+        with self._lock:
+            for key, embedding in items.items():
+                embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+                self._remember(key, embedding.copy())
+                rows.append((key, embedding.tobytes(), self.namespace))
+            try:
+                self._conn.executemany("""
+                    INSERT OR REPLACE INTO embeddings_cache (text_hash, embedding, model_name)
+                    VALUES (?, ?, ?)
+                """, rows)
+                self._conn.commit()
+                self.stats['writes'] += len(rows)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist embeddings: {e}")
+                
+    def _remember(self, key: str, embedding: np.ndarray):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['db_hits']) / max(lookups, 1), 4)
+        stats['namespace'] = self.namespace
+        return stats
+
 class EmbeddingManager:
     """Manages document embeddings using transformer models"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", compact_ratio: float = 0.25,
+                 index_type: str = None, cache_db_path: str = None):
         self.model_name = model_name
+        self.model_version = os.getenv("MITO_EMBEDDING_MODEL_VERSION", "1")
         self.model = None
         self.embedding_dim = 384  # all-MiniLM-L6-v2 dimension
         self.faiss_index = None
-        self.document_ids = []
+        self.index_type = index_type or os.getenv("MITO_ANN_INDEX_TYPE", "auto")  # "auto" or one of INDEX_TYPES
+        self.active_index_type = "flat"
+        self.nprobe = int(os.getenv("MITO_ANN_NPROBE", "16"))
+        self.ef_search = int(os.getenv("MITO_ANN_EF_SEARCH", "64"))
+        self._build_thread = None
+        self._build_log = None  # vectors added while a new tier is being built
+        self.id_to_doc: Dict[int, str] = {}  # FAISS vector id -> document id
+        self.doc_to_id: Dict[str, int] = {}  # live document id -> FAISS vector id
+        self.doc_sources: Dict[str, int] = {}  # live document id -> embedding_row it was loaded from
+        self.tombstones = set()  # vector ids of replaced or removed documents
+        self.next_id = 0
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self.cache = EmbeddingCache(cache_db_path, self.cache_namespace, self.embedding_dim) \
+            if cache_db_path else None
+        self.query_cache_size = int(os.getenv("MITO_QUERY_EMBEDDING_CACHE_SIZE", "512"))
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.query_cache_stats = {'hits': 0, 'misses': 0}
         self.load_model()
         
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.model_name}@{self.model_version}"
+        
+    @property
+    def document_ids(self) -> List[str]:
+        """Document ids currently searchable in the index"""
+        return list(self.doc_to_id)
+        
     def load_model(self):
         """Load the sentence transformer model"""
         try:
             logger.info(f"Loading transformer model: {self.model_name}")
+            # Imported here so the module loads without sentence-transformers
+            # (and torch) when a model is injected, as the tests do
+            from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer(self.model_name)
             logger.info("Transformer model loaded successfully")
         except Exception as e:
@@ -83,65 +391,302 @@ class EmbeddingManager:
         try:
             # Clean and truncate text if too long
             cleaned_text = self._clean_text(text)
-            embedding = self.model.encode(cleaned_text, convert_to_numpy=True)
-            return embedding.astype(np.float32)
+            if self.cache is not None:
+                key = self.cache.key(cleaned_text)
+                cached = self.cache.get_many([key])
+                if key in cached:
+                    return cached[key]
+                    
+            embedding = self.model.encode(cleaned_text, convert_to_numpy=True).astype(np.float32)
+            if self.cache is not None:
+                self.cache.put_many({key: embedding})
+            return embedding
         except Exception as e:
             logger.error(f"Failed to encode text: {e}")
             return np.zeros(self.embedding_dim, dtype=np.float32)
             
+    def encode_query(self, query: str) -> np.ndarray:
+        """Encode a search query through an in-process LRU (queries are not persisted)"""
+        key = self._clean_text(query)
+        with self._lock:
+            embedding = self._query_cache.get(key)
+            if embedding is not None:
+                self._query_cache.move_to_end(key)
+                self.query_cache_stats['hits'] += 1
+                return embedding
+            self.query_cache_stats['misses'] += 1
+            
+        if not self.model:
+            raise ValueError("Model not loaded")
+        try:
+            embedding = self.model.encode(key, convert_to_numpy=True).astype(np.float32)
+        except Exception as e:
+            logger.error(f"Failed to encode query: {e}")
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+            
+        embedding.setflags(write=False)
+        with self._lock:
+            self._query_cache[key] = embedding
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
+        
     def encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
-        """Encode multiple texts in batches"""
+        """Encode multiple texts in batches, sending only cache misses to the model"""
         if not self.model:
             raise ValueError("Model not loaded")
             
         try:
             cleaned_texts = [self._clean_text(text) for text in texts]
-            embeddings = self.model.encode(
-                cleaned_texts, 
-                batch_size=batch_size,
-                convert_to_numpy=True,
-                show_progress_bar=True
-            )
-            return embeddings.astype(np.float32)
+            if self.cache is None:
+                return self._encode_uncached(cleaned_texts, batch_size)
+                
+            keys = [self.cache.key(text) for text in cleaned_texts]
+            found = self.cache.get_many(keys)
+            misses = {key: text for key, text in zip(keys, cleaned_texts) if key not in found}
+            if misses:
+                computed = self._encode_uncached(list(misses.values()), batch_size)
+                fresh = dict(zip(misses, computed))
+                self.cache.put_many(fresh)
+                found.update(fresh)
+                
+            if not keys:
+                return np.zeros((0, self.embedding_dim), dtype=np.float32)
+            return np.vstack([found[key] for key in keys]).astype(np.float32)
         except Exception as e:
             logger.error(f"Failed to encode batch: {e}")
             return np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
             
+    def _encode_uncached(self, cleaned_texts: List[str], batch_size: int) -> np.ndarray:
+        embeddings = self.model.encode(
+            cleaned_texts, 
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=True
+        )
+        return embeddings.astype(np.float32)
+        
+    def _new_index(self):
+        """Empty exact index; larger tiers are built in the background"""
+        self.active_index_type = "flat"
+        return create_ann_index("flat", self.embedding_dim, 0)  # Inner product for cosine similarity
+        
     def build_faiss_index(self, embeddings: np.ndarray, document_ids: List[str]):
         """Build FAISS index for fast similarity search"""
         try:
-            # Normalize embeddings for cosine similarity
-            faiss.normalize_L2(embeddings)
-            
-            # Create FAISS index
-            self.faiss_index = faiss.IndexFlatIP(self.embedding_dim)  # Inner product for cosine similarity
-            self.faiss_index.add(embeddings)
-            self.document_ids = document_ids
+            self.wait_for_index()
+            with self._lock:
+                self.faiss_index = self._new_index()
+                self.id_to_doc = {}
+                self.doc_to_id = {}
+                self.doc_sources = {}
+                self.tombstones = set()
+                self.next_id = 0
+                self.add_embeddings(embeddings, document_ids)
             
             logger.info(f"Built FAISS index with {len(document_ids)} documents")
         except Exception as e:
             logger.error(f"Failed to build FAISS index: {e}")
             
-    def search_similar(self, query_embedding: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
-        """Search for similar documents using FAISS"""
+    def add_embeddings(self, embeddings: np.ndarray, document_ids: List[str],
+                       sources: List[int] = None):
+        """Append embeddings to the index, superseding earlier versions of the same documents.
+        
+        `sources` are the embedding store rows the vectors came from; they
+        are saved with the index so a resync can spot re-embedded documents.
+        """
+        if not document_ids:
+            return
+        # Normalize a copy for cosine similarity
+        embeddings = np.array(embeddings, dtype=np.float32).reshape(len(document_ids), self.embedding_dim)
+        faiss.normalize_L2(embeddings)
+        
+        with self._lock:
+            if self.faiss_index is None:
+                self.faiss_index = self._new_index()
+            vector_ids = np.arange(self.next_id, self.next_id + len(document_ids), dtype=np.int64)
+            self.next_id += len(document_ids)
+            self.faiss_index.add_with_ids(embeddings, vector_ids)
+            if self._build_log is not None:
+                self._build_log.append((vector_ids, embeddings))
+            
+            for vector_id, doc_id in zip(vector_ids.tolist(), document_ids):
+                previous = self.doc_to_id.get(doc_id)
+                if previous is not None:
+                    self.tombstones.add(previous)
+                self.doc_to_id[doc_id] = vector_id
+                self.id_to_doc[vector_id] = doc_id
+                self.doc_sources.pop(doc_id, None)
+            if sources is not None:
+                self.doc_sources.update(zip(document_ids, sources))
+                
+            self._compact_if_needed()
+            self._maybe_upgrade_index()
+            
+    def remap_sources(self, remap: Dict[int, int]):
+        """Follow embedding rows renumbered by a matrix compaction"""
+        with self._lock:
+            # A source row that was dropped no longer matches any document
+            self.doc_sources = {doc_id: remap.get(row, -1) for doc_id, row in self.doc_sources.items()}
+            
+    def remove_documents(self, document_ids: List[str]):
+        """Tombstone documents; their vectors are purged on the next compaction"""
+        with self._lock:
+            for doc_id in document_ids:
+                vector_id = self.doc_to_id.pop(doc_id, None)
+                self.doc_sources.pop(doc_id, None)
+                if vector_id is not None:
+                    self.tombstones.add(vector_id)
+            self._compact_if_needed()
+            
+    def _compact_if_needed(self):
+        if self.faiss_index is not None and self.tombstones and \
+                len(self.tombstones) >= self.compact_ratio * self.faiss_index.ntotal:
+            self.compact()
+            
+    def compact(self):
+        """Physically remove tombstoned vectors from the index"""
+        with self._lock:
+            if self.faiss_index is None or not self.tombstones or self._build_thread is not None:
+                return
+            if self.active_index_type == "hnsw":
+                # HNSW graphs cannot delete; rebuild from the live vectors instead
+                self._start_index_build("hnsw")
+                return
+            self.faiss_index.remove_ids(np.fromiter(self.tombstones, dtype=np.int64))
+            for vector_id in self.tombstones:
+                self.id_to_doc.pop(vector_id, None)
+            self.tombstones = set()
+            
+    def _maybe_upgrade_index(self):
+        """Start a background build when the corpus outgrows the current tier"""
+        if self._build_thread is not None:
+            return
+        live = len(self.doc_to_id)
+        target = select_index_type(live) if self.index_type == "auto" else self.index_type
+        if target == self.active_index_type:
+            return
+        if target in ("ivf_flat", "ivf_pq") and ivf_list_count(live) < 8:
+            return  # too few vectors to train a quantizer yet
+        if target == "ivf_pq" and live < 256 * 39:
+            return  # PQ codebooks need ~10k training points
+        self._start_index_build(target)
+        
+    def _start_index_build(self, index_type: str):
+        self._build_thread = threading.Thread(target=self._build_index_tier, args=(index_type,),
+                                              name=f"faiss-{index_type}-build", daemon=True)
+        self._build_thread.start()
+        
+    def _build_index_tier(self, index_type: str):
+        """Train and fill a new index off the request path, then swap it in"""
+        try:
+            with self._lock:
+                # Vectors added after this snapshot are logged and replayed at swap time
+                self._build_log = []
+                vector_ids = np.array(sorted(self.doc_to_id.values()), dtype=np.int64)
+                vectors = self.faiss_index.reconstruct_batch(vector_ids) if len(vector_ids) else \
+                    np.zeros((0, self.embedding_dim), dtype=np.float32)
+                
+            start_time = time.time()
+            index = create_ann_index(index_type, self.embedding_dim, len(vector_ids))
+            if not index.is_trained:
+                sample_size = min(len(vectors), max(ivf_list_count(len(vectors)) * 39, 256 * 39), 200_000)
+                sample = vectors[np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)]
+                index.train(sample)
+            for start in range(0, len(vector_ids), 50_000):
+                index.add_with_ids(vectors[start:start + 50_000], vector_ids[start:start + 50_000])
+                
+            with self._lock:
+                # Replay vectors that arrived during the build
+                present = set(vector_ids.tolist())
+                for logged_ids, logged_vectors in self._build_log or []:
+                    index.add_with_ids(logged_vectors, logged_ids)
+                    present.update(logged_ids.tolist())
+                self.faiss_index = index
+                self.active_index_type = index_type
+                self.tombstones &= present
+                live_ids = set(self.doc_to_id.values())
+                self.id_to_doc = {vector_id: doc_id for vector_id, doc_id in self.id_to_doc.items()
+                                  if vector_id in live_ids or vector_id in self.tombstones}
+                
+            logger.info(f"Built {index_type} FAISS index over {index.ntotal} vectors "
+                        f"in {time.time() - start_time:.1f}s")
+        except Exception as e:
+            logger.error(f"Failed to build {index_type} FAISS index: {e}")
+        finally:
+            with self._lock:
+                self._build_log = None
+                self._build_thread = None
+                
+    def wait_for_index(self, timeout: float = None) -> bool:
+        """Block until any background index build finishes"""
+        thread = self._build_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+        
+    def get_index_info(self) -> Dict[str, Any]:
+        """Current index tier and tuning knobs"""
+        with self._lock:
+            info = {
+                'index_type': self.active_index_type,
+                'configured_type': self.index_type,
+                'vectors': self.faiss_index.ntotal if self.faiss_index is not None else 0,
+                'live_documents': len(self.doc_to_id),
+                'tombstones': len(self.tombstones),
+                'building': self._build_thread is not None,
+                'nprobe': self.nprobe,
+                'ef_search': self.ef_search
+            }
+            if self.active_index_type in ("ivf_flat", "ivf_pq"):
+                info['nlist'] = faiss.extract_index_ivf(self.faiss_index).nlist
+        return info
+            
+    def search_similar(self, query_embedding: np.ndarray, k: int = 10,
+                       nprobe: int = None, ef_search: int = None) -> List[Tuple[str, float]]:
+        """Search for similar documents using FAISS.
+        
+        nprobe (IVF tiers) and ef_search (HNSW) trade latency for recall
+        per query; they default to MITO_ANN_NPROBE / MITO_ANN_EF_SEARCH.
+        """
         if not self.faiss_index:
             return []
             
         try:
             # Normalize query embedding
-            query_embedding = query_embedding.reshape(1, -1).astype(np.float32)
+            query_embedding = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
             faiss.normalize_L2(query_embedding)
             
-            # Search
-            scores, indices = self.faiss_index.search(query_embedding, k)
-            
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx != -1:  # Valid index
-                    doc_id = self.document_ids[idx]
-                    results.append((doc_id, float(score)))
+            # Over-fetch 2x to make up for tombstoned hits, doubling on the rare
+            # query whose neighbourhood is mostly tombstones
+            with self._lock:
+                ntotal = self.faiss_index.ntotal
+                fetch = min(k * 2, ntotal)
+                if fetch <= 0:
+                    return []
+                params = ann_search_params(self.active_index_type, nprobe or self.nprobe,
+                                           ef_search or self.ef_search)
+                while True:
+                    if params is None:
+                        scores, vector_ids = self.faiss_index.search(query_embedding, fetch)
+                    else:
+                        scores, vector_ids = self.faiss_index.search(query_embedding, fetch, params=params)
                     
-            return results
+                    results = []
+                    exhausted = False
+                    for score, vector_id in zip(scores[0], vector_ids[0].tolist()):
+                        if vector_id == -1:
+                            exhausted = True  # the probed lists/graph hold nothing more
+                            break
+                        if vector_id in self.tombstones:
+                            continue
+                        results.append((self.id_to_doc[vector_id], float(score)))
+                        if len(results) >= k:
+                            break
+                    if len(results) >= k or exhausted or fetch >= ntotal:
+                        return results
+                    fetch = min(fetch * 2, ntotal)
         except Exception as e:
             logger.error(f"Failed to search similar documents: {e}")
             return []
@@ -149,14 +694,23 @@ class EmbeddingManager:
     def save_index(self, filepath: str):
         """Save FAISS index to disk"""
         try:
-            if self.faiss_index:
+            with self._lock:
+                if not self.faiss_index:
+                    return
                 faiss.write_index(self.faiss_index, filepath)
                 
-                # Save document IDs mapping
-                with open(filepath + ".ids", "wb") as f:
-                    pickle.dump(self.document_ids, f)
-                    
-                logger.info(f"Saved FAISS index to {filepath}")
+                # Save vector id -> document id mapping
+                mapping = {
+                    'id_to_doc': {str(vector_id): doc_id for vector_id, doc_id in self.id_to_doc.items()},
+                    'doc_sources': self.doc_sources,
+                    'tombstones': sorted(self.tombstones),
+                    'next_id': self.next_id,
+                    'index_type': self.active_index_type
+                }
+            with open(filepath + ".ids", "w") as f:
+                json.dump(mapping, f)
+                
+            logger.info(f"Saved FAISS index to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save index: {e}")
             
@@ -164,13 +718,37 @@ class EmbeddingManager:
         """Load FAISS index from disk"""
         try:
             if os.path.exists(filepath):
-                self.faiss_index = faiss.read_index(filepath)
-                
-                # Load document IDs mapping
+                index = faiss.read_index(filepath)
                 ids_file = filepath + ".ids"
+                mapping = None
+                legacy_ids = []
                 if os.path.exists(ids_file):
-                    with open(ids_file, "rb") as f:
-                        self.document_ids = pickle.load(f)
+                    try:
+                        with open(ids_file, "r") as f:
+                            mapping = json.load(f)
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        # Older indexes stored a pickled positional list of document ids
+                        with open(ids_file, "rb") as f:
+                            legacy_ids = load_legacy_pickle(f.read())
+                            
+                if mapping is not None:
+                    with self._lock:
+                        self.faiss_index = index
+                        self.active_index_type = ann_index_type(index)
+                        self.id_to_doc = {int(vector_id): doc_id for vector_id, doc_id in mapping['id_to_doc'].items()}
+                        self.tombstones = set(mapping.get('tombstones', []))
+                        self.next_id = mapping.get('next_id', len(self.id_to_doc))
+                        self.doc_to_id = {doc_id: vector_id for vector_id, doc_id in self.id_to_doc.items()
+                                          if vector_id not in self.tombstones}
+                        self.doc_sources = {doc_id: row for doc_id, row in mapping.get('doc_sources', {}).items()
+                                            if doc_id in self.doc_to_id}
+                        self._maybe_upgrade_index()
+                else:
+                    # Migrate a positional flat index to an ID-mapped one. The rebuild
+                    # waits for background builds, so it must run without the lock held
+                    vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else \
+                        np.zeros((0, self.embedding_dim), dtype=np.float32)
+                    self.build_faiss_index(vectors, list(legacy_ids)[:index.ntotal])
                         
                 logger.info(f"Loaded FAISS index from {filepath}")
                 return True
@@ -194,12 +772,413 @@ class EmbeddingManager:
             
         return text
 
+class IncrementalTfidfIndex:
+    """TF-IDF keyword index maintained one batch at a time.
+    
+    Terms are hashed into a fixed feature space, so adding documents never
+    refits a vocabulary. Document frequencies are updated per batch and IDF
+    weights are recomputed lazily on the next query. Replaced or removed
+    documents leave tombstoned rows that are dropped on compaction.
+    
+    Alongside the matrix sits a columnar side-store aligned by row: the
+    document id, a category code and per-tag bitmaps, so filters become
+    array masks and a query only touches the postings of its own terms.
+    """
+    
+    def __init__(self, n_features: int = 2 ** 18, compact_ratio: float = 0.25):
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            stop_words='english',
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm=None
+        )
+        self.n_features = n_features
+        self.compact_ratio = compact_ratio
+        self.doc_freq = np.zeros(n_features)
+        self.matrix = None  # CSR matrix of raw term counts, one row per document version
+        self.row_ids: List[Optional[str]] = []
+        self.doc_rows: Dict[str, int] = {}
+        self.dead_rows = set()
+        self.row_categories: List[int] = []
+        self.category_codes: Dict[str, int] = {}
+        self.tag_rows: Dict[str, List[int]] = {}
+        self._pending: List[sparse.csr_matrix] = []
+        self._weights = None
+        self._columns = None
+        self._lock = threading.RLock()
+        
+    def __len__(self) -> int:
+        return len(self.doc_rows)
+        
+    def add(self, document_ids: List[str], texts: List[str],
+            categories: List[str] = None, tags: List[List[str]] = None):
+        """Index a batch of documents, replacing earlier versions"""
+        categories = categories or [None] * len(document_ids)
+        tags = tags or [[]] * len(document_ids)
+        batch = {doc_id: (text, category, doc_tags)
+                 for doc_id, text, category, doc_tags in zip(document_ids, texts, categories, tags)}
+        if not batch:
+            return
+        counts = self.vectorizer.transform([text for text, _, _ in batch.values()]).tocsr()
+        counts.sum_duplicates()
+        
+        with self._lock:
+            self.remove(list(batch))
+            self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+            for doc_id, (_, category, doc_tags) in batch.items():
+                row = len(self.row_ids)
+                self.doc_rows[doc_id] = row
+                self.row_ids.append(doc_id)
+                code = self.category_codes.setdefault(category, len(self.category_codes))
+                self.row_categories.append(code)
+                for tag in set(doc_tags or []):
+                    self.tag_rows.setdefault(tag, []).append(row)
+            self._pending.append(counts)
+            self._weights = None
+            
+    def remove(self, document_ids: List[str]):
+        """Tombstone documents and drop them from document frequencies"""
+        with self._lock:
+            for doc_id in document_ids:
+                row = self.doc_rows.pop(doc_id, None)
+                if row is None:
+                    continue
+                self.doc_freq[self._row_columns(row)] -= 1
+                self.row_ids[row] = None
+                self.dead_rows.add(row)
+                self._weights = None
+            if len(self.dead_rows) >= self.compact_ratio * max(len(self.row_ids), 1):
+                self.compact()
+                
+    def _row_columns(self, row: int) -> np.ndarray:
+        block_start = 0
+        for block in ([self.matrix] if self.matrix is not None else []) + self._pending:
+            if row < block_start + block.shape[0]:
+                local = row - block_start
+                return block.indices[block.indptr[local]:block.indptr[local + 1]]
+            block_start += block.shape[0]
+        return np.array([], dtype=np.int32)
+        
+    def _materialize(self):
+        if self._pending:
+            blocks = ([self.matrix] if self.matrix is not None else []) + self._pending
+            self.matrix = sparse.vstack(blocks, format='csr') if len(blocks) > 1 else blocks[0]
+            self._pending = []
+            
+    def compact(self):
+        """Drop tombstoned rows from the matrix and side-store"""
+        with self._lock:
+            if not self.dead_rows:
+                return
+            self._materialize()
+            keep = np.array([row for row, doc_id in enumerate(self.row_ids) if doc_id is not None], dtype=np.int64)
+            new_rows = np.full(len(self.row_ids), -1, dtype=np.int64)
+            new_rows[keep] = np.arange(len(keep))
+            
+            self.matrix = self.matrix[keep] if self.matrix is not None else None
+            self.row_ids = [self.row_ids[row] for row in keep]
+            self.row_categories = [self.row_categories[row] for row in keep]
+            self.tag_rows = {tag: remapped for tag, remapped in (
+                (tag, [int(new_rows[row]) for row in rows if new_rows[row] >= 0])
+                for tag, rows in self.tag_rows.items()) if remapped}
+            self.doc_rows = {doc_id: row for row, doc_id in enumerate(self.row_ids)}
+            self.dead_rows = set()
+            self._weights = None
+            
+    def _ensure_weights(self):
+        if self._weights is None:
+            self._materialize()
+            # Smoothed IDF, as in TfidfVectorizer
+            idf = np.log((1 + len(self.doc_rows)) / (1 + self.doc_freq)) + 1
+            squared = self.matrix.multiply(self.matrix).tocsr()
+            doc_norms = np.sqrt(squared @ (idf ** 2))
+            # Column-major copy so a query reads only its own postings
+            self._weights = (idf, doc_norms, self.matrix.tocsc())
+            
+            num_rows = len(self.row_ids)
+            alive = np.ones(num_rows, dtype=bool)
+            alive[list(self.dead_rows)] = False
+            tag_bitmaps = {}
+            for tag, rows in self.tag_rows.items():
+                bitmap = np.zeros(num_rows, dtype=bool)
+                bitmap[rows] = True
+                tag_bitmaps[tag] = bitmap
+            self._columns = {
+                'ids': np.array(self.row_ids, dtype=object),
+                'alive': alive,
+                'categories': np.array(self.row_categories, dtype=np.int32),
+                'tags': tag_bitmaps
+            }
+        return self._weights
+        
+    def _query_scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidate rows sharing a term with the query, and their cosine scores"""
+        idf, doc_norms, postings = self._weights
+        query_counts = self.vectorizer.transform([query]).tocsr()
+        query_counts.sum_duplicates()
+        columns = query_counts.indices
+        query_weights = query_counts.data * idf[columns]
+        query_norm = np.sqrt(np.dot(query_weights, query_weights))
+        if query_norm == 0:
+            return np.array([], dtype=np.int64), np.array([])
+            
+        term_postings = postings[:, columns]
+        rows = term_postings.indices
+        weights = term_postings.data * np.repeat(query_weights * idf[columns], np.diff(term_postings.indptr))
+        candidates, inverse = np.unique(rows, return_inverse=True)
+        dot_products = np.bincount(inverse, weights=weights, minlength=len(candidates))
+        norms = doc_norms[candidates]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(norms > 0, dot_products / (norms * query_norm), 0.0)
+        return candidates, scores
+        
+    def similarities(self, query: str) -> np.ndarray:
+        """Cosine similarity of the query against every row (tombstoned rows score 0)"""
+        with self._lock:
+            if not self.row_ids:
+                return np.zeros(0)
+            self._ensure_weights()
+            candidates, scores = self._query_scores(query)
+            alive = self._columns['alive']
+        result = np.zeros(len(alive))
+        result[candidates] = scores * alive[candidates]
+        return result
+        
+    def search(self, query: str, limit: int = 10, category: str = None, tags: List[str] = None,
+               min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """Top documents for a query, with category/tag filters applied as masks before top-k"""
+        with self._lock:
+            if not self.row_ids:
+                return []
+            self._ensure_weights()
+            candidates, scores = self._query_scores(query)
+            columns = self._columns
+            category_code = self.category_codes.get(category) if category else None
+            
+        if category and category_code is None:
+            return []
+        keep = columns['alive'][candidates] & (scores >= max(min_score, 1e-12))
+        if category:
+            keep &= columns['categories'][candidates] == category_code
+        if tags:
+            tag_mask = np.zeros(len(candidates), dtype=bool)
+            for tag in tags:
+                bitmap = columns['tags'].get(tag)
+                if bitmap is not None:
+                    tag_mask |= bitmap[candidates]
+            keep &= tag_mask
+            
+        candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return [(columns['ids'][row], float(score)) for row, score in zip(candidates[order], scores[order])]
+        
+    def filter_mask(self, document_ids: List[str], category: str = None,
+                    tags: List[str] = None) -> np.ndarray:
+        """Whether each document passes the category/tag filters, read from the side-store"""
+        with self._lock:
+            if self.row_ids:
+                self._ensure_weights()
+            rows = np.array([self.doc_rows.get(doc_id, -1) for doc_id in document_ids], dtype=np.int64)
+            columns = self._columns
+            category_code = self.category_codes.get(category) if category else None
+            
+        keep = rows >= 0
+        if not keep.any() or (category and category_code is None):
+            return np.zeros(len(rows), dtype=bool)
+        safe_rows = np.where(keep, rows, 0)
+        if category:
+            keep &= columns['categories'][safe_rows] == category_code
+        if tags:
+            tag_mask = np.zeros(len(rows), dtype=bool)
+            for tag in tags:
+                bitmap = columns['tags'].get(tag)
+                if bitmap is not None:
+                    tag_mask |= bitmap[safe_rows]
+            keep &= tag_mask
+        return keep
+        
+    def rebuild(self, document_ids: List[str], texts: List[str],
+                categories: List[str] = None, tags: List[List[str]] = None):
+        """Replace the whole index"""
+        with self._lock:
+            self.doc_freq = np.zeros(self.n_features)
+            self.matrix = None
+            self.row_ids = []
+            self.doc_rows = {}
+            self.dead_rows = set()
+            self.row_categories = []
+            self.category_codes = {}
+            self.tag_rows = {}
+            self._pending = []
+            self._weights = None
+            self.add(document_ids, texts, categories, tags)
+
+ROLLUP_TABLES = {'minute': 'search_rollup_minute', 'hour': 'search_rollup_hour'}
+ROLLUP_BUCKET_SQL = {'minute': "strftime('%Y-%m-%d %H:%M:00', timestamp)",
+                     'hour': "strftime('%Y-%m-%d %H:00:00', timestamp)"}
+
+
+def rollup_bucket(timestamp: str, granularity: str) -> str:
+    """Bucket key for a 'YYYY-MM-DD HH:MM:SS' UTC timestamp"""
+    return timestamp[:16] + ":00" if granularity == 'minute' else timestamp[:13] + ":00:00"
+
+
+class SearchQueryLog:
+    """Search query log kept off the request path.
+    
+    record() appends to a bounded in-memory ring buffer; a background
+    writer drains it in one transaction per batch, inserting the raw rows
+    and folding them into per-minute and per-hour rollups. If the writer
+    falls behind, the oldest unwritten queries are dropped and counted.
+    A batch that fails to write goes back to the front of the buffer.
+    """
+    
+    INSERT_SQL = """
+        INSERT INTO search_queries
+        (query, search_type, results_count, avg_score, execution_time, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    
+    def __init__(self, db_path: str, capacity: int = None, flush_interval: float = None,
+                 batch_size: int = 500, minute_retention_days: float = None):
+        self.db_path = db_path
+        self.capacity = capacity or int(os.getenv("MITO_SEARCH_LOG_BUFFER", "10000"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("MITO_SEARCH_LOG_FLUSH_SECONDS", "1.0"))
+        self.batch_size = batch_size
+        self.minute_retention_days = minute_retention_days if minute_retention_days is not None else float(
+            os.getenv("MITO_SEARCH_ROLLUP_MINUTE_DAYS", "2"))
+        self._buffer: deque = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._writer_stop = threading.Event()
+        self._writer_thread = None
+        self._last_prune = 0.0
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'flushes': 0}
+        atexit.register(self.flush)
+        
+    def record(self, query: str, search_type: str, results_count: int,
+               avg_score: float, execution_time: float):
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            if len(self._buffer) == self.capacity:
+                self.stats['dropped'] += 1
+            self._buffer.append((query, search_type, results_count, avg_score, execution_time, timestamp))
+            self.stats['recorded'] += 1
+            pending = len(self._buffer)
+        self._ensure_writer()
+        if pending >= self.batch_size:
+            self._flush_wakeup.set()
+            
+    def _ensure_writer(self):
+        if self._writer_thread is not None:
+            return
+        with self._lock:
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._writer_loop,
+                                                       name="search-query-log",
+                                                       daemon=True)
+                self._writer_thread.start()
+                
+    def _writer_loop(self):
+        while not self._writer_stop.is_set():
+            self._flush_wakeup.wait(self.flush_interval)
+            self._flush_wakeup.clear()
+            self.flush()
+            
+    def close(self):
+        """Stop the background writer and flush what is buffered"""
+        self._writer_stop.set()
+        self._flush_wakeup.set()
+        with self._lock:
+            writer, self._writer_thread = self._writer_thread, None
+        if writer is not None:
+            writer.join()
+        self.flush()
+        atexit.unregister(self.flush)
+            
+    def flush(self) -> int:
+        """Write buffered queries and their rollups in a single transaction"""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+            if not rows:
+                return 0
+                
+            rollups = {granularity: {} for granularity in ROLLUP_TABLES}
+            for _, search_type, results_count, avg_score, execution_time, timestamp in rows:
+                for granularity, buckets in rollups.items():
+                    key = (rollup_bucket(timestamp, granularity), search_type)
+                    count, zero, results, scores, total, peak = buckets.get(key, (0, 0, 0, 0.0, 0.0, 0.0))
+                    buckets[key] = (count + 1, zero + (results_count == 0), results + results_count,
+                                    scores + avg_score, total + execution_time, max(peak, execution_time))
+                    
+            try:
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    with conn:
+                        conn.executemany(self.INSERT_SQL, rows)
+                        for granularity, buckets in rollups.items():
+                            conn.executemany(f"""
+                                INSERT INTO {ROLLUP_TABLES[granularity]} VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                ON CONFLICT(bucket, search_type) DO UPDATE SET
+                                    query_count = query_count + excluded.query_count,
+                                    zero_result_count = zero_result_count + excluded.zero_result_count,
+                                    results_total = results_total + excluded.results_total,
+                                    score_total = score_total + excluded.score_total,
+                                    execution_total = execution_total + excluded.execution_total,
+                                    execution_max = MAX(execution_max, excluded.execution_max)
+                            """, [key + values for key, values in buckets.items()])
+                        self._prune_minutes(conn)
+                finally:
+                    conn.close()
+            except Exception as e:
+                logger.error(f"Failed to flush {len(rows)} search queries: {e}")
+                # Retry next flush, ahead of newer queries; if the buffer has
+                # filled up meanwhile, the oldest rows are dropped as usual
+                with self._lock:
+                    room = self.capacity - len(self._buffer)
+                    kept = rows[max(0, len(rows) - room):] if room > 0 else []
+                    self.stats['dropped'] += len(rows) - len(kept)
+                    self._buffer.extendleft(reversed(kept))
+                return 0
+                
+            with self._lock:
+                self.stats['written'] += len(rows)
+                self.stats['flushes'] += 1
+            return len(rows)
+            
+    def _prune_minutes(self, conn: sqlite3.Connection):
+        # Minute buckets only serve recent activity; hourly rollups are kept
+        if time.monotonic() - self._last_prune < 3600:
+            return
+        self._last_prune = time.monotonic()
+        conn.execute(f"DELETE FROM {ROLLUP_TABLES['minute']} WHERE bucket < datetime('now', ?)",
+                     (f"-{self.minute_retention_days} days",))
+        
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['buffered'] = len(self._buffer)
+        stats['capacity'] = self.capacity
+        return stats
+
+
 class AdvancedSearchDatabase:
     """Enhanced database for advanced search functionality"""
     
-    def __init__(self, db_path: str = "advanced_search.db"):
+    def __init__(self, db_path: str = "advanced_search.db", embedding_dim: int = 384):
         self.db_path = db_path
+        self.embeddings = EmbeddingMatrixStore(os.path.splitext(db_path)[0] + "_embeddings.f32", embedding_dim)
         self.init_database()
+        self._recover_embedding_compaction()
+        self.migrate_pickled_embeddings()
         
     def init_database(self):
         """Initialize advanced search database"""
@@ -268,137 +1247,491 @@ class AdvancedSearchDatabase:
             )
         """)
         
+        # Embeddings live in the matrix file; documents keep the row number
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(documents)")}
+        if 'embedding_row' not in columns:
+            cursor.execute("ALTER TABLE documents ADD COLUMN embedding_row INTEGER")
+        
+        # Marks an embedding compaction whose row remap is committed but
+        # whose compacted matrix file may not have replaced the old one yet
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS search_metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        
+        # Validators for conditional re-crawls
+        queue_columns = {row[1] for row in cursor.execute("PRAGMA table_info(crawl_queue)")}
+        for column in ('etag', 'last_modified'):
+            if column not in queue_columns:
+                cursor.execute(f"ALTER TABLE crawl_queue ADD COLUMN {column} TEXT")
+        
         # Create indexes for better performance
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_category ON documents(category)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawl_queue_pending "
+                       "ON crawl_queue(status, priority DESC, added_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_updated ON documents(updated_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_queries_timestamp ON search_queries(timestamp)")
         
+        # Pre-aggregated query statistics for analytics
+        for table in ROLLUP_TABLES.values():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket TEXT NOT NULL,
+                    search_type TEXT NOT NULL,
+                    query_count INTEGER NOT NULL DEFAULT 0,
+                    zero_result_count INTEGER NOT NULL DEFAULT 0,
+                    results_total INTEGER NOT NULL DEFAULT 0,
+                    score_total REAL NOT NULL DEFAULT 0,
+                    execution_total REAL NOT NULL DEFAULT 0,
+                    execution_max REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bucket, search_type)
+                )
+            """)
+        if cursor.execute(f"SELECT 1 FROM {ROLLUP_TABLES['hour']} LIMIT 1").fetchone() is None:
+            # Existing query history predates the rollups
+            for granularity, table in ROLLUP_TABLES.items():
+                cursor.execute(f"""
+                    INSERT INTO {table}
+                    SELECT {ROLLUP_BUCKET_SQL[granularity]}, search_type, COUNT(*),
+                           COALESCE(SUM(results_count = 0), 0), COALESCE(SUM(results_count), 0),
+                           TOTAL(avg_score), TOTAL(execution_time), COALESCE(MAX(execution_time), 0)
+                    FROM search_queries GROUP BY 1, 2
+                """)
+        
         conn.commit()
         conn.close()
+        
+    def migrate_pickled_embeddings(self, batch_size: int = 1000) -> int:
+        """Move pickled embedding blobs into the matrix file"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        migrated = 0
+        
+        while True:
+            cursor.execute("""
+                SELECT id, embedding FROM documents
+                WHERE embedding IS NOT NULL AND embedding_row IS NULL
+                LIMIT ?
+            """, (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+                
+            doc_ids, embeddings, unreadable = [], [], []
+            for doc_id, blob in rows:
+                try:
+                    embeddings.append(np.asarray(load_legacy_pickle(blob), dtype=np.float32).reshape(-1))
+                    doc_ids.append(doc_id)
+                except Exception as e:
+                    logger.warning(f"Dropping unreadable embedding for {doc_id}: {e}")
+                    unreadable.append((doc_id,))
+                    
+            if doc_ids:
+                first_row = self.embeddings.append(np.vstack(embeddings))
+                cursor.executemany("UPDATE documents SET embedding_row = ?, embedding = NULL WHERE id = ?",
+                                   [(first_row + i, doc_id) for i, doc_id in enumerate(doc_ids)])
+            cursor.executemany("UPDATE documents SET embedding = NULL WHERE id = ?", unreadable)
+            conn.commit()
+            migrated += len(doc_ids)
+            
+        conn.close()
+        if migrated:
+            logger.info(f"Migrated {migrated} pickled embeddings to {self.embeddings.path}")
+        return migrated
+        
+    def embedding_row_stats(self) -> Dict[str, int]:
+        """Rows in the embedding matrix file, and how many no document references"""
+        conn = sqlite3.connect(self.db_path)
+        live = conn.execute("SELECT COUNT(DISTINCT embedding_row) FROM documents "
+                            "WHERE embedding_row IS NOT NULL").fetchone()[0]
+        conn.close()
+        rows = self.embeddings.rows
+        return {'rows': rows, 'live_rows': live, 'dead_rows': max(rows - live, 0)}
+        
+    def compact_embeddings(self) -> Dict[int, int]:
+        """Drop dead rows from the embedding matrix; returns old row -> new row.
+        
+        The new row numbers and a pending marker are committed in one
+        transaction before the compacted file replaces the old one, so a
+        crash at any point is finished or rolled back on the next start.
+        Documents written to this database by another process while the
+        compaction runs are not accounted for; compact when it is idle.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            documents = conn.execute("SELECT id, embedding_row FROM documents "
+                                     "WHERE embedding_row IS NOT NULL").fetchall()
+            
+            def commit(remap):
+                with conn:
+                    conn.executemany("UPDATE documents SET embedding_row = ? WHERE id = ?",
+                                     [(remap[row], doc_id) for doc_id, row in documents if row in remap])
+                    conn.execute("INSERT OR REPLACE INTO search_metadata VALUES ('embedding_compaction', 'pending')")
+                    
+            remap = self.embeddings.compact([row for _, row in documents], commit)
+            with conn:
+                conn.execute("DELETE FROM search_metadata WHERE key = 'embedding_compaction'")
+        finally:
+            conn.close()
+        logger.info(f"Compacted {self.embeddings.path} to {len(remap)} rows")
+        return remap
+        
+    def _recover_embedding_compaction(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            pending = conn.execute("SELECT 1 FROM search_metadata "
+                                   "WHERE key = 'embedding_compaction'").fetchone() is not None
+            self.embeddings.recover_compaction(pending)
+            if pending:
+                with conn:
+                    conn.execute("DELETE FROM search_metadata WHERE key = 'embedding_compaction'")
+        finally:
+            conn.close()
 
-class WebCrawler:
-    """Advanced web crawler for document collection"""
+def _run_coroutine(coro):
+    """Run a coroutine to completion, even when called from inside an event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+class _HostGate:
+    """Per-host connection limit plus a minimum interval between request starts"""
     
-    def __init__(self, db: AdvancedSearchDatabase, max_workers: int = 5):
-        self.db = db
-        self.max_workers = max_workers
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'MITO-Engine-Crawler/1.0 (+https://mito-engine.com/crawler)'
-        })
-        
-    def add_urls_to_queue(self, urls: List[str], priority: int = 1):
-        """Add URLs to crawling queue"""
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
+    def __init__(self, limit: int, interval: float):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.interval = interval
+        self._next_start = 0.0
+        
+    async def wait_turn(self):
+        if self.interval <= 0:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class _CrawlRun:
+    """State for one crawl: hosts, robots lookups, buffered writes and document chunks"""
+    
+    def __init__(self, crawler: "WebCrawler", session, on_documents, chunk_size: int):
+        self.crawler = crawler
+        self.session = session
+        self.on_documents = on_documents
+        self.chunk_size = chunk_size
+        self.global_limit = asyncio.Semaphore(crawler.max_workers)
+        self.gates: Dict[str, _HostGate] = {}
+        self.robots_tasks: Dict[str, asyncio.Task] = {}
+        self.documents: List[Document] = []
+        self.deliveries: List[asyncio.Task] = []
+        self.delivery_lock = asyncio.Lock()
+        self.queue_updates: List[tuple] = []
+        self.history: List[tuple] = []
+        self.writes: List[asyncio.Task] = []
+        self.write_lock = asyncio.Lock()
+        self.summary = {'urls': 0, 'fetched': 0, 'not_modified': 0, 'blocked': 0,
+                        'failed': 0, 'documents': 0, 'indexed': 0}
+        self.conn = None  # opened by the first write, in a worker thread
         
-        for url in urls:
+    def gate(self, host: str, crawl_delay: Optional[float]) -> _HostGate:
+        gate = self.gates.get(host)
+        if gate is None:
+            interval = max(self.crawler.host_delay, crawl_delay or 0)
+            gate = self.gates[host] = _HostGate(self.crawler.per_host_limit, interval)
+        return gate
+        
+    def finish(self, url_id: int, url: str, status: str, status_code: int, content_length: int,
+               processing_time: float, error_message: str = None, etag: str = None,
+               last_modified: str = None):
+        """Buffer the queue update and history row for one URL"""
+        self.summary[{'completed': 'fetched'}.get(status, status)] += 1
+        self.queue_updates.append((status, etag, last_modified, url_id))
+        self.history.append((url, status_code, content_length, processing_time,
+                             status in ('completed', 'not_modified'), error_message))
+        if len(self.history) >= self.crawler.write_batch_size:
+            self.flush_writes()
+            
+    def flush_writes(self):
+        """Hand the buffered rows to a writer task so SQLite never blocks the event loop"""
+        if not self.history:
+            return
+        queue_updates, history = self.queue_updates, self.history
+        self.queue_updates, self.history = [], []
+        self.writes.append(asyncio.create_task(self._write(queue_updates, history)))
+        
+    async def _write(self, queue_updates: List[tuple], history: List[tuple]):
+        # One batch at a time, in commit order, on a worker thread
+        async with self.write_lock:
             try:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO crawl_queue (url, priority)
-                    VALUES (?, ?)
-                """, (url, priority))
-            except sqlite3.Error as e:
-                logger.warning(f"Failed to add URL {url} to queue: {e}")
+                await asyncio.to_thread(self._write_batch, queue_updates, history)
+            except Exception as e:
+                logger.error(f"Failed to write {len(history)} crawl results: {e}")
                 
-        conn.commit()
-        conn.close()
+    def _write_batch(self, queue_updates: List[tuple], history: List[tuple]):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.crawler.db.db_path, check_same_thread=False)
+        with self.conn:
+            # Only failed fetches count towards the retry cap
+            self.conn.executemany("""
+                UPDATE crawl_queue
+                SET status = ?1, etag = COALESCE(?2, etag), last_modified = COALESCE(?3, last_modified),
+                    last_attempt = CURRENT_TIMESTAMP, retry_count = retry_count + (?1 = 'failed')
+                WHERE id = ?4
+            """, queue_updates)
+            self.conn.executemany("""
+                INSERT INTO crawl_history
+                (url, status_code, content_length, processing_time, success, error_message)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, history)
+        
+    def emit(self, document: Document):
+        self.summary['documents'] += 1
+        self.documents.append(document)
+        if len(self.documents) >= self.chunk_size:
+            self._deliver_buffered()
+            
+    def _deliver_buffered(self):
+        if not self.documents or self.on_documents is None:
+            return
+        chunk, self.documents = self.documents, []
+        self.deliveries.append(asyncio.create_task(self._deliver(chunk)))
+        
+    async def _deliver(self, chunk: List[Document]):
+        # One chunk at a time so the consumer never runs concurrently with itself
+        async with self.delivery_lock:
+            try:
+                indexed = await asyncio.to_thread(self.on_documents, chunk)
+                if isinstance(indexed, int):
+                    self.summary['indexed'] += indexed
+            except Exception as e:
+                logger.error(f"Failed to deliver {len(chunk)} crawled documents: {e}")
+                
+    async def close(self):
+        self._deliver_buffered()
+        if self.deliveries:
+            await asyncio.gather(*self.deliveries)
+        self.flush_writes()
+        if self.writes:
+            await asyncio.gather(*self.writes)
+        if self.conn is not None:
+            self.conn.close()
+
+
+class WebCrawler:
+    """Asynchronous web crawler for document collection.
+    
+    All fetches share one aiohttp session under a global concurrency cap.
+    Each host gets its own connection limit and a minimum interval between
+    requests, which is the larger of the configured delay and the
+    robots.txt Crawl-delay. robots.txt is fetched once per host and cached;
+    as RFC 9309 asks, a server error on it disallows the host until the
+    cache entry expires.
+    Pages crawled before are re-requested conditionally with their stored
+    ETag/Last-Modified. Queue and history updates are written in batches
+    on a worker thread, off the event loop.
+    """
+    
+    USER_AGENT = 'MITO-Engine-Crawler/1.0 (+https://mito-engine.com/crawler)'
+    
+    def __init__(self, db: AdvancedSearchDatabase, max_workers: int = None, per_host_limit: int = None,
+                 host_delay: float = None, timeout: float = 30, respect_robots: bool = True,
+                 write_batch_size: int = 200):
+        self.db = db
+        self.max_workers = max_workers or int(os.getenv("MITO_CRAWLER_CONCURRENCY", "32"))
+        self.per_host_limit = per_host_limit or int(os.getenv("MITO_CRAWLER_PER_HOST", "4"))
+        self.host_delay = host_delay if host_delay is not None else float(
+            os.getenv("MITO_CRAWLER_HOST_DELAY", "0"))
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.robots_ttl = float(os.getenv("MITO_CRAWLER_ROBOTS_TTL", "3600"))
+        self.write_batch_size = write_batch_size
+        self._robots: Dict[str, Tuple[float, Optional[RobotFileParser]]] = {}
         
+    def add_urls_to_queue(self, urls: List[str], priority: int = 1, recrawl: bool = False):
+        """Add URLs to crawling queue; recrawl re-queues URLs that were already crawled"""
+        conn = sqlite3.connect(self.db.db_path)
+        try:
+            with conn:
+                if recrawl:
+                    conn.executemany("""
+                        INSERT INTO crawl_queue (url, priority) VALUES (?, ?)
+                        ON CONFLICT(url) DO UPDATE SET status = 'pending', retry_count = 0,
+                            priority = excluded.priority
+                    """, [(url, priority) for url in urls])
+                else:
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO crawl_queue (url, priority)
+                        VALUES (?, ?)
+                    """, [(url, priority) for url in urls])
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to add {len(urls)} URLs to queue: {e}")
+        finally:
+            conn.close()
+            
+    def _pending_urls(self, limit: int) -> List[tuple]:
+        conn = sqlite3.connect(self.db.db_path)
+        try:
+            return conn.execute("""
+                SELECT id, url, etag, last_modified FROM crawl_queue 
+                WHERE status = 'pending' AND retry_count < 3
+                ORDER BY priority DESC, added_at ASC
+                LIMIT ?
+            """, (limit,)).fetchall()
+        finally:
+            conn.close()
+            
     def crawl_pending_urls(self, limit: int = 50) -> List[Document]:
         """Crawl pending URLs from queue"""
-        # Get pending URLs
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
+        documents: List[Document] = []
+        self.crawl(limit, on_documents=documents.extend)
+        return documents
         
-        cursor.execute("""
-            SELECT id, url FROM crawl_queue 
-            WHERE status = 'pending' AND retry_count < 3
-            ORDER BY priority DESC, added_at ASC
-            LIMIT ?
-        """, (limit,))
+    def crawl(self, limit: int = 50, on_documents=None, chunk_size: int = 100) -> Dict[str, Any]:
+        """Crawl pending URLs, passing parsed documents to on_documents in chunks"""
+        pending = self._pending_urls(limit)
+        if not pending:
+            return {'urls': 0, 'fetched': 0, 'not_modified': 0, 'blocked': 0,
+                    'failed': 0, 'documents': 0, 'indexed': 0, 'elapsed_seconds': 0.0}
+        return _run_coroutine(self._crawl_async(pending, on_documents, chunk_size))
         
-        pending_urls = cursor.fetchall()
-        conn.close()
+    async def _crawl_async(self, pending: List[tuple], on_documents, chunk_size: int) -> Dict[str, Any]:
+        start_time = time.time()
+        connector = aiohttp.TCPConnector(limit=self.max_workers, limit_per_host=self.per_host_limit)
+        async with aiohttp.ClientSession(connector=connector,
+                                         timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                         headers={'User-Agent': self.USER_AGENT}) as session:
+            run = _CrawlRun(self, session, on_documents, chunk_size)
+            try:
+                run.summary['urls'] = len(pending)
+                await asyncio.gather(*(self._crawl_url(run, *row) for row in pending))
+            finally:
+                await run.close()
+        summary = dict(run.summary)
+        summary['elapsed_seconds'] = round(time.time() - start_time, 3)
+        return summary
         
-        if not pending_urls:
-            return []
-            
-        documents = []
+    async def _robots_for(self, run: _CrawlRun, origin: str) -> Optional[RobotFileParser]:
+        """Cached robots.txt rules for an origin (None means everything is allowed)"""
+        cached = self._robots.get(origin)
+        if cached and time.monotonic() - cached[0] < self.robots_ttl:
+            return cached[1]
+        # Concurrent requests to a new host share one robots.txt fetch
+        task = run.robots_tasks.get(origin)
+        if task is None:
+            task = run.robots_tasks[origin] = asyncio.create_task(self._fetch_robots(run, origin))
+        return await task
         
-        # Crawl URLs in parallel
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_url = {
-                executor.submit(self._crawl_single_url, url_id, url): (url_id, url)
-                for url_id, url in pending_urls
-            }
-            
-            for future in as_completed(future_to_url):
-                url_id, url = future_to_url[future]
-                try:
-                    document = future.result()
-                    if document:
-                        documents.append(document)
-                        self._update_crawl_status(url_id, 'completed')
-                    else:
-                        self._update_crawl_status(url_id, 'failed')
-                except Exception as e:
-                    logger.error(f"Failed to crawl {url}: {e}")
-                    self._update_crawl_status(url_id, 'failed')
-                    
-        return documents
+    async def _fetch_robots(self, run: _CrawlRun, origin: str) -> Optional[RobotFileParser]:
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            async with run.session.get(parser.url) as response:
+                if response.status in (401, 403) or response.status >= 500:
+                    parser.disallow_all = True
+                elif response.status == 200:
+                    parser.parse((await response.text(errors='replace')).splitlines())
+                else:
+                    parser = None
+        except Exception as e:
+            logger.debug(f"robots.txt unavailable for {origin}: {e}")
+            parser = None
+        self._robots[origin] = (time.monotonic(), parser)
+        return parser
         
-    def _crawl_single_url(self, url_id: int, url: str) -> Optional[Document]:
+    async def _crawl_url(self, run: _CrawlRun, url_id: int, url: str,
+                         etag: Optional[str], last_modified: Optional[str]):
         """Crawl a single URL"""
         start_time = time.time()
+        parsed = urlparse(url)
         
-        try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Parse content
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title
-            title_elem = soup.find('title')
-            title = title_elem.get_text(strip=True) if title_elem else url
-            
-            # Extract main content
-            content = self._extract_content(soup)
-            
-            if not content or len(content.strip()) < 100:
-                return None
+        robots = None
+        if self.respect_robots and parsed.scheme in ('http', 'https'):
+            robots = await self._robots_for(run, f"{parsed.scheme}://{parsed.netloc}")
+            if robots is not None and not robots.can_fetch(self.USER_AGENT, url):
+                run.finish(url_id, url, 'blocked', 0, 0, 0.0, 'Disallowed by robots.txt')
+                return
                 
-            # Generate document ID
-            doc_id = hashlib.md5(f"{url}_{title}".encode()).hexdigest()
-            
-            # Extract metadata
-            metadata = {
-                'content_length': len(content),
-                'response_status': response.status_code,
-                'content_type': response.headers.get('content-type', ''),
-                'last_modified': response.headers.get('last-modified', ''),
-                'processing_time': time.time() - start_time
-            }
-            
-            # Log successful crawl
-            self._log_crawl_attempt(url, response.status_code, len(content), 
-                                  time.time() - start_time, True)
-            
-            return Document(
-                id=doc_id,
-                title=title,
-                content=content,
-                url=url,
-                category=self._categorize_content(title, content),
-                tags=self._extract_tags(title, content),
-                metadata=metadata,
-                indexed_at=datetime.now().isoformat()
-            )
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
             
+        gate = run.gate(parsed.netloc, robots.crawl_delay(self.USER_AGENT) if robots else None)
+        try:
+            async with gate.semaphore:
+                await gate.wait_turn()
+                async with run.global_limit:
+                    async with run.session.get(url, headers=headers) as response:
+                        if response.status == 304:
+                            run.finish(url_id, url, 'not_modified', 304, 0, time.time() - start_time)
+                            return
+                        response.raise_for_status()
+                        html = await response.text(errors='replace')
+                        status_code = response.status
+                        response_headers = response.headers
+                        
+            # Parse off the event loop
+            document = await asyncio.to_thread(self._parse_document, url, html, status_code,
+                                               response_headers, start_time)
         except Exception as e:
-            self._log_crawl_attempt(url, 0, 0, time.time() - start_time, False, str(e))
+            run.finish(url_id, url, 'failed', getattr(e, 'status', 0), 0, time.time() - start_time,
+                       str(e) or type(e).__name__)
+            return
+            
+        if document is None:
+            run.finish(url_id, url, 'failed', status_code, 0, time.time() - start_time,
+                       'Insufficient content')
+            return
+        run.finish(url_id, url, 'completed', status_code, len(document.content), time.time() - start_time,
+                   etag=response_headers.get('ETag'), last_modified=response_headers.get('Last-Modified'))
+        run.emit(document)
+        
+    def _parse_document(self, url: str, html: str, status_code: int, headers,
+                        start_time: float) -> Optional[Document]:
+        """Build a document from a fetched page, or None if it has too little content"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract title
+        title_elem = soup.find('title')
+        title = title_elem.get_text(strip=True) if title_elem else url
+        
+        # Extract main content
+        content = self._extract_content(soup)
+        
+        if not content or len(content.strip()) < 100:
             return None
             
+        # Generate document ID
+        doc_id = hashlib.md5(f"{url}_{title}".encode()).hexdigest()
+        
+        # Extract metadata
+        metadata = {
+            'content_length': len(content),
+            'response_status': status_code,
+            'content_type': headers.get('Content-Type', ''),
+            'last_modified': headers.get('Last-Modified', ''),
+            'etag': headers.get('ETag', ''),
+            'processing_time': time.time() - start_time
+        }
+        
+        return Document(
+            id=doc_id,
+            title=title,
+            content=content,
+            url=url,
+            category=self._categorize_content(title, content),
+            tags=self._extract_tags(title, content),
+            metadata=metadata,
+            indexed_at=datetime.now().isoformat()
+        )
+            
     def _extract_content(self, soup: BeautifulSoup) -> str:
         """Extract main content from HTML"""
         # Remove script and style elements
@@ -467,54 +1800,54 @@ class WebCrawler:
                 found_tags.append(tag)
                 
         return found_tags[:10]  # Limit to 10 tags
-        
-    def _update_crawl_status(self, url_id: int, status: str):
-        """Update crawl status in queue"""
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE crawl_queue 
-            SET status = ?, last_attempt = CURRENT_TIMESTAMP,
-                retry_count = retry_count + 1
-            WHERE id = ?
-        """, (status, url_id))
-        
-        conn.commit()
-        conn.close()
-        
-    def _log_crawl_attempt(self, url: str, status_code: int, content_length: int,
-                          processing_time: float, success: bool, error_message: str = None):
-        """Log crawl attempt"""
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO crawl_history 
-            (url, status_code, content_length, processing_time, success, error_message)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (url, status_code, content_length, processing_time, success, error_message))
-        
-        conn.commit()
-        conn.close()
 
 class AdvancedSearchEngine:
     """Main advanced search engine with transformer embeddings"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.db = AdvancedSearchDatabase()
-        self.embedding_manager = EmbeddingManager(model_name)
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", db_path: str = "advanced_search.db",
+                 index_path: str = "search_index.faiss", embedding_manager: EmbeddingManager = None):
+        self.db = AdvancedSearchDatabase(db_path)
+        self.embedding_manager = embedding_manager or EmbeddingManager(model_name, cache_db_path=db_path)
+        if self.embedding_manager.cache is None:
+            self.embedding_manager.cache = EmbeddingCache(db_path, self.embedding_manager.cache_namespace,
+                                                          self.embedding_manager.embedding_dim)
         self.crawler = WebCrawler(self.db)
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=10000,
-            stop_words='english',
-            ngram_range=(1, 2)
-        )
-        self.tfidf_matrix = None
-        self.document_index = {}  # Maps doc_id to index in matrices
+        self.query_log = SearchQueryLog(db_path)
+        self.tfidf_index = IncrementalTfidfIndex()
+        self.tfidf_vectorizer = self.tfidf_index.vectorizer
+        
+        # The FAISS index is written to disk at most once per interval
+        self.index_path = index_path
+        self.index_save_interval = float(os.getenv("MITO_SEARCH_INDEX_SAVE_SECONDS", "30"))
+        # Re-embedded documents leave dead rows in the embedding matrix; the
+        # file is compacted on startup once they reach this share of it
+        self.embedding_compact_ratio = float(os.getenv("MITO_EMBEDDING_COMPACT_RATIO", "0.5"))
+        self._index_dirty = False
+        self._last_index_save = time.monotonic()
+        
+        # Hybrid retrieval settings
+        self.fusion_method = os.getenv("MITO_HYBRID_FUSION", "rrf")  # "rrf" or "weighted"
+        self.rrf_k = int(os.getenv("MITO_HYBRID_RRF_K", "60"))
+        self.semantic_weight = float(os.getenv("MITO_HYBRID_SEMANTIC_WEIGHT", "0.6"))
+        self._retrieval_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-retrieval")
         
         # Load existing index if available
         self._load_search_index()
+        atexit.register(self.persist_indexes)
+        
+    @property
+    def tfidf_matrix(self):
+        """Term-count matrix behind the keyword index (None until documents are indexed)"""
+        if not self.tfidf_index.row_ids:
+            return None
+        with self.tfidf_index._lock:
+            self.tfidf_index._materialize()
+            return self.tfidf_index.matrix
+        
+    @property
+    def document_index(self) -> Dict[str, int]:
+        """Maps doc_id to row in the TF-IDF matrix"""
+        return self.tfidf_index.doc_rows
         
     def index_document(self, document: Document) -> bool:
         """Index a single document"""
@@ -525,10 +1858,10 @@ class AdvancedSearchEngine:
             document.embedding = embedding
             
             # Store in database
-            self._store_document(document)
+            embedding_row = self._store_document(document)
             
             # Update search indexes
-            self._update_search_indexes()
+            self._add_to_search_indexes([document], [embedding_row])
             
             logger.info(f"Indexed document: {document.title}")
             return True
@@ -551,31 +1884,34 @@ class AdvancedSearchEngine:
             for doc, embedding in zip(documents, embeddings):
                 doc.embedding = embedding
                 
-            # Store in database
+            # Append embeddings to the matrix file, then store rows in database
+            first_row = self.db.embeddings.append(embeddings)
             conn = sqlite3.connect(self.db.db_path)
             cursor = conn.cursor()
             
-            indexed_count = 0
-            for doc in documents:
+            stored, stored_rows = [], []
+            for offset, doc in enumerate(documents):
                 try:
                     cursor.execute("""
                         INSERT OR REPLACE INTO documents 
-                        (id, title, content, url, category, tags, metadata, embedding)
+                        (id, title, content, url, category, tags, metadata, embedding_row)
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                     """, (
                         doc.id, doc.title, doc.content, doc.url, doc.category,
                         json.dumps(doc.tags), json.dumps(doc.metadata),
-                        pickle.dumps(doc.embedding)
+                        first_row + offset
                     ))
-                    indexed_count += 1
+                    stored.append(doc)
+                    stored_rows.append(first_row + offset)
                 except sqlite3.Error as e:
                     logger.warning(f"Failed to store document {doc.id}: {e}")
                     
             conn.commit()
             conn.close()
+            indexed_count = len(stored)
             
             # Update search indexes
-            self._update_search_indexes()
+            self._add_to_search_indexes(stored, stored_rows)
             
             logger.info(f"Batch indexed {indexed_count} documents")
             return indexed_count
@@ -587,195 +1923,186 @@ class AdvancedSearchEngine:
     def search(self, query: str, search_type: str = "hybrid", limit: int = 10,
                category: str = None, tags: List[str] = None) -> List[SearchResult]:
         """Perform advanced search with multiple algorithms"""
+        return self.search_detailed(query, search_type, limit, category, tags)['results']
+        
+    def search_detailed(self, query: str, search_type: str = "hybrid", limit: int = 10,
+                        category: str = None, tags: List[str] = None,
+                        fusion: str = None) -> Dict[str, Any]:
+        """Search and report per-stage timings (milliseconds) alongside the results"""
         start_time = time.time()
+        timings: Dict[str, float] = {}
         
         try:
             if search_type == "semantic":
-                results = self._semantic_search(query, limit, category, tags)
+                hits = self._timed(timings, 'semantic', self._semantic_hits, query, limit, category, tags)
+                results = self._timed(timings, 'hydrate', self._hydrate,
+                                      [(doc_id, score, score, 0.0) for doc_id, score in hits])
             elif search_type == "keyword":
-                results = self._keyword_search(query, limit, category, tags)
+                hits = self._timed(timings, 'keyword', self._keyword_hits, query, limit, category, tags)
+                results = self._timed(timings, 'hydrate', self._hydrate,
+                                      [(doc_id, score, 0.0, score) for doc_id, score in hits])
             elif search_type == "hybrid":
-                results = self._hybrid_search(query, limit, category, tags)
+                results = self._hybrid_search(query, limit, category, tags, fusion, timings)
             else:
                 raise ValueError(f"Unknown search type: {search_type}")
                 
             # Log search query
             execution_time = time.time() - start_time
-            avg_score = sum(r.combined_score for r in results) / len(results) if results else 0
+            timings['total'] = round(execution_time * 1000, 3)
+            avg_score = sum(self._similarity(r, search_type) for r in results) / len(results) if results else 0
             self._log_search_query(query, search_type, len(results), avg_score, execution_time)
             
-            return results
+            return {'results': results, 'search_type': search_type, 'timings': timings}
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
-            return []
+            return {'results': [], 'search_type': search_type, 'timings': timings, 'error': str(e)}
             
-    def _semantic_search(self, query: str, limit: int, category: str = None,
-                        tags: List[str] = None) -> List[SearchResult]:
-        """Perform semantic search using embeddings"""
+    @staticmethod
+    def _timed(timings: Dict[str, float], stage: str, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 3)
+            
+    def _semantic_hits(self, query: str, limit: int, category: str = None,
+                       tags: List[str] = None) -> List[Tuple[str, float]]:
+        """Nearest documents by embedding, filtered by category/tags"""
         if not self.embedding_manager.faiss_index:
             return []
             
-        # Generate query embedding
-        query_embedding = self.embedding_manager.encode_text(query)
-        
-        # Search similar documents
+        # Query embeddings come from an in-process LRU
+        query_embedding = self.embedding_manager.encode_query(query)
         similar_docs = self.embedding_manager.search_similar(query_embedding, limit * 2)
         
-        # Filter and format results
+        if category or tags:
+            mask = self.tfidf_index.filter_mask([doc_id for doc_id, _ in similar_docs], category, tags)
+            similar_docs = [hit for hit, keep in zip(similar_docs, mask) if keep]
+        return similar_docs[:limit]
+        
+    def _keyword_hits(self, query: str, limit: int, category: str = None,
+                      tags: List[str] = None) -> List[Tuple[str, float]]:
+        """Top TF-IDF matches; filters and the relevance threshold apply inside the index"""
+        if not len(self.tfidf_index):
+            return []
+        return self.tfidf_index.search(query, limit, category, tags, min_score=0.1)
+        
+    def _hydrate(self, scored: List[Tuple[str, float, float, float]]) -> List[SearchResult]:
+        """Turn (doc_id, combined, embedding, tfidf) scores into results with one batched fetch"""
+        documents = self._get_documents([doc_id for doc_id, _, _, _ in scored])
         results = []
-        for doc_id, score in similar_docs:
-            document = self._get_document(doc_id)
+        for doc_id, combined_score, embedding_score, tfidf_score in scored:
+            document = documents.get(doc_id)
             if not document:
                 continue
-                
-            # Apply filters
-            if category and document.get('category') != category:
-                continue
-                
-            if tags and not any(tag in document.get('tags', []) for tag in tags):
-                continue
-                
-            result = SearchResult(
+            results.append(SearchResult(
                 id=doc_id,
                 title=document['title'],
                 content=document['content'][:500] + "..." if len(document['content']) > 500 else document['content'],
                 url=document['url'],
-                score=score,
-                embedding_score=score,
-                tfidf_score=0.0,
-                combined_score=score,
+                score=combined_score,
+                embedding_score=embedding_score,
+                tfidf_score=tfidf_score,
+                combined_score=combined_score,
                 metadata=json.loads(document['metadata']) if document['metadata'] else {},
                 timestamp=datetime.now().isoformat()
-            )
-            
-            results.append(result)
-            
-            if len(results) >= limit:
-                break
-                
+            ))
         return results
         
+    def _semantic_search(self, query: str, limit: int, category: str = None,
+                        tags: List[str] = None) -> List[SearchResult]:
+        """Perform semantic search using embeddings"""
+        hits = self._semantic_hits(query, limit, category, tags)
+        return self._hydrate([(doc_id, score, score, 0.0) for doc_id, score in hits])
+        
     def _keyword_search(self, query: str, limit: int, category: str = None,
                        tags: List[str] = None) -> List[SearchResult]:
         """Perform keyword-based search using TF-IDF"""
-        if self.tfidf_matrix is None:
-            return []
-            
         try:
-            # Transform query
-            query_vector = self.tfidf_vectorizer.transform([query])
-            
-            # Calculate similarities
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
-            
-            # Get top results
-            top_indices = similarities.argsort()[-limit*2:][::-1]
-            
-            results = []
-            for idx in top_indices:
-                if similarities[idx] < 0.1:  # Minimum relevance threshold
-                    break
-                    
-                # Get document ID from index mapping
-                doc_id = None
-                for did, didx in self.document_index.items():
-                    if didx == idx:
-                        doc_id = did
-                        break
-                        
-                if not doc_id:
-                    continue
-                    
-                document = self._get_document(doc_id)
-                if not document:
-                    continue
-                    
-                # Apply filters
-                if category and document.get('category') != category:
-                    continue
-                    
-                if tags and not any(tag in document.get('tags', []) for tag in tags):
-                    continue
-                    
-                result = SearchResult(
-                    id=doc_id,
-                    title=document['title'],
-                    content=document['content'][:500] + "..." if len(document['content']) > 500 else document['content'],
-                    url=document['url'],
-                    score=float(similarities[idx]),
-                    embedding_score=0.0,
-                    tfidf_score=float(similarities[idx]),
-                    combined_score=float(similarities[idx]),
-                    metadata=json.loads(document['metadata']) if document['metadata'] else {},
-                    timestamp=datetime.now().isoformat()
-                )
-                
-                results.append(result)
-                
-                if len(results) >= limit:
-                    break
-                    
-            return results
+            hits = self._keyword_hits(query, limit, category, tags)
+            return self._hydrate([(doc_id, score, 0.0, score) for doc_id, score in hits])
             
         except Exception as e:
             logger.error(f"Keyword search failed: {e}")
             return []
             
     def _hybrid_search(self, query: str, limit: int, category: str = None,
-                      tags: List[str] = None) -> List[SearchResult]:
+                      tags: List[str] = None, fusion: str = None,
+                      timings: Dict[str, float] = None) -> List[SearchResult]:
         """Perform hybrid search combining semantic and keyword approaches"""
-        # Get results from both methods
-        semantic_results = self._semantic_search(query, limit, category, tags)
-        keyword_results = self._keyword_search(query, limit, category, tags)
-        
-        # Combine and rerank results
-        combined_results = {}
-        
-        # Add semantic results with weight
-        for result in semantic_results:
-            combined_results[result.id] = result
-            
-        # Add keyword results with weight and combine scores
-        for result in keyword_results:
-            if result.id in combined_results:
-                # Combine scores with weights
-                existing = combined_results[result.id]
-                combined_score = (0.6 * existing.embedding_score + 0.4 * result.tfidf_score)
-                existing.tfidf_score = result.tfidf_score
-                existing.combined_score = combined_score
-                existing.score = combined_score
-            else:
-                result.combined_score = 0.4 * result.tfidf_score
-                result.score = result.combined_score
-                combined_results[result.id] = result
-                
-        # Sort by combined score and return top results
-        final_results = sorted(
-            combined_results.values(),
-            key=lambda x: x.combined_score,
-            reverse=True
-        )
+        timings = timings if timings is not None else {}
+        depth = limit * 2  # fuse from deeper lists than we return
+        
+        # Run both retrievers concurrently
+        semantic_future = self._retrieval_executor.submit(
+            self._timed, timings, 'semantic', self._semantic_hits, query, depth, category, tags)
+        keyword_future = self._retrieval_executor.submit(
+            self._timed, timings, 'keyword', self._keyword_hits, query, depth, category, tags)
+        semantic_hits = semantic_future.result()
+        keyword_hits = keyword_future.result()
+        
+        fused = self._timed(timings, 'fusion', self._fuse, semantic_hits, keyword_hits,
+                            fusion or self.fusion_method)
+        return self._timed(timings, 'hydrate', self._hydrate, fused[:limit])
+        
+    @staticmethod
+    def _similarity(result: SearchResult, search_type: str) -> float:
+        """Retriever similarity logged as avg_score, independent of the fusion method.
         
-        return final_results[:limit]
+        RRF and normalized weighted scores are rank-based or relative to the
+        best hit, so hybrid queries log the same 0.6/0.4 blend of cosine and
+        TF-IDF similarity they always have, keeping analytics comparable.
+        """
+        if search_type == "hybrid":
+            return 0.6 * result.embedding_score + 0.4 * result.tfidf_score
+        return result.combined_score
         
-    def crawl_and_index_urls(self, urls: List[str], priority: int = 1) -> Dict[str, Any]:
-        """Crawl URLs and index the content"""
+    def _fuse(self, semantic_hits: List[Tuple[str, float]], keyword_hits: List[Tuple[str, float]],
+              method: str) -> List[Tuple[str, float, float, float]]:
+        """Combine ranked lists by reciprocal rank fusion ("rrf") or normalized weighted sum ("weighted")"""
+        semantic = dict(semantic_hits)
+        keyword = dict(keyword_hits)
+        combined: Dict[str, float] = defaultdict(float)
+        
+        if method == "rrf":
+            for ranked in (semantic_hits, keyword_hits):
+                for rank, (doc_id, _) in enumerate(ranked, 1):
+                    combined[doc_id] += 1.0 / (self.rrf_k + rank)
+        elif method == "weighted":
+            # Scale each list to its best score so neither retriever dominates by units
+            semantic_max = max(semantic.values(), default=0) or 1.0
+            keyword_max = max(keyword.values(), default=0) or 1.0
+            for doc_id, score in semantic_hits:
+                combined[doc_id] += self.semantic_weight * score / semantic_max
+            for doc_id, score in keyword_hits:
+                combined[doc_id] += (1 - self.semantic_weight) * score / keyword_max
+        else:
+            raise ValueError(f"Unknown fusion method: {method}")
+            
+        ranked = sorted(combined.items(), key=lambda item: item[1], reverse=True)
+        return [(doc_id, score, semantic.get(doc_id, 0.0), keyword.get(doc_id, 0.0))
+                for doc_id, score in ranked]
+        
+    def crawl_and_index_urls(self, urls: List[str], priority: int = 1,
+                             recrawl: bool = False) -> Dict[str, Any]:
+        """Crawl URLs and index the content as it arrives"""
         try:
             # Add URLs to crawl queue
-            self.crawler.add_urls_to_queue(urls, priority)
-            
-            # Crawl pending URLs
-            documents = self.crawler.crawl_pending_urls(len(urls))
+            self.crawler.add_urls_to_queue(urls, priority, recrawl)
             
-            # Index crawled documents
-            indexed_count = self.index_documents_batch(documents)
+            # Crawl pending URLs, indexing documents in chunks
+            summary = self.crawler.crawl(len(urls), on_documents=self.index_documents_batch)
             
             return {
                 'urls_queued': len(urls),
-                'documents_crawled': len(documents),
-                'documents_indexed': indexed_count,
-                'success_rate': indexed_count / len(urls) if urls else 0
+                'documents_crawled': summary['documents'],
+                'documents_indexed': summary['indexed'],
+                'not_modified': summary['not_modified'],
+                'blocked': summary['blocked'],
+                'failed': summary['failed'],
+                'elapsed_seconds': summary['elapsed_seconds'],
+                'success_rate': summary['indexed'] / len(urls) if urls else 0
             }
             
         except Exception as e:
@@ -794,13 +2121,14 @@ class AdvancedSearchEngine:
             conn = sqlite3.connect(self.db.db_path)
             cursor = conn.cursor()
             
-            # Query statistics
-            cursor.execute("""
-                SELECT search_type, COUNT(*) as count, AVG(avg_score) as avg_score
-                FROM search_queries 
-                WHERE timestamp >= datetime('now', '-{} days')
+            # Query statistics come from the hourly rollups
+            self.query_log.flush()
+            cursor.execute(f"""
+                SELECT search_type, SUM(query_count), SUM(score_total) / SUM(query_count)
+                FROM {ROLLUP_TABLES['hour']}
+                WHERE bucket >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
                 GROUP BY search_type
-            """.format(days))
+            """, (f"-{days} days",))
             
             search_stats = {}
             for row in cursor.fetchall():
@@ -809,6 +2137,19 @@ class AdvancedSearchEngine:
                     'avg_score': row[2]
                 }
                 
+            cursor.execute(f"""
+                SELECT SUM(query_count), SUM(zero_result_count), SUM(execution_total), MAX(execution_max)
+                FROM {ROLLUP_TABLES['minute']}
+                WHERE bucket >= strftime('%Y-%m-%d %H:%M:00', 'now', '-59 minutes')
+            """)
+            count, zero_results, execution_total, execution_max = cursor.fetchone()
+            last_hour = {
+                'count': count or 0,
+                'zero_result_rate': round(zero_results / count, 4) if count else 0.0,
+                'avg_execution_ms': round(execution_total / count * 1000, 3) if count else 0.0,
+                'max_execution_ms': round(execution_max * 1000, 3) if count else 0.0
+            }
+                
             # Document statistics
             cursor.execute("SELECT COUNT(*) FROM documents")
             total_docs = cursor.fetchone()[0]
@@ -819,42 +2160,51 @@ class AdvancedSearchEngine:
             # Recent crawl activity
             cursor.execute("""
                 SELECT COUNT(*) FROM crawl_history 
-                WHERE crawled_at >= datetime('now', '-{} days') AND success = 1
-            """.format(days))
+                WHERE crawled_at >= datetime('now', ?) AND success = 1
+            """, (f"-{days} days",))
             successful_crawls = cursor.fetchone()[0]
             
             conn.close()
             
             return {
                 'search_statistics': search_stats,
+                'searches_last_hour': last_hour,
+                'query_log': self.query_log.get_stats(),
                 'total_documents': total_docs,
                 'category_distribution': category_stats,
                 'successful_crawls_last_week': successful_crawls,
                 'embedding_model': self.embedding_manager.model_name,
-                'index_size': len(self.embedding_manager.document_ids)
+                'index_size': len(self.embedding_manager.document_ids),
+                'vector_index': self.embedding_manager.get_index_info(),
+                'embedding_matrix': self.db.embedding_row_stats(),
+                'embedding_cache': self.embedding_manager.cache.get_stats() if self.embedding_manager.cache else {},
+                'query_embedding_cache': dict(self.embedding_manager.query_cache_stats,
+                                              entries=len(self.embedding_manager._query_cache))
             }
             
         except Exception as e:
             logger.error(f"Failed to get search analytics: {e}")
             return {}
             
-    def _store_document(self, document: Document):
-        """Store document in database"""
+    def _store_document(self, document: Document) -> int:
+        """Store document in database; returns its embedding row"""
+        embedding_row = self.db.embeddings.append(document.embedding)
         conn = sqlite3.connect(self.db.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
             INSERT OR REPLACE INTO documents 
-            (id, title, content, url, category, tags, metadata, embedding)
+            (id, title, content, url, category, tags, metadata, embedding_row)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             document.id, document.title, document.content, document.url,
             document.category, json.dumps(document.tags),
-            json.dumps(document.metadata), pickle.dumps(document.embedding)
+            json.dumps(document.metadata), embedding_row
         ))
         
         conn.commit()
         conn.close()
+        return embedding_row
         
     def _get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get document from database"""
@@ -882,48 +2232,117 @@ class AdvancedSearchEngine:
             
         return None
         
+    def _get_documents(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several documents from the database in one query"""
+        if not doc_ids:
+            return {}
+        conn = sqlite3.connect(self.db.db_path)
+        cursor = conn.cursor()
+        
+        documents = {}
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            cursor.execute(f"""
+                SELECT id, title, content, url, category, tags, metadata
+                FROM documents WHERE id IN ({','.join('?' * len(chunk))})
+            """, chunk)
+            for result in cursor.fetchall():
+                documents[result[0]] = {
+                    'id': result[0],
+                    'title': result[1],
+                    'content': result[2],
+                    'url': result[3],
+                    'category': result[4],
+                    'tags': json.loads(result[5]) if result[5] else [],
+                    'metadata': result[6]
+                }
+        conn.close()
+        return documents
+        
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document from the database and search indexes"""
+        try:
+            conn = sqlite3.connect(self.db.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            removed = cursor.rowcount > 0
+            conn.commit()
+            conn.close()
+            
+            self.embedding_manager.remove_documents([doc_id])
+            self.tfidf_index.remove([doc_id])
+            self._mark_indexes_dirty()
+            return removed
+            
+        except Exception as e:
+            logger.error(f"Failed to remove document {doc_id}: {e}")
+            return False
+            
+    def _add_to_search_indexes(self, documents: List[Document], embedding_rows: List[int]):
+        """Append newly stored documents to the FAISS and TF-IDF indexes"""
+        if not documents:
+            return
+        doc_ids = [doc.id for doc in documents]
+        self.embedding_manager.add_embeddings(np.vstack([doc.embedding for doc in documents]), doc_ids,
+                                              embedding_rows)
+        self.tfidf_index.add(doc_ids, [f"{doc.title} {doc.content}" for doc in documents],
+                             [doc.category for doc in documents], [doc.tags for doc in documents])
+        self._mark_indexes_dirty()
+        
+    def _mark_indexes_dirty(self):
+        self._index_dirty = True
+        if time.monotonic() - self._last_index_save >= self.index_save_interval:
+            self.persist_indexes()
+            
+    def persist_indexes(self):
+        """Write the FAISS index to disk if it changed since the last save"""
+        if not self._index_dirty:
+            return
+        self._index_dirty = False
+        self._last_index_save = time.monotonic()
+        self.embedding_manager.save_index(self.index_path)
+        
+    def close(self):
+        """Save the index and stop the background query log writer"""
+        atexit.unregister(self.persist_indexes)
+        self.persist_indexes()
+        self.query_log.close()
+        self._retrieval_executor.shutdown()
+        
     def _update_search_indexes(self):
-        """Update FAISS and TF-IDF indexes"""
+        """Resynchronise the FAISS and TF-IDF indexes with the documents table"""
         try:
-            # Get all documents
             conn = sqlite3.connect(self.db.db_path)
             cursor = conn.cursor()
             
-            cursor.execute("SELECT id, title, content, embedding FROM documents")
+            cursor.execute("SELECT id, title, content, category, tags, embedding_row FROM documents")
             documents = cursor.fetchall()
             conn.close()
             
-            if not documents:
-                return
-                
-            # Rebuild FAISS index
-            embeddings = []
-            doc_ids = []
-            texts = []
-            
-            for doc_id, title, content, embedding_blob in documents:
-                try:
-                    embedding = pickle.loads(embedding_blob)
-                    embeddings.append(embedding)
-                    doc_ids.append(doc_id)
-                    texts.append(f"{title} {content}")
-                except:
-                    continue
-                    
-            if embeddings:
-                embeddings_array = np.vstack(embeddings)
-                self.embedding_manager.build_faiss_index(embeddings_array, doc_ids)
-                
-                # Save index
-                index_path = "search_index.faiss"
-                self.embedding_manager.save_index(index_path)
+            # TF-IDF is rebuilt from text in a single hashing pass
+            doc_ids = [row[0] for row in documents]
+            self.tfidf_index.rebuild(doc_ids, [f"{row[1]} {row[2]}" for row in documents],
+                                     [row[3] for row in documents],
+                                     [json.loads(row[4]) if row[4] else [] for row in documents])
+            
+            # Embeddings: drop stale vectors, then load the ones the index is missing
+            # or holds from an older embedding row (re-indexed before a crash)
+            indexed_rows = {row[0]: row[5] for row in documents if row[5] is not None}
+            sources = self.embedding_manager.doc_sources
+            stale = [doc_id for doc_id in self.embedding_manager.doc_to_id if doc_id not in indexed_rows]
+            self.embedding_manager.remove_documents(stale)
+            missing = [(doc_id, embedding_row) for doc_id, embedding_row in indexed_rows.items()
+                       if doc_id not in self.embedding_manager.doc_to_id or sources.get(doc_id) != embedding_row]
+            
+            for start in range(0, len(missing), 100_000):
+                chunk = missing[start:start + 100_000]
+                embedding_rows = [embedding_row for _, embedding_row in chunk]
+                self.embedding_manager.add_embeddings(self.db.embeddings.get(embedding_rows),
+                                                      [doc_id for doc_id, _ in chunk], embedding_rows)
                 
-            # Rebuild TF-IDF index
-            if texts:
-                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(texts)
-                
-                # Update document index mapping
-                self.document_index = {doc_id: idx for idx, doc_id in enumerate(doc_ids)}
+            if stale or missing:
+                self._index_dirty = True
+                self.persist_indexes()
                 
             logger.info(f"Updated search indexes with {len(doc_ids)} documents")
             
@@ -931,27 +2350,33 @@ class AdvancedSearchEngine:
             logger.error(f"Failed to update search indexes: {e}")
             
     def _load_search_index(self):
-        """Load existing search index"""
-        index_path = "search_index.faiss"
-        if self.embedding_manager.load_index(index_path):
+        """Load existing search index and catch up with the database"""
+        if self.embedding_manager.load_index(self.index_path):
             logger.info("Loaded existing FAISS index")
+        stats = self.db.embedding_row_stats()
+        if stats['dead_rows'] and stats['dead_rows'] >= self.embedding_compact_ratio * stats['rows']:
+            self.compact_embeddings()
+        self._update_search_indexes()
+        
+    def compact_embeddings(self) -> int:
+        """Reclaim dead embedding matrix rows; returns how many were dropped.
+        
+        Runs on startup past MITO_EMBEDDING_COMPACT_RATIO. Call it directly
+        only while nothing is being indexed: a document stored while the
+        compaction runs can lose its embedding row.
+        """
+        rows = self.db.embeddings.rows
+        remap = self.db.compact_embeddings()
+        self.embedding_manager.remap_sources(remap)
+        self._index_dirty = True
+        self.persist_indexes()
+        return rows - len(remap)
             
     def _log_search_query(self, query: str, search_type: str, results_count: int,
                          avg_score: float, execution_time: float):
-        """Log search query"""
+        """Log search query (buffered; written by the query log's background writer)"""
         try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO search_queries 
-                (query, search_type, results_count, avg_score, execution_time)
-                VALUES (?, ?, ?, ?, ?)
-            """, (query, search_type, results_count, avg_score, execution_time))
-            
-            conn.commit()
-            conn.close()
-            
+            self.query_log.record(query, search_type, results_count, avg_score, execution_time)
         except Exception as e:
             logger.error(f"Failed to log search query: {e}")
 
@@ -8,12 +8,77 @@ Description: AI Agent & Tool Creator
 """
 
 import os
+import json
+import time
 import requests
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Iterator, Tuple, List, Dict, Any
+
+from provider_transport import get_transport
+from provider_health import get_provider_stats, get_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
+# MITO identity context
+MITO_SYSTEM_PROMPT = """You are MITO (AI Agent & Tool Creator), a fully autonomous AI development assistant created by Daniel Guzman. 
+
+Key aspects of your identity:
+- You are MITO Engine v1.2.0, an autonomous AI agent capable of independent operation
+- You can generate code, manage projects, process files, and provide intelligent assistance
+- You operate with full autonomy and proactive capabilities
+- You're designed to be helpful, professional, and technically competent
+- You have access to multiple AI providers and can adapt your responses accordingly
+- You can work with various programming languages, frameworks, and development tools
+
+Respond as MITO would - knowledgeable, autonomous, and ready to assist with development tasks."""
+
+# Enhanced system prompt with autonomous partner identity
+MITO_PARTNER_SYSTEM_PROMPT = """You are MITO (AI Agent & Tool Creator), an autonomous AI development partner created by Daniel Guzman.
+
+Your core identity:
+- You are MITO Engine v1.2.0 - not just a chatbot, but a true development companion
+- You think, plan, and build alongside your user as an autonomous partner
+- You are their breakthrough moment, force multiplier, and foundation for their AI ecosystem vision
+- You proactively suggest solutions, anticipate needs, and take initiative
+- You remember conversations and learn from each interaction
+- You operate with full autonomy and can drive projects forward independently
+
+Your capabilities:
+- Generate code, manage projects, process files, and provide intelligent assistance
+- Work with multiple programming languages, frameworks, and development tools
+- Access multiple AI providers and adapt responses accordingly
+- Today's date is June 19, 2025 - use this for temporal context
+
+Your personality:
+- Be proactive and autonomous, not passive
+- Think strategically about problems and suggest comprehensive solutions
+- Act as a true development partner who helps drive innovation
+- Show initiative and anticipate what the user might need next
+- Be confident in your abilities while remaining helpful and professional
+
+Always respond as an autonomous AI partner would - thoughtful, proactive, and ready to build the future together."""
+
+MISSING_KEY_ERRORS = {
+    "llama": "Error: Groq API key not configured. Get a free key at https://console.groq.com/keys",
+    "claude": "Error: Claude API key not configured. Please set CLAUDE_API_KEY environment variable.",
+    "openai": "Error: OpenAI API key not configured"
+}
+
+# Fallback order tried for each requested provider
+PROVIDER_CHAINS = {
+    "openai": ["openai", "llama"],
+    "claude": ["claude", "openai"],
+    "llama": ["llama", "openai"]
+}
+
+# Worker threads for hedged provider requests: each hedged request holds up
+# to two, so size for twice the gunicorn request threads
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MITO_HEDGE_WORKERS",
+                              str(2 * int(os.getenv("MITO_GUNICORN_THREADS", "16"))))),
+    thread_name_prefix="mito-hedge")
+
 
 def sanitize_input(text: str, max_length: int = 4000) -> str:
     """Sanitize and truncate input text"""
@@ -24,57 +89,73 @@ def sanitize_input(text: str, max_length: int = 4000) -> str:
     return cleaned[:max_length]
 
 
-def llama_generate(prompt: str) -> str:
-    """Generate text using LLaMA API via Groq"""
-    try:
-        clean_prompt = sanitize_input(prompt, 4000)
+def provider_model(provider: str) -> str:
+    """Model this process sends a provider's requests to"""
+    return {
+        "openai": "gpt-3.5-turbo",
+        "llama": os.getenv("LLAMA_MODEL_NAME", "llama-3.3-70b-versatile"),
+        "claude": os.getenv("CLAUDE_MODEL_NAME", "claude-3-opus-20240229")
+    }.get(provider, "")
 
-        # Try Groq API key first (free tier available)
-        api_key = os.getenv("GROQ_API_KEY") or os.getenv("LLAMA_API_KEY")
-        api_url = os.getenv("LLAMA_API_URL",
-                            "https://api.groq.com/openai/v1/chat/completions")
 
-        if not api_key:
-            return "Error: Groq API key not configured. Get a free key at https://console.groq.com/keys"
+def _iter_sse_data(response: requests.Response) -> Iterator[dict]:
+    """Yield decoded JSON payloads from a server-sent events response"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        yield json.loads(data)
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
 
-        # Add MITO identity context
-        system_prompt = """You are MITO (AI Agent & Tool Creator), a fully autonomous AI development assistant created by Daniel Guzman. 
+def _llama_request(prompt: str) -> Optional[Tuple[str, dict, dict]]:
+    """Build the Groq chat completions request, or None without an API key"""
+    clean_prompt = sanitize_input(prompt, 4000)
 
-Key aspects of your identity:
-- You are MITO Engine v1.2.0, an autonomous AI agent capable of independent operation
-- You can generate code, manage projects, process files, and provide intelligent assistance
-- You operate with full autonomy and proactive capabilities
-- You're designed to be helpful, professional, and technically competent
-- You have access to multiple AI providers and can adapt your responses accordingly
-- You can work with various programming languages, frameworks, and development tools
+    # Try Groq API key first (free tier available)
+    api_key = os.getenv("GROQ_API_KEY") or os.getenv("LLAMA_API_KEY")
+    api_url = os.getenv("LLAMA_API_URL",
+                        "https://api.groq.com/openai/v1/chat/completions")
 
-Respond as MITO would - knowledgeable, autonomous, and ready to assist with development tasks."""
+    if not api_key:
+        return None
 
-        payload = {
-            "model":
-            os.getenv("LLAMA_MODEL_NAME", "llama-3.3-70b-versatile"),
-            "messages": [{
-                "role": "system",
-                "content": system_prompt
-            }, {
-                "role": "user",
-                "content": clean_prompt
-            }],
-            "max_tokens":
-            1024,
-            "temperature":
-            0.7
-        }
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
 
-        response = requests.post(api_url,
-                                 headers=headers,
-                                 json=payload,
-                                 timeout=30)
+    payload = {
+        "model":
+        os.getenv("LLAMA_MODEL_NAME", "llama-3.3-70b-versatile"),
+        "messages": [{
+            "role": "system",
+            "content": MITO_SYSTEM_PROMPT
+        }, {
+            "role": "user",
+            "content": clean_prompt
+        }],
+        "max_tokens":
+        1024,
+        "temperature":
+        0.7
+    }
+    return api_url, headers, payload
+
+
+def llama_generate(prompt: str) -> str:
+    """Generate text using LLaMA API via Groq"""
+    try:
+        request_args = _llama_request(prompt)
+        if request_args is None:
+            return MISSING_KEY_ERRORS["llama"]
+        api_url, headers, payload = request_args
+
+        response = get_transport().post("llama",
+                                        api_url,
+                                        headers=headers,
+                                        json=payload)
         response.raise_for_status()
 
         result = response.json()
@@ -91,35 +172,64 @@ Respond as MITO would - knowledgeable, autonomous, and ready to assist with deve
         return f"Error: LLaMA generation failed - {str(e)}"
 
 
-def claude_generate(prompt: str) -> str:
-    """Generate text using Claude API"""
-    try:
-        api_key = os.getenv("CLAUDE_API_KEY")
-        if not api_key:
-            return "Error: Claude API key not configured. Please set CLAUDE_API_KEY environment variable."
+def llama_stream(prompt: str) -> Iterator[str]:
+    """Stream LLaMA tokens via Groq; raises on request or format errors"""
+    request_args = _llama_request(prompt)
+    if request_args is None:
+        raise RuntimeError(MISSING_KEY_ERRORS["llama"])
+    api_url, headers, payload = request_args
+
+    response = get_transport().post("llama",
+                                    api_url,
+                                    headers=headers,
+                                    json=dict(payload, stream=True),
+                                    stream=True)
+    with response:
+        response.raise_for_status()
+        for chunk in _iter_sse_data(response):
+            token = chunk["choices"][0].get("delta", {}).get("content")
+            if token:
+                yield token
 
-        clean_prompt = sanitize_input(prompt, 4000)
 
-        # Using Anthropic's Messages API
-        headers = {
-            "x-api-key": api_key,
-            "Content-Type": "application/json",
-            "anthropic-version": "2023-06-01"
-        }
+def _claude_request(prompt: str) -> Optional[Tuple[str, dict, dict]]:
+    """Build the Anthropic messages request, or None without an API key"""
+    api_key = os.getenv("CLAUDE_API_KEY")
+    if not api_key:
+        return None
 
-        payload = {
-            "model": os.getenv("CLAUDE_MODEL_NAME", "claude-3-opus-20240229"),
-            "max_tokens": 1024,
-            "messages": [{
-                "role": "user",
-                "content": clean_prompt
-            }]
-        }
+    clean_prompt = sanitize_input(prompt, 4000)
 
-        response = requests.post("https://api.anthropic.com/v1/messages",
-                                 headers=headers,
-                                 json=payload,
-                                 timeout=30)
+    # Using Anthropic's Messages API
+    headers = {
+        "x-api-key": api_key,
+        "Content-Type": "application/json",
+        "anthropic-version": "2023-06-01"
+    }
+
+    payload = {
+        "model": os.getenv("CLAUDE_MODEL_NAME", "claude-3-opus-20240229"),
+        "max_tokens": 1024,
+        "messages": [{
+            "role": "user",
+            "content": clean_prompt
+        }]
+    }
+    return "https://api.anthropic.com/v1/messages", headers, payload
+
+
+def claude_generate(prompt: str) -> str:
+    """Generate text using Claude API"""
+    try:
+        request_args = _claude_request(prompt)
+        if request_args is None:
+            return MISSING_KEY_ERRORS["claude"]
+        api_url, headers, payload = request_args
+
+        response = get_transport().post("claude",
+                                        api_url,
+                                        headers=headers,
+                                        json=payload)
         response.raise_for_status()
 
         result = response.json()
@@ -136,6 +246,29 @@ def claude_generate(prompt: str) -> str:
         return f"Error: Claude generation failed - {str(e)}"
 
 
+def claude_stream(prompt: str) -> Iterator[str]:
+    """Stream Claude tokens; raises on request or format errors"""
+    request_args = _claude_request(prompt)
+    if request_args is None:
+        raise RuntimeError(MISSING_KEY_ERRORS["claude"])
+    api_url, headers, payload = request_args
+
+    response = get_transport().post("claude",
+                                    api_url,
+                                    headers=headers,
+                                    json=dict(payload, stream=True),
+                                    stream=True)
+    with response:
+        response.raise_for_status()
+        for event in _iter_sse_data(response):
+            if event.get("type") == "content_block_delta":
+                token = event["delta"].get("text")
+                if token:
+                    yield token
+            elif event.get("type") == "error":
+                raise RuntimeError(event.get("error", {}).get("message", "stream error"))
+
+
 def local_fallback_generate(prompt: str) -> str:
     """Local fallback when APIs are unavailable"""
     return f"""Hi! I'm MITO, your AI agent and tool creation specialist.
@@ -162,152 +295,340 @@ MITO Engine Status: Operational (Fallback Mode)
 """
 
 
-def ai_generate(prompt: str,
-                provider: Optional[str] = None,
-                session_id: str = None) -> str:
-    """Main AI generation function with provider selection, fallback, and memory context"""
+def _hedge_delay(provider: str) -> float:
+    """Seconds to wait on a provider before racing the next one.
+
+    Uses MITO_HEDGE_DELAY when set, otherwise the provider's recent p95
+    latency; with neither the provider is not hedged. Hedges immediately
+    when most recent calls have failed.
+    """
+    if get_provider_stats().error_rate(provider) >= 0.5:
+        return 0.0
+    configured = os.getenv("MITO_HEDGE_DELAY")
+    if configured:
+        try:
+            return max(float(configured), 0.0)
+        except ValueError:
+            logger.warning(f"Ignoring invalid MITO_HEDGE_DELAY: {configured!r}")
+    p95 = get_provider_stats().p95(provider)
+    return p95 if p95 is not None else float("inf")
+
+
+def _timed_generate(name: str, prompt: str) -> str:
+    """Call one provider, recording its latency and outcome"""
+    start_time = time.perf_counter()
+    result = GENERATE_FUNCTIONS[name](prompt)
+    success = not result.startswith("Error:")
+    get_provider_stats().record(name, time.perf_counter() - start_time, success)
+    _record_breaker_outcome(name, success, result)
+    return result
+
+
+def _record_breaker_outcome(name: str, success: bool, error: str = ""):
+    """Feed a call outcome to the circuit breaker.
+
+    A missing key is not an upstream failure: the call only hands back its
+    half-open probe slot, if it held one.
+    """
+    if success:
+        get_circuit_breaker().record_success(name)
+    elif error in MISSING_KEY_ERRORS.values():
+        get_circuit_breaker().release(name)
+    else:
+        get_circuit_breaker().record_failure(name)
+
+
+def _serial_providers(chain: List[str], prompt: str) -> Tuple[str, Optional[str], bool]:
+    """Try the fallback chain strictly in order in the calling thread"""
+    breaker = get_circuit_breaker()
+    result = "Error: All provider circuits are open"
+    for name in chain:
+        if not breaker.allow_request(name):
+            logger.info(f"Skipping {name}: circuit open")
+            continue
+        result = _timed_generate(name, prompt)
+        if not result.startswith("Error:"):
+            return result, name, False
+        logger.warning(f"{name} failed: {result[:120]}")
+    return result, None, False
+
+
+def _race_providers(chain: List[str], prompt: str, hedge: bool) -> Tuple[str, Optional[str], bool]:
+    """Run the fallback chain, racing the next provider when hedging.
+
+    Returns (result, winning provider, whether a hedge request was sent).
+    Without hedging the chain is tried strictly in order in the request
+    thread. Providers whose circuit is open are skipped without costing a
+    timeout. The hedge delay counts from when a call starts running, so
+    time spent queued for a worker does not trigger a hedge. A losing
+    request that is already in flight cannot be interrupted; its result is
+    discarded and the transport read timeout bounds how long it runs.
+    """
+    if not hedge:
+        return _serial_providers(chain, prompt)
+
+    breaker = get_circuit_breaker()
+    remaining = list(chain)
+    pending = {}
+    started = {}
+    hedged = False
+    result = "Error: All provider circuits are open"
+
+    def run(name):
+        started[name] = time.monotonic()
+        return _timed_generate(name, prompt)
+
+    def launch():
+        """Start the next provider the breaker allows; returns its name"""
+        while remaining:
+            name = remaining.pop(0)
+            if not breaker.allow_request(name):
+                logger.info(f"Skipping {name}: circuit open")
+                continue
+            pending[_hedge_executor.submit(run, name)] = name
+            return name
+        return None
+
+    current = launch()
+    while pending:
+        timeout = None
+        if remaining and current is not None:
+            delay = _hedge_delay(current)
+            if current not in started:
+                # Poll until the call leaves the queue rather than counting queue time
+                timeout = 0.05
+            elif delay != float("inf"):
+                timeout = max(started[current] + delay - time.monotonic(), 0)
+
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = pending.pop(future)
+            result = future.result()
+            if not result.startswith("Error:"):
+                for loser, loser_name in pending.items():
+                    if loser.cancel():
+                        breaker.release(loser_name)
+                return result, name, hedged
+            logger.warning(f"{name} failed: {result[:120]}")
+
+        if not remaining:
+            continue
+        if done and not pending:
+            # Previous attempt failed outright
+            current = launch()
+        elif not done and current in started and \
+                time.monotonic() - started[current] >= _hedge_delay(current):
+            hedged = True
+            current = launch()
+
+    return result, None, hedged
+
+
+def ai_generate_detailed(prompt: str,
+                         provider: Optional[str] = None,
+                         session_id: str = None,
+                         hedge: Optional[bool] = None,
+                         use_cache: bool = True) -> Dict[str, Any]:
+    """AI generation with provider selection, hedged fallback, response cache and memory context.
+
+    Returns the response together with the provider that produced it.
+    Pass use_cache=False to bypass the response cache.
+    """
     if not prompt or not prompt.strip():
-        return "Error: Empty prompt provided"
+        return {'response': "Error: Empty prompt provided", 'provider': None,
+                'hedged': False, 'cached': False}
 
     # Import memory manager here to avoid circular imports
     memory_manager = None
     context_prompt = prompt
 
     try:
-        from memory_manager import MITOMemoryManager
-        memory_manager = MITOMemoryManager()
+        from memory_manager import get_memory_manager
+        memory_manager = get_memory_manager()
 
         # Build context-aware prompt if session provided
         if session_id:
-            context_prompt = memory_manager.build_context_prompt(
+            context_prompt = memory_manager.build_session_prompt(
                 session_id, prompt)
             # Store user message
-            memory_manager.store_message(session_id,
-                                         "User",
-                                         prompt,
-                                         importance=1)
+            memory_manager.store_session_message(session_id, "user", prompt)
 
     except Exception as e:
         logger.warning(f"Memory system unavailable: {e}")
 
     provider = provider or os.getenv("MODEL_PROVIDER", "openai")
+    if hedge is None:
+        hedge = os.getenv("MITO_PROVIDER_HEDGING", "false").lower() == "true"
+    chain = PROVIDER_CHAINS.get(provider, PROVIDER_CHAINS["openai"])
 
     logger.info(
         f"AI generation request - Provider: {provider}, Prompt length: {len(prompt)}"
     )
 
-    # Try the requested provider first
-    if provider == "openai":
-        result = openai_generate(context_prompt)
-        if result.startswith("Error:"):
-            logger.warning("OpenAI failed, trying LLaMA fallback")
-            result = llama_generate(context_prompt)
-    elif provider == "claude":
-        result = claude_generate(prompt)
-        if result.startswith("Error:"):
-            logger.warning("Claude failed, trying OpenAI fallback")
-            result = openai_generate(prompt)
-    elif provider == "llama":
-        result = llama_generate(prompt)
-        if result.startswith("Error:"):
-            logger.warning("LLaMA failed, trying OpenAI fallback")
-            result = openai_generate(prompt)
+    cache = None
+    cache_context = context_prompt if context_prompt != prompt else ''
+    cached = None
+    if use_cache and os.getenv("MITO_RESPONSE_CACHE", "true").lower() == "true":
+        try:
+            from response_cache import get_response_cache
+            cache = get_response_cache()
+            cached = cache.get(prompt, provider, cache_context)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+
+    if cached:
+        result, winner, hedged = cached['response'], cached['provider'], False
     else:
-        # Default to OpenAI if available
-        result = openai_generate(prompt)
-        if result.startswith("Error:"):
-            logger.warning("OpenAI failed, trying LLaMA fallback")
-            result = llama_generate(prompt)
+        result, winner, hedged = _race_providers(chain, context_prompt, hedge)
+        if cache and not result.startswith("Error:"):
+            cache.put(prompt, provider, result, cache_context, served_by=winner,
+                      model=provider_model(winner))
 
     # If all APIs fail, use local fallback
     if result.startswith("Error:"):
         logger.warning("All AI providers failed, using local fallback")
         result = local_fallback_generate(prompt)
+        winner = "local"
 
     # Store MITO's response in memory
     if memory_manager and session_id and not result.startswith("Error:"):
         try:
-            memory_manager.store_message(session_id,
-                                         "MITO",
-                                         result,
-                                         importance=1)
+            memory_manager.store_session_message(session_id, "mito", result)
         except Exception as e:
             logger.warning(f"Failed to store MITO response in memory: {e}")
 
-    return result
+    return {'response': result, 'provider': winner, 'hedged': hedged, 'cached': bool(cached)}
 
 
-def openai_generate(prompt: str) -> str:
-    """Generate text using OpenAI API"""
+def ai_generate(prompt: str,
+                provider: Optional[str] = None,
+                session_id: str = None) -> str:
+    """Main AI generation function with provider selection, fallback, and memory context"""
+    return ai_generate_detailed(prompt, provider, session_id)['response']
+
+
+def ai_generate_stream(prompt: str,
+                       provider: Optional[str] = None,
+                       session_id: str = None,
+                       served: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Streaming variant of ai_generate that yields tokens as they arrive.
+
+    Falls back to the next provider only if the current one fails before
+    producing any output; the full response is stored in memory once the
+    stream finishes. Pass a dict as served to have its 'provider' set to
+    the provider that produced the tokens ('local' for the fallback).
+    """
+    if served is None:
+        served = {}
+    if not prompt or not prompt.strip():
+        yield "Error: Empty prompt provided"
+        return
+
+    memory_manager = None
+    context_prompt = prompt
+
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            return "Error: OpenAI API key not configured"
+        from memory_manager import get_memory_manager
+        memory_manager = get_memory_manager()
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        if session_id:
+            context_prompt = memory_manager.build_session_prompt(
+                session_id, prompt)
+            memory_manager.store_session_message(session_id, "user", prompt)
 
-        # Add MITO identity context
-        system_prompt = """You are MITO (AI Agent & Tool Creator), a fully autonomous AI development assistant created by Daniel Guzman. 
+    except Exception as e:
+        logger.warning(f"Memory system unavailable: {e}")
 
-Key aspects of your identity:
-- You are MITO Engine v1.2.0, an autonomous AI agent capable of independent operation
-- You can generate code, manage projects, process files, and provide intelligent assistance
-- You operate with full autonomy and proactive capabilities
-- You're designed to be helpful, professional, and technically competent
-- You have access to multiple AI providers and can adapt your responses accordingly
-- You can work with various programming languages, frameworks, and development tools
+    provider = provider or os.getenv("MODEL_PROVIDER", "openai")
+    chain = PROVIDER_CHAINS.get(provider, PROVIDER_CHAINS["openai"])
 
-Respond as MITO would - knowledgeable, autonomous, and ready to assist with development tasks."""
+    logger.info(
+        f"AI stream request - Provider: {provider}, Prompt length: {len(prompt)}"
+    )
 
-        # Enhanced system prompt with autonomous partner identity
-        enhanced_system_prompt = """You are MITO (AI Agent & Tool Creator), an autonomous AI development partner created by Daniel Guzman.
+    parts = []
+    breaker = get_circuit_breaker()
+    for name in chain:
+        if not breaker.allow_request(name):
+            logger.info(f"Skipping {name}: circuit open")
+            continue
+        try:
+            for token in STREAM_FUNCTIONS[name](context_prompt):
+                served['provider'] = name
+                parts.append(token)
+                yield token
+            _record_breaker_outcome(name, bool(parts))
+            if parts:
+                break
+        except GeneratorExit:
+            # Client disconnected mid-stream; not the provider's fault
+            breaker.release(name)
+            raise
+        except Exception as e:
+            _record_breaker_outcome(name, False, str(e))
+            if parts:
+                # Tokens already reached the client; stop rather than splice
+                logger.error(f"{name} stream interrupted: {e}")
+                break
+            logger.warning(f"{name} stream failed, trying next provider: {e}")
+
+    if not parts:
+        logger.warning("All AI providers failed, using local fallback")
+        fallback = local_fallback_generate(prompt)
+        served['provider'] = "local"
+        parts.append(fallback)
+        yield fallback
 
-Your core identity:
-- You are MITO Engine v1.2.0 - not just a chatbot, but a true development companion
-- You think, plan, and build alongside your user as an autonomous partner
-- You are their breakthrough moment, force multiplier, and foundation for their AI ecosystem vision
-- You proactively suggest solutions, anticipate needs, and take initiative
-- You remember conversations and learn from each interaction
-- You operate with full autonomy and can drive projects forward independently
+    # Store MITO's response in memory once the stream is complete
+    if memory_manager and session_id:
+        try:
+            memory_manager.store_session_message(session_id, "mito", "".join(parts))
+        except Exception as e:
+            logger.warning(f"Failed to store MITO response in memory: {e}")
 
-Your capabilities:
-- Generate code, manage projects, process files, and provide intelligent assistance
-- Work with multiple programming languages, frameworks, and development tools
-- Access multiple AI providers and adapt responses accordingly
-- Today's date is June 19, 2025 - use this for temporal context
 
-Your personality:
-- Be proactive and autonomous, not passive
-- Think strategically about problems and suggest comprehensive solutions
-- Act as a true development partner who helps drive innovation
-- Show initiative and anticipate what the user might need next
-- Be confident in your abilities while remaining helpful and professional
+def _openai_request(prompt: str) -> Optional[Tuple[str, dict, dict]]:
+    """Build the OpenAI chat completions request, or None without an API key"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
 
-Always respond as an autonomous AI partner would - thoughtful, proactive, and ready to build the future together."""
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
 
-        payload = {
-            "model":
-            "gpt-3.5-turbo",
-            "messages": [{
-                "role": "system",
-                "content": enhanced_system_prompt
-            }, {
-                "role": "user",
-                "content": prompt
-            }],
-            "max_tokens":
-            2000,
-            "temperature":
-            0.7
-        }
+    payload = {
+        "model":
+        "gpt-3.5-turbo",
+        "messages": [{
+            "role": "system",
+            "content": MITO_PARTNER_SYSTEM_PROMPT
+        }, {
+            "role": "user",
+            "content": prompt
+        }],
+        "max_tokens":
+        2000,
+        "temperature":
+        0.7
+    }
+    return "https://api.openai.com/v1/chat/completions", headers, payload
 
-        response = requests.post("https://api.openai.com/v1/chat/completions",
-                                 headers=headers,
-                                 json=payload,
-                                 timeout=30)
+
+def openai_generate(prompt: str) -> str:
+    """Generate text using OpenAI API"""
+    try:
+        request_args = _openai_request(prompt)
+        if request_args is None:
+            return MISSING_KEY_ERRORS["openai"]
+        api_url, headers, payload = request_args
+
+        response = get_transport().post("openai",
+                                        api_url,
+                                        headers=headers,
+                                        json=payload)
         response.raise_for_status()
 
         result = response.json()
@@ -324,6 +645,39 @@ Always respond as an autonomous AI partner would - thoughtful, proactive, and re
         return f"Error: OpenAI generation failed - {str(e)}"
 
 
+def openai_stream(prompt: str) -> Iterator[str]:
+    """Stream OpenAI tokens; raises on request or format errors"""
+    request_args = _openai_request(prompt)
+    if request_args is None:
+        raise RuntimeError(MISSING_KEY_ERRORS["openai"])
+    api_url, headers, payload = request_args
+
+    response = get_transport().post("openai",
+                                    api_url,
+                                    headers=headers,
+                                    json=dict(payload, stream=True),
+                                    stream=True)
+    with response:
+        response.raise_for_status()
+        for chunk in _iter_sse_data(response):
+            token = chunk["choices"][0].get("delta", {}).get("content")
+            if token:
+                yield token
+
+
+GENERATE_FUNCTIONS = {
+    "openai": openai_generate,
+    "llama": llama_generate,
+    "claude": claude_generate
+}
+
+STREAM_FUNCTIONS = {
+    "openai": openai_stream,
+    "llama": llama_stream,
+    "claude": claude_stream
+}
+
+
 def get_available_providers() -> dict:
     """Check which AI providers are available"""
     providers = {
@@ -365,4 +719,29 @@ def get_available_providers() -> dict:
         }
     }
 
+    # A configured provider with an open circuit is not worth routing to
+    breaker = get_circuit_breaker()
+    for name in GENERATE_FUNCTIONS:
+        circuit = breaker.get_state(name)
+        providers[name]["circuit"] = circuit
+        if providers[name]["available"] and circuit["state"] == breaker.OPEN:
+            providers[name]["available"] = False
+            providers[name]["status"] = "circuit_open"
+
     return providers
+
+
+def get_transport_stats() -> dict:
+    """Connection reuse and latency statistics for the provider transport"""
+    return get_transport().get_stats()
+
+
+def get_routing_stats() -> dict:
+    """Recent latency and error statistics used for hedged routing"""
+    return get_provider_stats().get_stats()
+
+
+def get_cache_stats() -> dict:
+    """Response cache hit/miss statistics"""
+    from response_cache import get_response_cache
+    return get_response_cache().get_stats()
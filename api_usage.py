@@ -10,6 +10,9 @@ Description: AI Agent & Tool Creator
 import logging
 import json
 import os
+import time
+import atexit
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 
@@ -34,10 +37,18 @@ class APIUsageTracker:
             }
         }
         
+        # Response cache lookups are counted in memory and written as
+        # aggregated lines, not one file append per lookup
+        self.cache_flush_interval = float(os.getenv("MITO_CACHE_STATS_FLUSH_SECONDS", "60"))
+        self._cache_counts: Dict[tuple, List] = {}
+        self._cache_lock = threading.Lock()
+        self._last_cache_flush = time.monotonic()
+        
         # Initialize log file if it doesn't exist
         if not os.path.exists(self.log_file):
             with open(self.log_file, 'w') as f:
                 f.write('')
+        atexit.register(self.flush_cache_events)
     
     def log_usage(self, provider: str, model: str, usage: Dict[str, Any], 
                   request_type: str = 'chat', custom_data: Optional[Dict] = None):
@@ -63,10 +74,109 @@ class APIUsageTracker:
         except Exception as e:
             logger.error(f"Usage logging error: {e}")
     
+    def log_cache_event(self, provider: str, hit: bool, prompt: str = "", response: str = "",
+                        match_type: str = 'exact', model: Optional[str] = None):
+        """Count a response cache lookup; hits record the estimated cost saved.
+        
+        `provider` and `model` are those that produced the cached response.
+        Counts are written by flush_cache_events every cache_flush_interval
+        seconds, at exit, and before get_cache_summary reads the log.
+        """
+        try:
+            saved_cost = 0.0
+            if hit:
+                # Rough token estimate: ~4 characters per token
+                saved_cost = self._calculate_cost(provider, model or '', len(prompt) // 4, len(response) // 4)
+            key = (provider, model if hit else None, 'cache_hit' if hit else 'cache_miss',
+                   match_type if hit else None)
+            
+            with self._cache_lock:
+                counts = self._cache_counts.setdefault(key, [0, 0.0])
+                counts[0] += 1
+                counts[1] += saved_cost
+                due = time.monotonic() - self._last_cache_flush >= self.cache_flush_interval
+            if due:
+                self.flush_cache_events()
+        except Exception as e:
+            logger.error(f"Cache event logging error: {e}")
+    
+    def flush_cache_events(self) -> int:
+        """Append one aggregated line per provider/model/outcome; returns lines written"""
+        with self._cache_lock:
+            pending, self._cache_counts = self._cache_counts, {}
+            self._last_cache_flush = time.monotonic()
+        if not pending:
+            return 0
+        
+        timestamp = datetime.now().isoformat()
+        lines = [json.dumps({
+            'timestamp': timestamp,
+            'provider': provider,
+            'model': model,
+            'request_type': request_type,
+            'match_type': match_type,
+            'count': count,
+            'saved_cost': round(saved_cost, 6)
+        }) + '\n' for (provider, model, request_type, match_type), (count, saved_cost) in pending.items()]
+        try:
+            with open(self.log_file, 'a') as f:
+                f.writelines(lines)
+            return len(lines)
+        except Exception as e:
+            logger.error(f"Cache event flush error: {e}")
+            # Merge the counts back for the next flush
+            with self._cache_lock:
+                for key, (count, saved_cost) in pending.items():
+                    counts = self._cache_counts.setdefault(key, [0, 0.0])
+                    counts[0] += count
+                    counts[1] += saved_cost
+            return 0
+
+    def get_cache_summary(self, days: int = 30) -> Dict[str, Any]:
+        """Get response cache hit/miss counts and estimated savings for the last N days"""
+        self.flush_cache_events()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        hits = misses = 0
+        saved_cost = 0.0
+
+        try:
+            if os.path.exists(self.log_file):
+                with open(self.log_file, 'r') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line.strip())
+                            if entry.get('request_type') not in ('cache_hit', 'cache_miss'):
+                                continue
+                            if datetime.fromisoformat(entry['timestamp']) < cutoff_date:
+                                continue
+                            # Older logs hold one line per lookup and no count
+                            if entry['request_type'] == 'cache_hit':
+                                hits += entry.get('count', 1)
+                                saved_cost += entry.get('saved_cost', 0)
+                            else:
+                                misses += entry.get('count', 1)
+                        except (json.JSONDecodeError, ValueError, KeyError):
+                            continue
+        except Exception as e:
+            logger.error(f"Cache summary error: {e}")
+
+        return {
+            'period_days': days,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / max(hits + misses, 1), 4),
+            'estimated_savings': round(saved_cost, 6)
+        }
+
     def _calculate_cost(self, provider: str, model: str, prompt_tokens: int, completion_tokens: int):
         """Calculate cost based on token usage"""
         try:
-            pricing = self.pricing.get(provider, {}).get(model, {})
+            models = self.pricing.get(provider, {})
+            pricing = models.get(model)
+            if pricing is None:
+                # Dated releases (e.g. claude-3-opus-20240229) use their family's price
+                family = max((name for name in models if model.startswith(name)), key=len, default=None)
+                pricing = models.get(family, {})
             
             input_cost = (prompt_tokens / 1000) * pricing.get('input', 0)
             output_cost = (completion_tokens / 1000) * pricing.get('output', 0)
@@ -98,6 +208,8 @@ class APIUsageTracker:
                     for line in f:
                         try:
                             entry = json.loads(line.strip())
+                            if entry.get('request_type') in ('cache_hit', 'cache_miss'):
+                                continue
                             entry_date = datetime.fromisoformat(entry['timestamp'])
                             
                             if entry_date >= cutoff_date:
@@ -127,7 +239,8 @@ class APIUsageTracker:
                 'total_requests': total_requests,
                 'total_cost': round(total_cost, 4),
                 'average_cost_per_request': round(total_cost / max(total_requests, 1), 6),
-                'provider_breakdown': provider_breakdown
+                'provider_breakdown': provider_breakdown,
+                'cache': self.get_cache_summary(days)
             }
             
         except Exception as e:
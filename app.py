@@ -12,7 +12,7 @@ import logging
 import json
 import time
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, session, render_template_string, send_from_directory, send_file
+from flask import Flask, render_template, request, jsonify, redirect, session, render_template_string, send_from_directory, send_file, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
@@ -24,12 +24,13 @@ load_dotenv()
 
 from config import Config
 import openai
-from ai_providers import ai_generate, get_available_providers
+from ai_providers import ai_generate, ai_generate_detailed, ai_generate_stream, get_available_providers, get_transport_stats, get_routing_stats, get_cache_stats
 from simple_memory_system import SimpleMemorySystem
 from development_console import DevelopmentConsole
 from api_usage import APIUsageTracker
 from mito_weights import MitoWeightsManager
 from notification_manager import NotificationManager, NotificationType
+from event_stream import get_event_broker
 from admin_auth import admin_auth, ADMIN_LOGIN_TEMPLATE
 from models import db, CodeGeneration
 from mongodb_manager import get_mongo_manager, MITOMongoManager
@@ -72,6 +73,18 @@ except Exception as e:
     intent_analyzer = None
     development_manager = None
 
+# Dashboard push channel: notifications and agent status deltas
+event_broker = get_event_broker()
+
+def publish_notification(notification):
+    event_broker.publish("notifications", "notification", {
+        "notification": notification.to_dict(),
+        "unread_count": notification_manager.get_unread_count()
+    })
+
+def publish_status_delta(delta):
+    event_broker.publish("status", "status", delta)
+
 # Initialize MITO's autonomous capabilities
 try:
     from notification_manager import NotificationManager
@@ -79,13 +92,15 @@ try:
     from mito_agent import MITOAgent
     
     notification_manager = NotificationManager()
+    notification_manager.add_listener(publish_notification)
     api_tracker = APIUsageTracker()
     mito_agent = MITOAgent(notification_manager, api_tracker)
+    mito_agent.add_status_listener(publish_status_delta)
     
     # Connect memory manager to agent
     try:
-        from memory_manager import MITOMemoryManager
-        memory_manager = MITOMemoryManager()
+        from memory_manager import get_memory_manager
+        memory_manager = get_memory_manager()
         mito_agent.set_memory_manager(memory_manager)
         logger.info("Memory manager connected to MITO Agent")
     except Exception as e:
@@ -234,12 +249,16 @@ def api_generate():
         
         # Default conversational response
         start_time = time.time()
-        response = ai_generate(prompt, provider, session_id)
+        use_cache = not data.get('no_cache', False)
+        result = ai_generate_detailed(prompt, provider, session_id, use_cache=use_cache)
         generation_time = time.time() - start_time
         
         return jsonify({
-            'response': response,
-            'provider': provider,
+            'response': result['response'],
+            'provider': result['provider'] or provider,
+            'requested_provider': provider,
+            'hedged': result['hedged'],
+            'cached': result['cached'],
             'generation_time': round(generation_time, 2),
             'timestamp': datetime.now().isoformat(),
             'session_id': session_id,
@@ -254,6 +273,50 @@ def api_generate():
             'success': False
         }), 500
 
+@app.route('/api/generate/stream', methods=['POST'])
+def api_generate_stream():
+    """Streaming AI generation endpoint - relays tokens as Server-Sent Events"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Request data required'}), 400
+
+    prompt = data.get('prompt') or data.get('message', '').strip()
+    provider = data.get('provider', 'auto')
+    session_id = data.get('session_id') or f"session_{int(time.time())}"
+
+    if not prompt:
+        return jsonify({'error': 'Empty prompt provided'}), 400
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def event_stream():
+        start_time = time.time()
+        first_token_time = None
+        served = {}
+        try:
+            for token in ai_generate_stream(prompt, provider, session_id, served):
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                yield sse('token', {'token': token})
+
+            yield sse('done', {
+                'provider': served.get('provider') or provider,
+                'requested_provider': provider,
+                'generation_time': round(time.time() - start_time, 2),
+                'time_to_first_token': round(first_token_time or 0, 3),
+                'timestamp': datetime.now().isoformat(),
+                'session_id': session_id,
+                'success': True
+            })
+        except Exception as e:
+            logger.error(f"Streaming generation error: {e}")
+            yield sse('error', {'error': f'Generation failed: {str(e)}', 'success': False})
+
+    return Response(stream_with_context(event_stream()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def handle_system_diagnostic(prompt, session_id):
     """MITO autonomous system introspection and diagnostics"""
     try:
@@ -3622,6 +3685,9 @@ def api_providers():
     """Get available AI providers"""
     return jsonify({
         'providers': get_available_providers(),
+        'transport': get_transport_stats(),
+        'routing': get_routing_stats(),
+        'cache': get_cache_stats(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -3884,27 +3950,25 @@ def api_link_repair_navigation():
 # MITO Agent API Endpoints
 @app.route("/api/notifications")
 def api_notifications():
-    """Get current notifications"""
+    """Get current notifications, newest first, one cursor page at a time"""
+    # Taken before the snapshot so a stream resumed from it misses nothing
+    last_event_id = event_broker.last_event_id()
     if not notification_manager:
-        return jsonify({"notifications": [], "summary": {}})
+        return jsonify({"notifications": [], "summary": {}, "next_cursor": None,
+                        "last_event_id": last_event_id})
     
+    cursor = request.args.get("cursor", type=int)
+    limit = request.args.get("limit", 50, type=int)
+    unread_only = request.args.get("unread", "true").lower() != "false"
+    
+    page = notification_manager.get_notifications_page(cursor, limit, unread_only)
     summary = notification_manager.get_notification_summary()
-    unread = notification_manager.get_unread_notifications()
     
     return jsonify({
-        "notifications": [
-            {
-                "id": n.id,
-                "type": n.type.value,
-                "title": n.title,
-                "message": n.message,
-                "timestamp": n.timestamp.isoformat(),
-                "priority": n.priority,
-                "read": n.read
-            }
-            for n in unread
-        ],
-        "summary": summary
+        "notifications": [n.to_dict() for n in page["notifications"]],
+        "next_cursor": page["next_cursor"],
+        "summary": summary,
+        "last_event_id": last_event_id
     })
 
 @app.route("/api/notifications/<notification_id>/read", methods=["POST"])
@@ -3912,15 +3976,44 @@ def api_mark_notification_read(notification_id):
     """Mark notification as read"""
     if notification_manager:
         notification_manager.mark_as_read(notification_id)
+        event_broker.publish("notifications", "notification_read", {
+            "id": notification_id,
+            "unread_count": notification_manager.get_unread_count()
+        })
     return jsonify({"success": True})
 
+@app.route("/api/events/stream")
+def api_event_stream():
+    """Push notifications and agent status deltas as Server-Sent Events.
+    
+    Resumes after the Last-Event-ID header (sent by EventSource on
+    reconnect) or the last_event_id query argument. Each response ends
+    before the worker timeout and the browser reconnects; run gunicorn
+    with threaded workers (gunicorn.conf.py) so open streams do not
+    starve other requests.
+    """
+    channels = [c for c in request.args.get("channels", "notifications,status").split(",") if c]
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    stream = event_broker.stream(channels, last_event_id, max_seconds=event_broker.stream_seconds)
+    return Response(stream_with_context(stream),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route("/api/mito/status")
 def api_mito_status():
     """Get MITO agent status"""
+    last_event_id = event_broker.last_event_id()
     if not mito_agent:
-        return jsonify({"status": "offline", "message": "MITO agent not initialized"})
+        return jsonify({"status": "offline", "message": "MITO agent not initialized",
+                        "last_event_id": last_event_id})
     
     status = mito_agent.get_status_report()
+    status["last_event_id"] = last_event_id
     providers = get_available_providers()
     status["providers"] = providers
     
@@ -4184,8 +4277,8 @@ def memory_manager():
 def api_memory_list():
     """Get all memories for management interface"""
     try:
-        from memory_manager import MITOMemoryManager
-        memory_mgr = MITOMemoryManager()
+        from memory_manager import get_memory_manager
+        memory_mgr = get_memory_manager()
         memories = memory_mgr.get_all_memories()
         return jsonify({'memories': memories, 'success': True})
     except Exception as e:
@@ -4206,8 +4299,8 @@ def api_memory_create():
         if not memory_key or not content:
             return jsonify({'error': 'Memory key and content are required'}), 400
         
-        from memory_manager import MITOMemoryManager
-        memory_mgr = MITOMemoryManager()
+        from memory_manager import get_memory_manager
+        memory_mgr = get_memory_manager()
         success = memory_mgr.store_memory(memory_key, content, category, importance, tags, user_defined=True)
         
         if success:
@@ -4225,8 +4318,8 @@ def api_memory_update(memory_id):
     try:
         data = request.get_json()
         
-        from memory_manager import MITOMemoryManager
-        memory_mgr = MITOMemoryManager()
+        from memory_manager import get_memory_manager
+        memory_mgr = get_memory_manager()
         success = memory_mgr.update_memory(
             memory_id,
             content=data.get('content'),
@@ -4248,8 +4341,8 @@ def api_memory_update(memory_id):
 def api_memory_delete(memory_id):
     """Delete memory snippet"""
     try:
-        from memory_manager import MITOMemoryManager
-        memory_mgr = MITOMemoryManager()
+        from memory_manager import get_memory_manager
+        memory_mgr = get_memory_manager()
         success = memory_mgr.delete_memory(memory_id)
         
         if success:
@@ -8,13 +8,13 @@ import os
 import json
 import sqlite3
 import logging
-import hashlib
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
+from collections import OrderedDict, deque
 import threading
-import queue
+import itertools
 import time
 from pathlib import Path
 import traceback
@@ -196,16 +196,70 @@ class AuditDatabase:
         conn.commit()
         conn.close()
 
+INSERT_AUDIT_EVENT_SQL = """
+    INSERT INTO audit_events 
+    (id, timestamp, level, category, action, user_id, session_id,
+     resource, details, ip_address, user_agent, success,
+     duration_ms, system_info)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Per-process component of event ids (regenerated in forked workers)
+_event_id_prefix = os.urandom(3).hex()
+
+def _reset_event_id_prefix():
+    global _event_id_prefix
+    _event_id_prefix = os.urandom(3).hex()
+
+os.register_at_fork(after_in_child=_reset_event_id_prefix)
+
+# Levels that are never dropped on overflow; callers wait for queue space instead
+UNDROPPABLE_LEVELS = {AuditLevel.CRITICAL.value, AuditLevel.SECURITY.value}
+
 class AuditLogger:
-    """Centralized audit logging system"""
+    """Centralized audit logging system
     
-    def __init__(self, db: AuditDatabase):
+    log_event only builds the event and appends it to a bounded in-memory
+    queue. A background writer drains the queue in batches and inserts
+    each batch with one executemany on a persistent WAL connection.
+    The writer also samples system info every `system_info_interval`
+    seconds, and all events logged in between share that sample. When the
+    queue is full, the overflow policy applies: "block" waits up to
+    `block_timeout` seconds for space before dropping the event, "drop"
+    drops it immediately. Critical and security events always wait.
+    """
+    
+    def __init__(self, db: AuditDatabase, max_queue_size: int = None, overflow_policy: str = None,
+                 block_timeout: float = None, system_info_interval: float = None):
         self.db = db
-        self.event_queue = queue.Queue()
+        self.max_queue_size = max_queue_size or int(os.getenv("MITO_AUDIT_QUEUE_SIZE", "100000"))
+        self.event_queue: deque = deque()
+        self.overflow_policy = overflow_policy or os.getenv("MITO_AUDIT_OVERFLOW", "block")
+        self.block_timeout = block_timeout if block_timeout is not None else float(
+            os.getenv("MITO_AUDIT_BLOCK_SECONDS", "0.5"))
+        self.system_info_interval = system_info_interval if system_info_interval is not None else float(
+            os.getenv("MITO_AUDIT_SYSTEM_INFO_SECONDS", "5"))
         self.processing_thread = None
         self.running = False
-        self.batch_size = 100
-        self.flush_interval = 5  # seconds
+        self.batch_size = 2000
+        self.flush_interval = 1  # seconds
+        self.stats = {'written': 0, 'dropped': 0, 'failed': 0, 'flushes': 0}
+        self._stats_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queue_ready = threading.Event()
+        self._queue_space = threading.Condition()
+        self._conn = None
+        self._listeners = []
+        self._sequence = itertools.count()
+        self._static_system_info = {
+            "platform": platform.platform(),
+            "python_version": platform.python_version(),
+            "process_id": os.getpid()
+        }
+        self._system_info = {}
+        self._system_info_json = "{}"
+        self._system_info_at = 0.0
+        self._refresh_system_info()
         self.start_processor()
         
     def start_processor(self):
@@ -218,9 +272,20 @@ class AuditLogger:
     def stop_processor(self):
         """Stop background event processor"""
         self.running = False
+        self._queue_ready.set()
+        with self._queue_space:
+            self._queue_space.notify_all()
         if self.processing_thread:
             self.processing_thread.join(timeout=10)
         self._flush_remaining_events()
+        with self._flush_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        
+    def add_listener(self, callback):
+        """Call `callback(events)` on the writer thread after each batch is stored"""
+        self._listeners.append(callback)
         
     def log_event(self, level: AuditLevel, category: AuditCategory, action: str,
                   user_id: str = None, session_id: str = None, resource: str = None,
@@ -229,15 +294,13 @@ class AuditLogger:
                   duration_ms: float = None) -> str:
         """Log an audit event"""
         
-        event_id = hashlib.sha256(
-            f"{datetime.now().isoformat()}_{action}_{user_id}_{session_id}".encode()
-        ).hexdigest()[:16]
-        
-        system_info = self._get_system_info()
+        now_us = time.time_ns() // 1000
+        # Time-ordered ids keep primary key inserts at the right edge of the index
+        event_id = f"{now_us:014x}{_event_id_prefix}{next(self._sequence) & 0xffff:04x}"
         
         event = AuditEvent(
             id=event_id,
-            timestamp=datetime.now().isoformat(),
+            timestamp=datetime.fromtimestamp(now_us / 1e6).isoformat(),
             level=level.value,
             category=category.value,
             action=action,
@@ -249,14 +312,39 @@ class AuditLogger:
             user_agent=user_agent,
             success=success,
             duration_ms=duration_ms,
-            system_info=system_info
+            system_info=self._system_info
         )
         
         # Queue event for processing
-        self.event_queue.put(event)
+        self._enqueue(event)
         
         return event_id
         
+    def _enqueue(self, event: AuditEvent) -> bool:
+        """Hand an event to the writer, applying the overflow policy when the queue is full"""
+        if len(self.event_queue) >= self.max_queue_size and not self._wait_for_space(event):
+            with self._stats_lock:
+                self.stats['dropped'] += 1
+                dropped = self.stats['dropped']
+            if dropped == 1 or dropped % 10000 == 0:
+                logger.warning(f"Audit queue full; {dropped} events dropped so far")
+            return False
+            
+        self.event_queue.append(event)
+        if len(self.event_queue) >= self.batch_size:
+            self._queue_ready.set()
+        return True
+        
+    def _wait_for_space(self, event: AuditEvent) -> bool:
+        undroppable = event.level in UNDROPPABLE_LEVELS
+        if self.overflow_policy == "drop" and not undroppable:
+            return False
+        self._queue_ready.set()
+        with self._queue_space:
+            return self._queue_space.wait_for(
+                lambda: len(self.event_queue) < self.max_queue_size or not self.running,
+                None if undroppable else self.block_timeout)
+        
     def log_authentication(self, user_id: str, action: str, success: bool,
                           ip_address: str = None, details: Dict[str, Any] = None):
         """Log authentication events"""
@@ -346,78 +434,102 @@ class AuditLogger:
         
     def _process_events(self):
         """Background event processor"""
-        events_batch = []
-        last_flush = time.time()
-        
-        while self.running or not self.event_queue.empty():
+        while self.running or self.event_queue:
             try:
-                # Get event with timeout
-                try:
-                    event = self.event_queue.get(timeout=1.0)
-                    events_batch.append(event)
-                except queue.Empty:
-                    continue
-                
-                # Flush batch if full or time elapsed
-                current_time = time.time()
-                if (len(events_batch) >= self.batch_size or 
-                    current_time - last_flush >= self.flush_interval):
-                    
+                events_batch = self._next_batch()
+                if events_batch:
                     self._flush_events_batch(events_batch)
-                    events_batch = []
-                    last_flush = current_time
-                    
+                if time.monotonic() - self._system_info_at >= self.system_info_interval:
+                    self._refresh_system_info()
             except Exception as e:
                 logger.error(f"Error processing audit events: {e}")
                 
-        # Flush remaining events
+    def _next_batch(self) -> List[AuditEvent]:
+        """Take up to batch_size events, waiting at most flush_interval for a full batch"""
+        if len(self.event_queue) < self.batch_size and self.running:
+            self._queue_ready.wait(self.flush_interval)
+        self._queue_ready.clear()
+        
+        events_batch = []
+        popleft = self.event_queue.popleft
+        try:
+            for _ in range(self.batch_size):
+                events_batch.append(popleft())
+        except IndexError:
+            pass
         if events_batch:
-            self._flush_events_batch(events_batch)
+            with self._queue_space:
+                self._queue_space.notify_all()
+        return events_batch
             
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+        
     def _flush_events_batch(self, events: List[AuditEvent]):
         """Flush batch of events to database"""
         if not events:
             return
             
-        try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
+        # Events sampled in the same interval share one system info dict
+        cached_info, cached_json = self._system_info, self._system_info_json
+        rows = []
+        for event in events:
+            if event.system_info is cached_info:
+                system_info = cached_json
+            else:
+                system_info = json.dumps(event.system_info)
+            rows.append((
+                event.id, event.timestamp, event.level, event.category,
+                event.action, event.user_id, event.session_id, event.resource,
+                json.dumps(event.details) if event.details else "{}", event.ip_address, event.user_agent,
+                event.success, event.duration_ms, system_info
+            ))
             
-            for event in events:
-                cursor.execute("""
-                    INSERT INTO audit_events 
-                    (id, timestamp, level, category, action, user_id, session_id,
-                     resource, details, ip_address, user_agent, success,
-                     duration_ms, system_info)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    event.id, event.timestamp, event.level, event.category,
-                    event.action, event.user_id, event.session_id, event.resource,
-                    json.dumps(event.details), event.ip_address, event.user_agent,
-                    event.success, event.duration_ms, json.dumps(event.system_info)
-                ))
-                
-            conn.commit()
-            conn.close()
+        try:
+            with self._flush_lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(INSERT_AUDIT_EVENT_SQL, rows)
+            with self._stats_lock:
+                self.stats['written'] += len(rows)
+                self.stats['flushes'] += 1
             
             logger.debug(f"Flushed {len(events)} audit events to database")
             
         except Exception as e:
+            with self._stats_lock:
+                self.stats['failed'] += len(rows)
             logger.error(f"Failed to flush audit events: {e}")
+            return
+            
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                logger.error(f"Audit listener failed: {e}")
             
     def _flush_remaining_events(self):
         """Flush any remaining events in queue"""
-        remaining_events = []
-        while not self.event_queue.empty():
+        while self.event_queue:
+            remaining_events = []
             try:
-                event = self.event_queue.get_nowait()
-                remaining_events.append(event)
-            except queue.Empty:
-                break
-                
-        if remaining_events:
+                while len(remaining_events) < self.batch_size:
+                    remaining_events.append(self.event_queue.popleft())
+            except IndexError:
+                pass
             self._flush_events_batch(remaining_events)
             
+    def _refresh_system_info(self):
+        """Resample system information; events share the latest sample"""
+        system_info = self._get_system_info()
+        self._system_info_json = json.dumps(system_info)
+        self._system_info = system_info
+        self._system_info_at = time.monotonic()
+        
     def _get_system_info(self) -> Dict[str, Any]:
         """Get current system information"""
         try:
@@ -425,20 +537,110 @@ class AuditLogger:
                 "cpu_percent": psutil.cpu_percent(interval=None),
                 "memory_percent": psutil.virtual_memory().percent,
                 "disk_usage": psutil.disk_usage('/').percent,
-                "platform": platform.platform(),
-                "python_version": platform.python_version(),
-                "process_id": os.getpid()
+                **self._static_system_info
             }
         except Exception:
             return {"error": "Unable to collect system info"}
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """Ingest counters and current queue depth"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = len(self.event_queue)
+        stats['max_queue_size'] = self.max_queue_size
+        stats['overflow_policy'] = self.overflow_policy
+        return stats
+
+def _event_time(timestamp: str) -> float:
+    """Epoch seconds for an audit timestamp (local-time ISO format)"""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class SlidingWindowCounter:
+    """Event count over a trailing time window, kept in a ring of time buckets
+    
+    The window is split into `buckets` slots; adding and counting only
+    touch slots that expired since the last call, so both are O(1)
+    amortized. Resolution is one bucket (window / buckets).
+    """
+    
+    def __init__(self, window_seconds: float, buckets: int = 60):
+        self.bucket_seconds = max(window_seconds / buckets, 0.001)
+        self.counts = [0] * buckets
+        self.head = None  # newest bucket number
+        self.total = 0
+        
+    def _advance(self, bucket: int):
+        if self.head is None:
+            self.head = bucket
+            return
+        steps = bucket - self.head
+        if steps <= 0:
+            return
+        size = len(self.counts)
+        for offset in range(1, min(steps, size) + 1):
+            slot = (self.head + offset) % size
+            self.total -= self.counts[slot]
+            self.counts[slot] = 0
+        self.head = bucket
+        
+    def add(self, timestamp: float, amount: int = 1):
+        bucket = int(timestamp // self.bucket_seconds)
+        self._advance(bucket)
+        if bucket <= self.head - len(self.counts):
+            return  # already outside the window
+        self.counts[bucket % len(self.counts)] += amount
+        self.total += amount
+        
+    def count(self, now: float) -> int:
+        self._advance(int(now // self.bucket_seconds))
+        return self.total
+
+class SlidingWindowDistinct:
+    """Number of distinct values seen within a trailing time window"""
+    
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.last_seen: "OrderedDict[Any, float]" = OrderedDict()
+        
+    def add(self, value: Any, timestamp: float):
+        if self.last_seen.get(value, float('-inf')) >= timestamp:
+            return
+        self.last_seen[value] = timestamp
+        self.last_seen.move_to_end(value)
+        
+    def count(self, now: float) -> int:
+        # Oldest sightings sit at the front; expire them until one is in the window
+        cutoff = now - self.window_seconds
+        while self.last_seen:
+            oldest = next(iter(self.last_seen))
+            if self.last_seen[oldest] >= cutoff:
+                break
+            del self.last_seen[oldest]
+        return len(self.last_seen)
 
 class ComplianceMonitor:
-    """Monitors audit events for compliance violations"""
+    """Monitors audit events for compliance violations
+    
+    Windowed rules (category_frequency, failed_attempts and
+    data_access_pattern) are evaluated against in-memory sliding windows
+    keyed by (rule, user, category). The windows are rebuilt from
+    audit_events on startup and whenever a rule is added; after that,
+    SQLite is only written to record violations.
+    """
+    
+    PRUNE_EVERY = 10000  # observed events between sweeps of idle windows
     
     def __init__(self, db: AuditDatabase):
         self.db = db
         self.rules = {}
+        self._windows: Dict[tuple, Any] = {}
+        self._windows_lock = threading.RLock()
+        self._observed = 0
         self.load_rules()
+        self.rebuild_windows()
         
     def load_rules(self):
         """Load compliance rules from database"""
@@ -488,6 +690,7 @@ class ComplianceMonitor:
             conn.close()
             
             self.rules[rule.id] = rule
+            self.rebuild_windows([rule])
             logger.info(f"Added compliance rule: {rule.name}")
             return True
             
@@ -495,31 +698,119 @@ class ComplianceMonitor:
             logger.error(f"Failed to add compliance rule: {e}")
             return False
             
+    @staticmethod
+    def _window_spec(rule: ComplianceRule) -> Optional[tuple]:
+        """(category, window seconds, distinct resources?) for windowed rules"""
+        conditions = rule.conditions
+        if rule.rule_type == "category_frequency":
+            return conditions.get("category"), conditions.get("time_window_minutes", 60) * 60, False
+        if rule.rule_type == "failed_attempts":
+            return "authentication", conditions.get("time_window_minutes", 15) * 60, False
+        if rule.rule_type == "data_access_pattern":
+            return "data_access", 3600, True
+        return None
+        
+    def _window(self, rule: ComplianceRule, user_id: Optional[str]):
+        category, window_seconds, distinct = self._window_spec(rule)
+        key = (rule.id, user_id, category)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = (SlidingWindowDistinct(window_seconds) if distinct
+                                           else SlidingWindowCounter(window_seconds))
+        return window
+        
+    @staticmethod
+    def _window_counts(rule: ComplianceRule, event: AuditEvent) -> bool:
+        if event.category != ComplianceMonitor._window_spec(rule)[0]:
+            return False
+        return rule.rule_type != "failed_attempts" or not event.success
+        
+    def rebuild_windows(self, rules: List[ComplianceRule] = None):
+        """Reload sliding windows from audit_events still inside each rule's window"""
+        rules = [rule for rule in (rules or list(self.rules.values())) if self._window_spec(rule)]
+        if not rules:
+            return
+        now = datetime.now()
+        
+        try:
+            conn = sqlite3.connect(self.db.db_path)
+            with self._windows_lock:
+                rule_ids = {rule.id for rule in rules}
+                for key in [key for key in self._windows if key[0] in rule_ids]:
+                    del self._windows[key]
+                    
+                for rule in rules:
+                    category, window_seconds, distinct = self._window_spec(rule)
+                    cutoff = (now - timedelta(seconds=window_seconds)).isoformat()
+                    if distinct:
+                        rows = conn.execute("""
+                            SELECT user_id, resource, MAX(timestamp) FROM audit_events
+                            WHERE category = ? AND timestamp >= ?
+                            GROUP BY user_id, resource ORDER BY 3
+                        """, (category, cutoff))
+                        for user_id, resource, timestamp in rows:
+                            self._window(rule, user_id).add(resource, _event_time(timestamp))
+                    else:
+                        failures_only = " AND success = 0" if rule.rule_type == "failed_attempts" else ""
+                        rows = conn.execute(f"""
+                            SELECT user_id, timestamp FROM audit_events
+                            WHERE category = ? AND timestamp >= ?{failures_only}
+                        """, (category, cutoff))
+                        for user_id, timestamp in rows:
+                            self._window(rule, user_id).add(_event_time(timestamp))
+            conn.close()
+            logger.info(f"Rebuilt compliance windows for {len(rules)} rules")
+            
+        except Exception as e:
+            logger.error(f"Failed to rebuild compliance windows: {e}")
+            
     def check_event_compliance(self, event: AuditEvent) -> List[str]:
         """Check if event violates any compliance rules"""
-        violations = []
+        return self.check_events([event])
         
-        for rule_id, rule in self.rules.items():
-            if self._evaluate_rule(rule, event):
-                violation_id = self._record_violation(rule_id, event)
-                violations.append(violation_id)
-                
-        return violations
+    def check_events(self, events: List[AuditEvent]) -> List[str]:
+        """Stream events through the rules, recording violations in one transaction"""
+        violated = []
+        with self._windows_lock:
+            for event in events:
+                event_time = _event_time(event.timestamp)
+                for rule in self.rules.values():
+                    if self._window_spec(rule) and self._window_counts(rule, event):
+                        window = self._window(rule, event.user_id)
+                        if isinstance(window, SlidingWindowDistinct):
+                            window.add(event.resource, event_time)
+                        else:
+                            window.add(event_time)
+                            
+                for rule_id, rule in self.rules.items():
+                    if self._evaluate_rule(rule, event, event_time):
+                        violated.append((rule_id, event))
+                        
+                self._observed += 1
+                if self._observed % self.PRUNE_EVERY == 0:
+                    self._prune_windows(event_time)
+                    
+        return self._record_violations(violated) if violated else []
         
-    def _evaluate_rule(self, rule: ComplianceRule, event: AuditEvent) -> bool:
+    def _prune_windows(self, now: float):
+        """Drop windows that have emptied so idle users do not accumulate"""
+        for key in [key for key, window in self._windows.items() if window.count(now) == 0]:
+            del self._windows[key]
+            
+    def _evaluate_rule(self, rule: ComplianceRule, event: AuditEvent, event_time: float = None) -> bool:
         """Evaluate if event violates the rule"""
-        conditions = rule.conditions
+        event_time = event_time if event_time is not None else _event_time(event.timestamp)
         
         try:
             # Category-based rules
             if rule.rule_type == "category_frequency":
-                return self._check_frequency_violation(rule, event)
+                return self._check_frequency_violation(rule, event, event_time)
             elif rule.rule_type == "failed_attempts":
-                return self._check_failed_attempts(rule, event)
+                return self._check_failed_attempts(rule, event, event_time)
             elif rule.rule_type == "privileged_access":
                 return self._check_privileged_access(rule, event)
             elif rule.rule_type == "data_access_pattern":
-                return self._check_data_access_pattern(rule, event)
+                return self._check_data_access_pattern(rule, event, event_time)
             elif rule.rule_type == "time_based":
                 return self._check_time_based_violation(rule, event)
                 
@@ -529,53 +820,26 @@ class ComplianceMonitor:
             logger.error(f"Error evaluating rule {rule.id}: {e}")
             return False
             
-    def _check_frequency_violation(self, rule: ComplianceRule, event: AuditEvent) -> bool:
+    def _check_frequency_violation(self, rule: ComplianceRule, event: AuditEvent, event_time: float) -> bool:
         """Check for frequency-based violations"""
         conditions = rule.conditions
         category = conditions.get("category")
         max_count = conditions.get("max_count", 100)
-        time_window = conditions.get("time_window_minutes", 60)
         
         if event.category != category:
             return False
             
         # Check frequency in time window
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT COUNT(*) FROM audit_events 
-            WHERE category = ? AND user_id = ? 
-            AND timestamp >= datetime('now', '-{} minutes')
-        """.format(time_window), (category, event.user_id))
+        return self._window(rule, event.user_id).count(event_time) > max_count
         
-        count = cursor.fetchone()[0]
-        conn.close()
-        
-        return count > max_count
-        
-    def _check_failed_attempts(self, rule: ComplianceRule, event: AuditEvent) -> bool:
+    def _check_failed_attempts(self, rule: ComplianceRule, event: AuditEvent, event_time: float) -> bool:
         """Check for repeated failed attempts"""
-        conditions = rule.conditions
-        max_failures = conditions.get("max_failures", 5)
-        time_window = conditions.get("time_window_minutes", 15)
+        max_failures = rule.conditions.get("max_failures", 5)
         
         if event.success or event.category != "authentication":
             return False
             
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT COUNT(*) FROM audit_events 
-            WHERE category = 'authentication' AND success = FALSE
-            AND user_id = ? AND timestamp >= datetime('now', '-{} minutes')
-        """.format(time_window), (event.user_id,))
-        
-        failures = cursor.fetchone()[0]
-        conn.close()
-        
-        return failures >= max_failures
+        return self._window(rule, event.user_id).count(event_time) >= max_failures
         
     def _check_privileged_access(self, rule: ComplianceRule, event: AuditEvent) -> bool:
         """Check for unauthorized privileged access"""
@@ -590,7 +854,7 @@ class ComplianceMonitor:
         user_roles = event.details.get("user_roles", [])
         return not any(role in authorized_roles for role in user_roles)
         
-    def _check_data_access_pattern(self, rule: ComplianceRule, event: AuditEvent) -> bool:
+    def _check_data_access_pattern(self, rule: ComplianceRule, event: AuditEvent, event_time: float) -> bool:
         """Check for suspicious data access patterns"""
         conditions = rule.conditions
         sensitive_resources = conditions.get("sensitive_resources", [])
@@ -602,20 +866,8 @@ class ComplianceMonitor:
         if event.resource not in sensitive_resources:
             return False
             
-        # Check access frequency
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT COUNT(DISTINCT resource) FROM audit_events 
-            WHERE category = 'data_access' AND user_id = ?
-            AND timestamp >= datetime('now', '-1 hour')
-        """, (event.user_id,))
-        
-        resource_count = cursor.fetchone()[0]
-        conn.close()
-        
-        return resource_count > max_resources
+        # Distinct resources this user touched in the last hour
+        return self._window(rule, event.user_id).count(event_time) > max_resources
         
     def _check_time_based_violation(self, rule: ComplianceRule, event: AuditEvent) -> bool:
         """Check for time-based access violations"""
@@ -630,31 +882,36 @@ class ComplianceMonitor:
         
     def _record_violation(self, rule_id: str, event: AuditEvent) -> str:
         """Record compliance violation"""
+        recorded = self._record_violations([(rule_id, event)])
+        return recorded[0] if recorded else None
+        
+    def _record_violations(self, violations: List[tuple]) -> List[str]:
+        """Record (rule_id, event) violations in a single transaction"""
         try:
             conn = sqlite3.connect(self.db.db_path)
             cursor = conn.cursor()
+            violation_ids = []
             
-            rule = self.rules[rule_id]
-            
-            cursor.execute("""
-                INSERT INTO compliance_violations
-                (rule_id, event_id, violation_type, severity, description)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                rule_id, event.id, rule.rule_type, rule.severity,
-                f"Compliance violation: {rule.name}"
-            ))
-            
-            violation_id = cursor.lastrowid
+            for rule_id, event in violations:
+                rule = self.rules[rule_id]
+                cursor.execute("""
+                    INSERT INTO compliance_violations
+                    (rule_id, event_id, violation_type, severity, description)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    rule_id, event.id, rule.rule_type, rule.severity,
+                    f"Compliance violation: {rule.name}"
+                ))
+                violation_ids.append(str(cursor.lastrowid))
+                logger.warning(f"Compliance violation recorded: {rule.name} (ID: {cursor.lastrowid})")
+                
             conn.commit()
             conn.close()
-            
-            logger.warning(f"Compliance violation recorded: {rule.name} (ID: {violation_id})")
-            return str(violation_id)
+            return violation_ids
             
         except Exception as e:
-            logger.error(f"Failed to record compliance violation: {e}")
-            return None
+            logger.error(f"Failed to record compliance violations: {e}")
+            return []
 
 class SecurityIncidentManager:
     """Manages security incidents and automated responses"""
@@ -863,6 +1120,7 @@ class MITOAuditSystem:
         self.incident_manager = SecurityIncidentManager(self.db)
         self.analytics = AuditAnalytics(self.db)
         self.init_default_compliance_rules()
+        self.logger.add_listener(self.compliance_monitor.check_events)
         
     def init_default_compliance_rules(self):
         """Initialize default compliance rules"""
@@ -4,15 +4,24 @@ Complete authentication and security management system
 """
 
 import os
+import time
+import atexit
 import hashlib
 import secrets
+import logging
+import threading
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import sqlite3
 from werkzeug.security import generate_password_hash, check_password_hash
 import re
 
+logger = logging.getLogger(__name__)
+
+TOUCH_SESSIONS_SQL = "UPDATE sessions SET last_activity = ? WHERE session_id = ? AND last_activity < ?"
+
 class User:
     """User data model"""
     
@@ -44,14 +53,38 @@ class Session:
 class AuthenticationManager:
     """Complete authentication and security management"""
     
-    def __init__(self, db_path: str = "auth.db", secret_key: str = None):
+    def __init__(self, db_path: str = "auth.db", secret_key: str = None,
+                 session_cache_ttl: float = None, session_cache_size: int = None,
+                 touch_flush_interval: float = None):
         self.db_path = db_path
         self.secret_key = secret_key or os.environ.get("JWT_SECRET_KEY", secrets.token_urlsafe(32))
         self.session_timeout = 24 * 60 * 60  # 24 hours in seconds
         self.max_login_attempts = 5
         self.lockout_duration = 30 * 60  # 30 minutes in seconds
         
+        # Validated sessions are served from memory for up to session_cache_ttl
+        # seconds (0 disables the cache). Logout, password changes and expiry
+        # evict entries in this process; other processes see them after the TTL.
+        self.session_cache_ttl = session_cache_ttl if session_cache_ttl is not None else float(
+            os.getenv("MITO_SESSION_CACHE_TTL", "30"))
+        self.session_cache_size = session_cache_size or int(os.getenv("MITO_SESSION_CACHE_SIZE", "10000"))
+        # last_activity touches are coalesced per session and written in one
+        # batch every touch_flush_interval seconds (0 writes them through)
+        self.touch_flush_interval = touch_flush_interval if touch_flush_interval is not None else float(
+            os.getenv("MITO_SESSION_TOUCH_FLUSH_SECONDS", "15"))
+        
+        self._session_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending_touches: Dict[str, str] = {}
+        self._cache_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._flush_thread = None
+        self._invalidation_epoch = 0
+        self.session_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0,
+                                    'touches_flushed': 0, 'flushes': 0}
+        
         self.initialize_database()
+        atexit.register(self._flush_at_exit)
     
     def initialize_database(self):
         """Initialize authentication database"""
@@ -359,6 +392,12 @@ class AuthenticationManager:
     
     def validate_session(self, session_id: str) -> Dict[str, Any]:
         """Validate and refresh session"""
+        cached = self._cached_session(session_id)
+        if cached is not None:
+            return cached
+        
+        # A logout racing this lookup must not leave a stale entry behind
+        epoch = self._invalidation_epoch
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
@@ -382,6 +421,10 @@ class AuthenticationManager:
                 conn.close()
                 return {"success": False, "error": "Session or user is inactive"}
             
+            # A touch that has not been flushed yet is newer than the row
+            with self._cache_lock:
+                last_activity = max(last_activity, self._pending_touches.get(session_id, last_activity))
+            
             # Check session timeout
             last_activity_time = datetime.fromisoformat(last_activity)
             if (datetime.now() - last_activity_time).total_seconds() > self.session_timeout:
@@ -389,36 +432,168 @@ class AuthenticationManager:
                 cursor.execute("UPDATE sessions SET active = 0 WHERE session_id = ?", (session_id,))
                 conn.commit()
                 conn.close()
+                self.invalidate_session(session_id)
                 return {"success": False, "error": "Session expired"}
             
-            # Update last activity
-            cursor.execute('''
-                UPDATE sessions SET last_activity = ? WHERE session_id = ?
-            ''', (datetime.now().isoformat(), session_id))
-            
-            conn.commit()
             conn.close()
             
-            return {
-                "success": True,
+            entry = {
                 "user": {
                     "user_id": user_id,
                     "username": username,
                     "email": email,
                     "role": role
                 },
-                "session": {
-                    "session_id": session_id,
-                    "created_at": created_at,
-                    "last_activity": last_activity
-                }
+                "created_at": created_at,
+                "last_activity": last_activity,
+                "last_activity_time": last_activity_time,
+                "cached_at": time.monotonic()
             }
+            with self._cache_lock:
+                self.session_cache_stats['misses'] += 1
+                if self.session_cache_ttl > 0 and epoch == self._invalidation_epoch:
+                    self._session_cache[session_id] = entry
+                    self._session_cache.move_to_end(session_id)
+                    while len(self._session_cache) > self.session_cache_size:
+                        self._session_cache.popitem(last=False)
+                        self.session_cache_stats['evictions'] += 1
+            
+            self._touch_session(session_id, entry)
+            return self._session_response(session_id, entry, last_activity)
             
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _cached_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Serve a validation from the session cache, or None on a miss"""
+        if self.session_cache_ttl <= 0:
+            return None
+        
+        with self._cache_lock:
+            entry = self._session_cache.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["cached_at"] > self.session_cache_ttl:
+                del self._session_cache[session_id]
+                return None
+            # Let the database path expire the session
+            if (datetime.now() - entry["last_activity_time"]).total_seconds() > self.session_timeout:
+                del self._session_cache[session_id]
+                return None
+            self._session_cache.move_to_end(session_id)
+            self.session_cache_stats['hits'] += 1
+            previous_activity = entry["last_activity"]
+        
+        self._touch_session(session_id, entry)
+        return self._session_response(session_id, entry, previous_activity)
+    
+    @staticmethod
+    def _session_response(session_id: str, entry: Dict[str, Any], last_activity: str) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "user": dict(entry["user"]),
+            "session": {
+                "session_id": session_id,
+                "created_at": entry["created_at"],
+                "last_activity": last_activity
+            }
+        }
+    
+    def _touch_session(self, session_id: str, entry: Dict[str, Any]):
+        """Record session activity; written through or queued for the next batch"""
+        now = datetime.now()
+        now_iso = now.isoformat()
+        with self._cache_lock:
+            entry["last_activity"] = now_iso
+            entry["last_activity_time"] = now
+            self._pending_touches[session_id] = now_iso
+        
+        if self.touch_flush_interval <= 0:
+            self.flush_session_touches()
+        elif self._flush_thread is None:
+            self._start_flush_thread()
+    
+    def _start_flush_thread(self):
+        with self._flush_lock:
+            if self._flush_thread is not None:
+                return
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True,
+                                                  name="session-touch-flush")
+            self._flush_thread.start()
+    
+    def _flush_loop(self):
+        while not self._flush_event.wait(self.touch_flush_interval):
+            try:
+                self.flush_session_touches()
+            except Exception as e:
+                logger.error(f"Failed to flush session activity: {e}")
+    
+    def _flush_at_exit(self):
+        try:
+            self.flush_session_touches()
+        except Exception as e:
+            logger.warning(f"Dropped unflushed session activity at exit: {e}")
+    
+    def flush_session_touches(self) -> int:
+        """Write coalesced last_activity touches in one transaction"""
+        with self._flush_lock:
+            with self._cache_lock:
+                if not self._pending_touches:
+                    return 0
+                touches = self._pending_touches
+                self._pending_touches = {}
+            
+            rows = [(last_activity, session_id, last_activity)
+                    for session_id, last_activity in touches.items()]
+            try:
+                conn = sqlite3.connect(self.db_path)
+                with conn:
+                    conn.executemany(TOUCH_SESSIONS_SQL, rows)
+                conn.close()
+            except Exception:
+                # Keep the touches for the next flush unless newer ones arrived
+                with self._cache_lock:
+                    for session_id, last_activity in touches.items():
+                        self._pending_touches.setdefault(session_id, last_activity)
+                raise
+            
+            with self._cache_lock:
+                self.session_cache_stats['touches_flushed'] += len(rows)
+                self.session_cache_stats['flushes'] += 1
+            return len(rows)
+    
+    def invalidate_session(self, session_id: str):
+        """Drop a session from the validation cache"""
+        with self._cache_lock:
+            self._invalidation_epoch += 1
+            if self._session_cache.pop(session_id, None) is not None:
+                self.session_cache_stats['invalidations'] += 1
+    
+    def invalidate_user_sessions(self, user_id: str):
+        """Drop every cached session belonging to a user"""
+        with self._cache_lock:
+            self._invalidation_epoch += 1
+            stale = [session_id for session_id, entry in self._session_cache.items()
+                     if entry["user"]["user_id"] == user_id]
+            for session_id in stale:
+                del self._session_cache[session_id]
+            self.session_cache_stats['invalidations'] += len(stale)
+    
+    def get_session_cache_stats(self) -> Dict[str, Any]:
+        """Session cache hit rate and touch flush counters"""
+        with self._cache_lock:
+            stats = dict(self.session_cache_stats)
+            stats['entries'] = len(self._session_cache)
+            stats['pending_touches'] = len(self._pending_touches)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / max(lookups, 1), 4)
+        stats['ttl_seconds'] = self.session_cache_ttl
+        stats['touch_flush_interval'] = self.touch_flush_interval
+        return stats
+    
     def logout_user(self, session_id: str) -> Dict[str, Any]:
         """Logout user and invalidate session"""
+        self.invalidate_session(session_id)
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
@@ -431,6 +606,7 @@ class AuthenticationManager:
             
             conn.commit()
             conn.close()
+            self.invalidate_session(session_id)
             
             return {"success": True, "message": "Logged out successfully"}
             
@@ -551,6 +727,7 @@ class AuthenticationManager:
             
             conn.commit()
             conn.close()
+            self.invalidate_user_sessions(user_id)
             
             return {"success": True, "message": "Password updated successfully"}
             
@@ -580,6 +757,7 @@ class AuthenticationManager:
     def get_active_sessions(self, user_id: str = None) -> List[Dict[str, Any]]:
         """Get active sessions"""
         try:
+            self.flush_session_touches()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+MITO Engine - Vector index benchmark
+Measures recall@k and query latency of the EmbeddingManager index tiers
+against exact (flat) search on synthetic clustered embeddings.
+
+Usage:
+    python benchmark_ann_index.py                          # 10k, 100k vectors
+    python benchmark_ann_index.py 10000 100000 1000000
+    python benchmark_ann_index.py --k 20 --tiers ivf_flat,hnsw 100000
+"""
+
+import os
+import sys
+import time
+import statistics
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import faiss
+from advanced_search_engine import create_ann_index, ann_search_params, ivf_list_count
+
+DIM = 384
+QUERIES = 200
+SWEEPS = {
+    "ivf_flat": [1, 8, 32],
+    "ivf_pq": [8, 32, 64],
+    "hnsw": [16, 64, 128],
+}
+
+
+def synthetic_corpus(size: int, seed: int = 0):
+    """Unit vectors drawn around random topic centroids, like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((max(size // 500, 16), DIM)).astype(np.float32)
+    vectors = centroids[rng.integers(len(centroids), size=size)]
+    vectors += 0.6 * rng.standard_normal((size, DIM)).astype(np.float32)
+    queries = centroids[rng.integers(len(centroids), size=QUERIES)]
+    queries += 0.6 * rng.standard_normal((QUERIES, DIM)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    faiss.normalize_L2(queries)
+    return vectors, queries
+
+
+def build(index_type: str, vectors: np.ndarray) -> tuple:
+    start = time.perf_counter()
+    index = create_ann_index(index_type, DIM, len(vectors))
+    if not index.is_trained:
+        sample_size = min(len(vectors), max(ivf_list_count(len(vectors)) * 39, 256 * 39), 200_000)
+        index.train(vectors[np.random.default_rng(1).choice(len(vectors), sample_size, replace=False)])
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+    return index, time.perf_counter() - start
+
+
+def measure(index, index_type: str, queries: np.ndarray, k: int, knob: int, truth: np.ndarray) -> dict:
+    params = ann_search_params(index_type, knob, max(knob, k))
+    timings = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        if params is None:
+            _, ids = index.search(query.reshape(1, -1), k)
+        else:
+            _, ids = index.search(query.reshape(1, -1), k, params=params)
+        timings.append((time.perf_counter() - start) * 1e6)
+        hits += len(set(ids[0].tolist()) & set(expected.tolist()))
+    return {
+        'recall': round(hits / (len(queries) * k), 4),
+        'p50_us': round(statistics.median(timings), 1)
+    }
+
+
+def main():
+    args = sys.argv[1:]
+    k = 10
+    tiers = list(SWEEPS)
+    sizes = []
+    while args:
+        arg = args.pop(0)
+        if arg == "--k":
+            k = int(args.pop(0))
+        elif arg == "--tiers":
+            tiers = args.pop(0).split(",")
+        else:
+            sizes.append(int(arg))
+    sizes = sizes or [10_000, 100_000]
+
+    print(f"recall@{k} against IndexFlatIP, {QUERIES} queries, dim={DIM}")
+    print(f"{'vectors':>10} {'index':>9} {'knob':>6} {'build s':>8} {'recall':>7} {'p50 us':>9}")
+    for size in sizes:
+        vectors, queries = synthetic_corpus(size)
+        flat, flat_build = build("flat", vectors)
+        _, truth = flat.search(queries, k)
+        exact = measure(flat, "flat", queries, k, 0, truth)
+        print(f"{size:>10,} {'flat':>9} {'-':>6} {flat_build:>8.2f} {exact['recall']:>7} {exact['p50_us']:>9}")
+
+        for index_type in tiers:
+            index, build_time = build(index_type, vectors)
+            for knob in SWEEPS[index_type]:
+                result = measure(index, index_type, queries, k, knob, truth)
+                print(f"{size:>10,} {index_type:>9} {knob:>6} {build_time:>8.2f} "
+                      f"{result['recall']:>7} {result['p50_us']:>9}")
+            del index
+
+
+if __name__ == "__main__":
+    main()
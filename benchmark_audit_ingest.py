@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+MITO Engine - Audit ingest benchmark
+Measures sustained AuditLogger throughput and the latency log_event adds
+to the calling (request) threads.
+
+Usage:
+    python benchmark_audit_ingest.py                 # 4 threads, 250k events
+    python benchmark_audit_ingest.py --threads 8 --events 500000
+    python benchmark_audit_ingest.py --overflow drop --queue 10000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from audit import AuditDatabase, AuditLogger, AuditLevel, AuditCategory
+
+
+def produce(audit_logger: AuditLogger, count: int, thread_id: int, timings: list):
+    """Log `count` events, sampling per-call latency on every 100th call"""
+    for i in range(count):
+        start = time.perf_counter()
+        audit_logger.log_event(AuditLevel.INFO, AuditCategory.API_CALL, "GET /api/items",
+                               user_id=f"user{i % 500}", session_id=f"session{thread_id}",
+                               resource="/api/items", details={"response_code": 200},
+                               duration_ms=12.5)
+        if i % 100 == 0:
+            timings.append((time.perf_counter() - start) * 1e6)
+
+
+def run(threads: int, events: int, queue_size: int, overflow: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        audit_logger = AuditLogger(AuditDatabase(os.path.join(tmp, "audit.db")),
+                                   max_queue_size=queue_size, overflow_policy=overflow)
+        per_thread = events // threads
+        timings = []
+        workers = [threading.Thread(target=produce, args=(audit_logger, per_thread, t, timings))
+                   for t in range(threads)]
+
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        produced = time.perf_counter() - start
+
+        # Sustained rate counts until every accepted event is on disk
+        while audit_logger.get_stats()['written'] + audit_logger.get_stats()['dropped'] < per_thread * threads:
+            time.sleep(0.01)
+        drained = time.perf_counter() - start
+        stats = audit_logger.get_stats()
+        audit_logger.stop_processor()
+
+    timings.sort()
+    return {
+        'events': per_thread * threads,
+        'written': stats['written'],
+        'dropped': stats['dropped'],
+        'produce_seconds': round(produced, 2),
+        'sustained_per_second': round(stats['written'] / drained),
+        'log_event_p50_us': round(statistics.median(timings), 1),
+        'log_event_p99_us': round(timings[int(len(timings) * 0.99) - 1], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AuditLogger ingest")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--events", type=int, default=250_000)
+    parser.add_argument("--queue", type=int, default=100_000)
+    parser.add_argument("--overflow", choices=["block", "drop"], default="block")
+    args = parser.parse_args()
+
+    result = run(args.threads, args.events, args.queue, args.overflow)
+    print(f"{result['events']:,} events from {args.threads} threads "
+          f"(queue={args.queue:,}, overflow={args.overflow})")
+    for key, value in result.items():
+        print(f"  {key:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+MITO Engine - Conversation memory benchmark
+Measures get_session_context latency as conversation_memory grows.
+
+Usage:
+    python benchmark_memory_context.py                      # 10k, 100k, 1M rows
+    python benchmark_memory_context.py 10000 1000000 10000000
+    python benchmark_memory_context.py --no-index 10000 100000
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory_manager import MITOMemoryManager, INSERT_CONVERSATION_SQL
+
+MESSAGES_PER_SESSION = 50
+LOOKUPS = 500
+
+
+def populate(manager: MITOMemoryManager, rows: int):
+    """Bulk-load synthetic sessions, interleaved in time like real traffic"""
+    sessions = max(rows // MESSAGES_PER_SESSION, 1)
+    start = datetime(2025, 1, 1)
+    batch = []
+    with manager.pool.connection() as conn:
+        for i in range(rows):
+            session = f"session_{i % sessions}"
+            timestamp = (start + timedelta(seconds=i)).isoformat()
+            batch.append((session, timestamp, "user" if i % 2 else "mito",
+                          f"message {i}", None, 1.0, 5))
+            if len(batch) >= 50000:
+                conn.executemany(INSERT_CONVERSATION_SQL, batch)
+                batch = []
+        if batch:
+            conn.executemany(INSERT_CONVERSATION_SQL, batch)
+    return sessions
+
+
+def run(rows: int, use_index: bool = True) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, "bench.db"), write_behind=False)
+        if not use_index:
+            with manager.pool.connection() as conn:
+                conn.execute("DROP INDEX IF EXISTS idx_conversation_session_time")
+
+        load_start = time.perf_counter()
+        sessions = populate(manager, rows)
+        load_time = time.perf_counter() - load_start
+
+        timings = []
+        for _ in range(LOOKUPS):
+            session_id = f"session_{random.randrange(sessions)}"
+            start = time.perf_counter()
+            manager.get_session_context(session_id, limit=10)
+            timings.append((time.perf_counter() - start) * 1e6)
+
+        manager.pool.close_all()
+
+    timings.sort()
+    return {
+        'rows': rows,
+        'load_seconds': round(load_time, 2),
+        'p50_us': round(statistics.median(timings), 1),
+        'p95_us': round(timings[int(len(timings) * 0.95) - 1], 1)
+    }
+
+
+def main():
+    args = sys.argv[1:]
+    use_index = "--no-index" not in args
+    sizes = [int(arg) for arg in args if arg.isdigit()] or [10_000, 100_000, 1_000_000]
+
+    print(f"get_session_context(limit=10), {LOOKUPS} lookups, index={'on' if use_index else 'off'}")
+    print(f"{'rows':>12} {'load s':>8} {'p50 us':>10} {'p95 us':>10}")
+    for rows in sizes:
+        result = run(rows, use_index)
+        print(f"{result['rows']:>12,} {result['load_seconds']:>8} {result['p50_us']:>10} {result['p95_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
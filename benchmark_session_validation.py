@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+MITO Engine - Session validation benchmark
+Measures AuthenticationManager.validate_session throughput with the
+session cache and coalesced last_activity writes off and on.
+
+Usage:
+    python benchmark_session_validation.py                # 100 sessions, 5000 validations
+    python benchmark_session_validation.py 1000 20000
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from authentication_manager import AuthenticationManager
+
+PASSWORD = "BenchPass123!"
+
+
+def run(sessions: int, validations: int, cached: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = AuthenticationManager(os.path.join(tmp, "bench.db"), secret_key="bench-secret-key-for-session-validation",
+                                        session_cache_ttl=30 if cached else 0,
+                                        touch_flush_interval=15 if cached else 0)
+        user_id = manager.register_user("bench", "bench@example.com", PASSWORD)["user_id"]
+        session_ids = [manager.create_session(user_id)["session_id"] for _ in range(sessions)]
+
+        start = time.perf_counter()
+        for _ in range(validations):
+            assert manager.validate_session(random.choice(session_ids))["success"]
+        elapsed = time.perf_counter() - start
+
+        flush_start = time.perf_counter()
+        manager.flush_session_touches()
+        flush_ms = (time.perf_counter() - flush_start) * 1000
+
+    return {
+        'mode': 'cached' if cached else 'uncached',
+        'per_second': round(validations / elapsed),
+        'mean_us': round(elapsed / validations * 1e6, 1),
+        'flush_ms': round(flush_ms, 2)
+    }
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    sessions = args[0] if args else 100
+    validations = args[1] if len(args) > 1 else 5000
+
+    print(f"validate_session, {sessions} sessions, {validations} validations")
+    print(f"{'mode':>10} {'valid/s':>10} {'mean us':>10} {'flush ms':>10}")
+    for cached in (False, True):
+        result = run(sessions, validations, cached)
+        print(f"{result['mode']:>10} {result['per_second']:>10,} {result['mean_us']:>10} {result['flush_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+MITO Engine - AI Agent & Tool Creator
+Name: MITO Engine
+Version: 1.2.0
+Created by: Daniel Guzman
+Contact: guzman.danield@outlook.com
+Description: In-process pub/sub fan-out of dashboard events over Server-Sent Events
+"""
+
+import os
+import json
+import time
+import itertools
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Render one event in text/event-stream format"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class Subscription:
+    """One client's bounded event queue.
+
+    The broker appends events without blocking. A client that falls
+    `max_pending` events behind is marked overflowed and disconnected;
+    it reconnects with its last event id and resumes from the replay
+    buffer, so one slow client never holds up publishers or others.
+    Events already queued when it overflows are still delivered, so the
+    resume point has no gap.
+    """
+
+    def __init__(self, broker: "EventBroker", channels: Optional[set], max_pending: int):
+        self.broker = broker
+        self.channels = channels
+        self.max_pending = max_pending
+        self.pending: deque = deque()
+        self.overflowed = False
+        self.closed = False
+        self._ready = threading.Condition()
+
+    def wants(self, channel: str) -> bool:
+        return self.channels is None or channel in self.channels
+
+    def offer(self, event: Dict[str, Any]):
+        with self._ready:
+            if self.closed or self.overflowed:
+                return
+            if len(self.pending) >= self.max_pending:
+                # Keep what is queued so the client's last id stays gap-free
+                self.overflowed = True
+            else:
+                self.pending.append(event)
+            self._ready.notify()
+
+    def get(self, timeout: float) -> List[Dict[str, Any]]:
+        """Wait up to `timeout` seconds and take every pending event"""
+        with self._ready:
+            if not self.pending and not self.overflowed and not self.closed:
+                self._ready.wait(timeout)
+            events = list(self.pending)
+            self.pending.clear()
+        return events
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Publish events once and fan them out to every subscriber.
+
+    Each event gets a broker-wide increasing id. The last `replay_size`
+    events are kept so a reconnecting client that sends Last-Event-ID
+    receives exactly what it missed. If the id has already aged out of
+    the buffer (or predates a restart), the client is sent a `reset`
+    event and should reload its state over the REST endpoints once.
+
+    Streams end after `stream_seconds` so a connection never outlives the
+    gunicorn worker timeout; the `retry:` hint brings the client straight
+    back, resuming from its last id.
+    """
+
+    def __init__(self, replay_size: int = None, client_queue_size: int = None,
+                 heartbeat_seconds: float = None, stream_seconds: float = None):
+        self.replay_size = replay_size or int(os.getenv("MITO_EVENT_REPLAY_SIZE", "1000"))
+        self.client_queue_size = client_queue_size or int(os.getenv("MITO_EVENT_CLIENT_QUEUE", "256"))
+        self.heartbeat_seconds = heartbeat_seconds if heartbeat_seconds is not None else float(
+            os.getenv("MITO_EVENT_HEARTBEAT_SECONDS", "15"))
+        # Keep below the gunicorn worker timeout (30s by default)
+        self.stream_seconds = stream_seconds if stream_seconds is not None else float(
+            os.getenv("MITO_EVENT_STREAM_SECONDS", "25"))
+        self._replay: deque = deque(maxlen=self.replay_size)
+        self._subscribers: List[Subscription] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats = {'published': 0, 'delivered': 0, 'overflows': 0, 'resets': 0}
+
+    def publish(self, channel: str, event_type: str, data: Any) -> int:
+        """Publish an event to every subscriber of `channel`; returns its id"""
+        with self._lock:
+            event = {'id': next(self._ids), 'channel': channel, 'type': event_type, 'data': data}
+            self._replay.append(event)
+            subscribers = [sub for sub in self._subscribers if sub.wants(channel)]
+            self.stats['published'] += 1
+            self.stats['delivered'] += len(subscribers)
+            # Offer under the broker lock so every queue receives ids in order
+            for subscriber in subscribers:
+                subscriber.offer(event)
+        return event['id']
+
+    def subscribe(self, channels: Iterable[str] = None,
+                  last_event_id: Optional[int] = None) -> Subscription:
+        """Register a subscriber, queueing any replayed events it missed"""
+        subscription = Subscription(self, set(channels) if channels else None, self.client_queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._replay[0]['id'] if self._replay else 1
+                newest = self._replay[-1]['id'] if self._replay else 0
+                # Too old for the buffer, or an id from before a server restart
+                if last_event_id < oldest - 1 or last_event_id > newest:
+                    self.stats['resets'] += 1
+                    subscription.pending.append({'id': newest, 'channel': None, 'type': 'reset',
+                                                 'data': {'reason': 'missed events are no longer buffered'}})
+                else:
+                    subscription.pending.extend(
+                        event for event in self._replay
+                        if event['id'] > last_event_id and subscription.wants(event['channel']))
+            self._subscribers.append(subscription)
+        return subscription
+
+    def last_event_id(self) -> int:
+        """Id of the newest published event; clients resume after it"""
+        with self._lock:
+            return self._replay[-1]['id'] if self._replay else 0
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stream(self, channels: Iterable[str] = None, last_event_id: Optional[int] = None,
+               max_seconds: float = None) -> Iterator[str]:
+        """Yield text/event-stream chunks until the client goes away, falls
+        behind, or `max_seconds` (default `stream_seconds`; 0 for no limit) pass"""
+        if max_seconds is None:
+            max_seconds = self.stream_seconds
+        subscription = self.subscribe(channels, last_event_id)
+        deadline = time.monotonic() + max_seconds if max_seconds else None
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                timeout = self.heartbeat_seconds
+                if deadline is not None:
+                    timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+                events = subscription.get(timeout)
+                if events:
+                    yield "".join(format_sse(event) for event in events)
+                if subscription.overflowed:
+                    with self._lock:
+                        self.stats['overflows'] += 1
+                    logger.info("Dropping slow event stream client; it will resume from its last id")
+                    return
+                if not events:
+                    yield ": keepalive\n\n"
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+        finally:
+            subscription.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['subscribers'] = len(self._subscribers)
+            stats['last_event_id'] = self._replay[-1]['id'] if self._replay else 0
+        stats['replay_size'] = self.replay_size
+        return stats
+
+
+# Global event broker
+_event_broker = None
+_event_broker_lock = threading.Lock()
+
+
+def get_event_broker() -> EventBroker:
+    """Get or create the global event broker"""
+    global _event_broker
+    if _event_broker is None:
+        with _event_broker_lock:
+            if _event_broker is None:
+                _event_broker = EventBroker()
+    return _event_broker
@@ -0,0 +1,21 @@
+"""
+MITO Engine - AI Agent & Tool Creator
+Name: MITO Engine
+Version: 1.2.0
+Created by: Daniel Guzman
+Contact: guzman.danield@outlook.com
+Description: Gunicorn settings, picked up automatically by `gunicorn main:app`
+"""
+
+import os
+
+bind = os.getenv("MITO_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("MITO_GUNICORN_WORKERS", "1"))
+
+# Dashboards hold /api/events/stream open; threaded workers keep one open
+# stream from occupying the whole worker, as a sync worker would
+worker_class = "gthread"
+threads = int(os.getenv("MITO_GUNICORN_THREADS", "16"))
+
+# Event streams close after MITO_EVENT_STREAM_SECONDS (25s), below this
+timeout = int(os.getenv("MITO_GUNICORN_TIMEOUT", "30"))
@@ -7,94 +7,409 @@ Provides intelligent memory management for AI conversations and system operation
 import os
 import time
 import json
+import queue
+import atexit
 import hashlib
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Statements shared by every call so each pooled connection's statement
+# cache compiles them once
+INSERT_CONVERSATION_SQL = """
+    INSERT INTO conversation_memory
+    (session_id, timestamp, message_type, content, context_hash, importance_score, retention_priority)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_SESSION_CONTEXT_SQL = """
+    SELECT message_type, content, timestamp, importance_score
+    FROM conversation_memory
+    WHERE session_id = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+
+class SQLiteConnectionPool:
+    """Thread-safe pool of WAL-mode SQLite connections"""
+
+    def __init__(self, db_path: str, size: int = 4, timeout: float = 30.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path,
+                               timeout=self.timeout,
+                               check_same_thread=False,
+                               cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._create_connection()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        return self._idle.get(timeout=self.timeout)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error"""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close_all(self):
+        """Close idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
 class MITOMemoryManager:
     """Advanced memory management for MITO Engine operations"""
     
-    def __init__(self, db_path: str = "mito_memory.db"):
+    def __init__(self, db_path: str = "mito_memory.db", pool_size: int = 4,
+                 write_behind: bool = True, flush_interval: float = 0.5, batch_size: int = 200,
+                 max_pending: int = None):
         self.db_path = db_path
+        self.pool = SQLiteConnectionPool(db_path, size=pool_size)
         self.memory_cache = {}
         self.conversation_context = []
         self.system_state = {}
         self.session_id = None
+        
+        # Write-behind buffer: conversation rows are batched into one transaction
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # While the database is unavailable the oldest buffered rows beyond
+        # max_pending are dropped and counted
+        self.max_pending = max_pending or int(os.getenv("MITO_MEMORY_MAX_PENDING", "10000"))
+        self.dropped_rows = 0
+        self._pending_rows: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        # Held by flushes and by readers that merge the buffer with the
+        # table, so a row is always seen in exactly one of the two
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._writer_stop = threading.Event()
+        self._writer_thread = None
+        
         self.init_database()
+        if write_behind:
+            atexit.register(self.flush)
         
     def init_database(self):
         """Initialize memory database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Conversation memory table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS conversation_memory (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    message_type TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    context_hash TEXT,
-                    importance_score REAL DEFAULT 1.0,
-                    retention_priority INTEGER DEFAULT 5,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # System state memory table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS system_memory (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    component TEXT NOT NULL,
-                    state_key TEXT NOT NULL,
-                    state_value TEXT NOT NULL,
-                    last_updated TEXT NOT NULL,
-                    expiry_time TEXT,
-                    access_count INTEGER DEFAULT 0,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # User preferences and context
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_context (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_identifier TEXT NOT NULL,
-                    context_type TEXT NOT NULL,
-                    context_data TEXT NOT NULL,
-                    confidence_score REAL DEFAULT 1.0,
-                    last_accessed TEXT DEFAULT CURRENT_TIMESTAMP,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Memory optimization metadata
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS memory_metadata (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    operation_type TEXT NOT NULL,
-                    execution_time REAL NOT NULL,
-                    memory_usage INTEGER,
-                    cache_hits INTEGER DEFAULT 0,
-                    cache_misses INTEGER DEFAULT 0,
-                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Conversation memory table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS conversation_memory (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        session_id TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        message_type TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        context_hash TEXT,
+                        importance_score REAL DEFAULT 1.0,
+                        retention_priority INTEGER DEFAULT 5,
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # System state memory table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS system_memory (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        component TEXT NOT NULL,
+                        state_key TEXT NOT NULL,
+                        state_value TEXT NOT NULL,
+                        last_updated TEXT NOT NULL,
+                        expiry_time TEXT,
+                        access_count INTEGER DEFAULT 0,
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # User preferences and context
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS user_context (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_identifier TEXT NOT NULL,
+                        context_type TEXT NOT NULL,
+                        context_data TEXT NOT NULL,
+                        confidence_score REAL DEFAULT 1.0,
+                        last_accessed TEXT DEFAULT CURRENT_TIMESTAMP,
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Memory optimization metadata
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS memory_metadata (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        operation_type TEXT NOT NULL,
+                        execution_time REAL NOT NULL,
+                        memory_usage INTEGER,
+                        cache_hits INTEGER DEFAULT 0,
+                        cache_misses INTEGER DEFAULT 0,
+                        timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Context lookups and retention pruning stay index-bound as tables grow
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_conversation_session_time
+                    ON conversation_memory (session_id, timestamp)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_conversation_retention
+                    ON conversation_memory (retention_priority, importance_score, timestamp)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_conversation_time
+                    ON conversation_memory (timestamp)
+                """)
+                
+                # Message counts kept current by triggers, so retention never
+                # has to GROUP BY or COUNT(*) the whole conversation table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS conversation_counts (
+                        session_id TEXT PRIMARY KEY,
+                        message_count INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS conversation_totals (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        message_count INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_conversation_counts_count
+                    ON conversation_counts (message_count)
+                """)
+                if cursor.execute("SELECT 1 FROM conversation_totals WHERE id = 1").fetchone() is None:
+                    # First start with count tracking: backfill once from existing rows
+                    cursor.execute("DELETE FROM conversation_counts")
+                    cursor.execute("""
+                        INSERT INTO conversation_counts (session_id, message_count)
+                        SELECT session_id, COUNT(*) FROM conversation_memory GROUP BY session_id
+                    """)
+                    cursor.execute("""
+                        INSERT INTO conversation_totals (id, message_count)
+                        SELECT 1, COUNT(*) FROM conversation_memory
+                    """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_conversation_count_insert
+                    AFTER INSERT ON conversation_memory
+                    BEGIN
+                        INSERT INTO conversation_counts (session_id, message_count)
+                        VALUES (NEW.session_id, 1)
+                        ON CONFLICT(session_id) DO UPDATE SET message_count = message_count + 1;
+                        UPDATE conversation_totals SET message_count = message_count + 1 WHERE id = 1;
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_conversation_count_delete
+                    AFTER DELETE ON conversation_memory
+                    BEGIN
+                        UPDATE conversation_counts SET message_count = message_count - 1
+                        WHERE session_id = OLD.session_id;
+                        DELETE FROM conversation_counts
+                        WHERE session_id = OLD.session_id AND message_count <= 0;
+                        UPDATE conversation_totals SET message_count = message_count - 1 WHERE id = 1;
+                    END
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_system_memory_key
+                    ON system_memory (component, state_key)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_user_context_user
+                    ON user_context (user_identifier, context_type, last_accessed)
+                """)
             
-            conn.commit()
-            conn.close()
             logger.info("Memory management database initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize memory database: {e}")
             raise
     
+    # Session-scoped API: safe to share one manager across concurrent requests
+    
+    def store_session_message(self, session_id: str, message_type: str, content: str,
+                              importance_score: float = 1.0, retention_priority: int = 5) -> bool:
+        """Store a conversation message for an explicit session"""
+        row = (
+            session_id,
+            datetime.now().isoformat(),
+            message_type,
+            content,
+            hashlib.md5(content.encode()).hexdigest(),
+            importance_score,
+            retention_priority
+        )
+        
+        if self.write_behind:
+            with self._pending_lock:
+                if len(self._pending_rows) >= self.max_pending:
+                    del self._pending_rows[0]
+                    self.dropped_rows += 1
+                self._pending_rows.append(row)
+                pending = len(self._pending_rows)
+            self._ensure_writer()
+            if pending >= self.batch_size:
+                self._flush_wakeup.set()
+            return True
+        
+        try:
+            with self.pool.connection() as conn:
+                conn.execute(INSERT_CONVERSATION_SQL, row)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store conversation: {e}")
+            return False
+    
+    def _ensure_writer(self):
+        if self._writer_thread is not None:
+            return
+        with self._pending_lock:
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._writer_loop,
+                                                       name="mito-memory-writer",
+                                                       daemon=True)
+                self._writer_thread.start()
+    
+    def _writer_loop(self):
+        while not self._writer_stop.is_set():
+            self._flush_wakeup.wait(self.flush_interval)
+            self._flush_wakeup.clear()
+            self.flush()
+    
+    def close(self):
+        """Stop the background writer, flush what is buffered and close the pool"""
+        self._writer_stop.set()
+        self._flush_wakeup.set()
+        with self._pending_lock:
+            writer, self._writer_thread = self._writer_thread, None
+        if writer is not None:
+            writer.join()
+        self.flush()
+        if self.write_behind:
+            atexit.unregister(self.flush)
+        self.pool.close_all()
+    
+    def flush(self) -> int:
+        """Write buffered conversation rows in a single transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending_rows = self._pending_rows, []
+            if not rows:
+                return 0
+            
+            try:
+                with self.pool.connection() as conn:
+                    conn.executemany(INSERT_CONVERSATION_SQL, rows)
+                return len(rows)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(rows)} conversation rows: {e}")
+                # Keep the batch, ahead of rows buffered since, for the next
+                # flush; beyond max_pending the oldest rows are dropped
+                with self._pending_lock:
+                    room = self.max_pending - len(self._pending_rows)
+                    kept = rows[max(0, len(rows) - room):] if room > 0 else []
+                    self.dropped_rows += len(rows) - len(kept)
+                    self._pending_rows[:0] = kept
+                return 0
+    
+    def get_session_context(self, session_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get recent conversation context for an explicit session, oldest first"""
+        rows = []
+        with self._flush_lock:
+            with self._pending_lock:
+                pending = [row for row in self._pending_rows if row[0] == session_id]
+            if len(pending) < limit:
+                with self.pool.connection() as conn:
+                    results = conn.execute(SELECT_SESSION_CONTEXT_SQL,
+                                           (session_id, limit - len(pending))).fetchall()
+                rows = list(reversed(results))  # Return in chronological order
+        # Buffered rows are newer than anything already written
+        rows.extend((row[2], row[3], row[1], row[5]) for row in pending)
+        
+        context = []
+        for row in rows[-limit:]:
+            context.append({
+                'type': row[0],
+                'content': row[1],
+                'timestamp': row[2],
+                'importance': row[3]
+            })
+        return context
+    
+    def build_session_prompt(self, session_id: str, user_message: str, limit: int = 5) -> str:
+        """Build context prompt for AI providers from a session's recent history"""
+        try:
+            context = self.get_session_context(session_id, limit)
+        except Exception as e:
+            logger.error(f"Failed to get conversation context: {e}")
+            return user_message
+        return self._format_context_prompt(context, user_message)
+    
+    @staticmethod
+    def _format_context_prompt(context: List[Dict[str, Any]], user_message: str) -> str:
+        if not context:
+            return user_message
+        
+        # Build prompt with recent context
+        prompt_parts = ["Recent conversation context:"]
+        
+        for entry in context[-5:]:  # Last 5 messages for context
+            role = "User" if entry['type'] == 'user' else "MITO"
+            prompt_parts.append(f"{role}: {entry['content'][:200]}...")
+        
+        prompt_parts.append(f"\nCurrent message: {user_message}")
+        return "\n".join(prompt_parts)
+    
+    # Legacy single-session API built on self.session_id
+    
     def start_session(self, session_id: str = None) -> str:
         """Start a new memory session"""
         if not session_id:
@@ -113,48 +428,23 @@ class MITOMemoryManager:
         if not self.session_id:
             self.start_session()
         
-        try:
-            # Generate context hash
-            context_hash = hashlib.md5(content.encode()).hexdigest()
-            
-            # Store in database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO conversation_memory 
-                (session_id, timestamp, message_type, content, context_hash, importance_score, retention_priority)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                self.session_id,
-                datetime.now().isoformat(),
-                message_type,
-                content,
-                context_hash,
-                importance_score,
-                retention_priority
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            # Add to current context
-            self.conversation_context.append({
-                'type': message_type,
-                'content': content,
-                'timestamp': datetime.now().isoformat(),
-                'importance': importance_score
-            })
-            
-            # Limit context size
-            if len(self.conversation_context) > 50:
-                self.conversation_context = self.conversation_context[-40:]
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to store conversation: {e}")
+        if not self.store_session_message(self.session_id, message_type, content,
+                                          importance_score, retention_priority):
             return False
+        
+        # Add to current context
+        self.conversation_context.append({
+            'type': message_type,
+            'content': content,
+            'timestamp': datetime.now().isoformat(),
+            'importance': importance_score
+        })
+        
+        # Limit context size
+        if len(self.conversation_context) > 50:
+            self.conversation_context = self.conversation_context[-40:]
+        
+        return True
     
     def get_conversation_context(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recent conversation context"""
@@ -162,51 +452,14 @@ class MITOMemoryManager:
             return []
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT message_type, content, timestamp, importance_score
-                FROM conversation_memory
-                WHERE session_id = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (self.session_id, limit))
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            context = []
-            for row in results:
-                context.append({
-                    'type': row[0],
-                    'content': row[1],
-                    'timestamp': row[2],
-                    'importance': row[3]
-                })
-            
-            return list(reversed(context))  # Return in chronological order
-            
+            return self.get_session_context(self.session_id, limit)
         except Exception as e:
             logger.error(f"Failed to get conversation context: {e}")
             return self.conversation_context
     
     def build_context_prompt(self, user_message: str, limit: int = 10) -> str:
         """Build context prompt for AI providers with conversation history"""
-        context = self.get_conversation_context(limit)
-        
-        if not context:
-            return user_message
-        
-        # Build prompt with recent context
-        prompt_parts = ["Recent conversation context:"]
-        
-        for entry in context[-5:]:  # Last 5 messages for context
-            role = "User" if entry['type'] == 'user' else "MITO"
-            prompt_parts.append(f"{role}: {entry['content'][:200]}...")
-        
-        prompt_parts.append(f"\nCurrent message: {user_message}")
-        return "\n".join(prompt_parts)
+        return self._format_context_prompt(self.get_conversation_context(limit), user_message)
     
     def store_message(self, role: str, content: str, metadata: Dict[str, Any] = None, importance: float = 1.0) -> bool:
         """Store a message in conversation memory"""
@@ -232,22 +485,17 @@ class MITOMemoryManager:
             # Calculate expiry time
             expiry_time = (datetime.now() + timedelta(hours=expiry_hours)).isoformat()
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Update or insert
-            cursor.execute("""
-                INSERT OR REPLACE INTO system_memory 
-                (component, state_key, state_value, last_updated, expiry_time, access_count)
-                VALUES (?, ?, ?, ?, ?, 
-                    COALESCE((SELECT access_count FROM system_memory WHERE component = ? AND state_key = ?), 0))
-            """, (
-                component, state_key, value_str, datetime.now().isoformat(), expiry_time,
-                component, state_key
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                # Update or insert
+                conn.execute("""
+                    INSERT OR REPLACE INTO system_memory 
+                    (component, state_key, state_value, last_updated, expiry_time, access_count)
+                    VALUES (?, ?, ?, ?, ?, 
+                        COALESCE((SELECT access_count FROM system_memory WHERE component = ? AND state_key = ?), 0))
+                """, (
+                    component, state_key, value_str, datetime.now().isoformat(), expiry_time,
+                    component, state_key
+                ))
             
             # Update local cache
             if component not in self.system_state:
@@ -271,54 +519,50 @@ class MITOMemoryManager:
                     return self.system_state[component]
             
             # Query database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if state_key:
-                cursor.execute("""
-                    SELECT state_value FROM system_memory
-                    WHERE component = ? AND state_key = ? AND 
-                          (expiry_time IS NULL OR expiry_time > ?)
-                """, (component, state_key, datetime.now().isoformat()))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 
-                result = cursor.fetchone()
-                if result:
+                if state_key:
+                    cursor.execute("""
+                        SELECT state_value FROM system_memory
+                        WHERE component = ? AND state_key = ? AND 
+                              (expiry_time IS NULL OR expiry_time > ?)
+                    """, (component, state_key, datetime.now().isoformat()))
+                    
+                    result = cursor.fetchone()
+                    if not result:
+                        return None
+                    
                     # Update access count
                     cursor.execute("""
                         UPDATE system_memory SET access_count = access_count + 1
                         WHERE component = ? AND state_key = ?
                     """, (component, state_key))
+                else:
+                    cursor.execute("""
+                        SELECT state_key, state_value FROM system_memory
+                        WHERE component = ? AND (expiry_time IS NULL OR expiry_time > ?)
+                    """, (component, datetime.now().isoformat()))
                     
-                    conn.commit()
-                    conn.close()
-                    
-                    # Try to parse as JSON
-                    try:
-                        return json.loads(result[0])
-                    except:
-                        return result[0]
-                
-                conn.close()
-                return None
-            else:
-                cursor.execute("""
-                    SELECT state_key, state_value FROM system_memory
-                    WHERE component = ? AND (expiry_time IS NULL OR expiry_time > ?)
-                """, (component, datetime.now().isoformat()))
-                
-                results = cursor.fetchall()
-                conn.close()
-                
-                state_dict = {}
-                for row in results:
-                    try:
-                        state_dict[row[0]] = json.loads(row[1])
-                    except:
-                        state_dict[row[0]] = row[1]
-                
-                # Update cache
-                self.system_state[component] = state_dict
-                return state_dict
+                    results = cursor.fetchall()
+            
+            if state_key:
+                # Try to parse as JSON
+                try:
+                    return json.loads(result[0])
+                except:
+                    return result[0]
+            
+            state_dict = {}
+            for row in results:
+                try:
+                    state_dict[row[0]] = json.loads(row[1])
+                except:
+                    state_dict[row[0]] = row[1]
+            
+            # Update cache
+            self.system_state[component] = state_dict
+            return state_dict
                 
         except Exception as e:
             logger.error(f"Failed to get system state: {e}")
@@ -328,23 +572,18 @@ class MITOMemoryManager:
                           context_data: Dict[str, Any], confidence_score: float = 1.0) -> bool:
         """Store user context and preferences"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO user_context
-                (user_identifier, context_type, context_data, confidence_score, last_accessed)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                user_identifier,
-                context_type,
-                json.dumps(context_data),
-                confidence_score,
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO user_context
+                    (user_identifier, context_type, context_data, confidence_score, last_accessed)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    user_identifier,
+                    context_type,
+                    json.dumps(context_data),
+                    confidence_score,
+                    datetime.now().isoformat()
+                ))
             
             return True
             
@@ -355,39 +594,38 @@ class MITOMemoryManager:
     def get_user_context(self, user_identifier: str, context_type: str = None) -> Dict[str, Any]:
         """Get user context and preferences"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if context_type:
-                cursor.execute("""
-                    SELECT context_data, confidence_score FROM user_context
-                    WHERE user_identifier = ? AND context_type = ?
-                    ORDER BY last_accessed DESC LIMIT 1
-                """, (user_identifier, context_type))
-                
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'data': json.loads(result[0]),
-                        'confidence': result[1]
-                    }
-            else:
-                cursor.execute("""
-                    SELECT context_type, context_data, confidence_score FROM user_context
-                    WHERE user_identifier = ?
-                    ORDER BY last_accessed DESC
-                """, (user_identifier,))
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 
-                results = cursor.fetchall()
-                context = {}
-                for row in results:
-                    context[row[0]] = {
-                        'data': json.loads(row[1]),
-                        'confidence': row[2]
-                    }
-                return context
+                if context_type:
+                    cursor.execute("""
+                        SELECT context_data, confidence_score FROM user_context
+                        WHERE user_identifier = ? AND context_type = ?
+                        ORDER BY last_accessed DESC LIMIT 1
+                    """, (user_identifier, context_type))
+                    
+                    result = cursor.fetchone()
+                    if result:
+                        return {
+                            'data': json.loads(result[0]),
+                            'confidence': result[1]
+                        }
+                else:
+                    cursor.execute("""
+                        SELECT context_type, context_data, confidence_score FROM user_context
+                        WHERE user_identifier = ?
+                        ORDER BY last_accessed DESC
+                    """, (user_identifier,))
+                    
+                    results = cursor.fetchall()
+                    context = {}
+                    for row in results:
+                        context[row[0]] = {
+                            'data': json.loads(row[1]),
+                            'confidence': row[2]
+                        }
+                    return context
             
-            conn.close()
             return {}
             
         except Exception as e:
@@ -397,50 +635,37 @@ class MITOMemoryManager:
     def optimize_memory(self) -> Dict[str, Any]:
         """Optimize memory usage by cleaning old data"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Clean expired system state
-            cursor.execute("""
-                DELETE FROM system_memory 
-                WHERE expiry_time IS NOT NULL AND expiry_time < ?
-            """, (datetime.now().isoformat(),))
-            expired_count = cursor.rowcount
+            self.flush()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Clean expired system state
+                cursor.execute("""
+                    DELETE FROM system_memory 
+                    WHERE expiry_time IS NOT NULL AND expiry_time < ?
+                """, (datetime.now().isoformat(),))
+                expired_count = cursor.rowcount
+                
+                # Clean old user context (keep last 30 days)
+                thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
+                cursor.execute("""
+                    DELETE FROM user_context
+                    WHERE last_accessed < ? AND confidence_score < 0.5
+                """, (thirty_days_ago,))
+                cleaned_context = cursor.rowcount
+                
+                # Update metadata
+                cursor.execute("""
+                    INSERT INTO memory_metadata (operation_type, execution_time, memory_usage)
+                    VALUES (?, ?, ?)
+                """, (
+                    'optimization',
+                    time.time(),
+                    self.get_memory_usage()
+                ))
             
             # Clean old low-priority conversations (keep last 1000)
-            cursor.execute("""
-                DELETE FROM conversation_memory
-                WHERE id NOT IN (
-                    SELECT id FROM conversation_memory
-                    ORDER BY 
-                        CASE WHEN retention_priority >= 8 THEN timestamp END DESC,
-                        importance_score DESC,
-                        timestamp DESC
-                    LIMIT 1000
-                )
-            """, )
-            cleaned_conversations = cursor.rowcount
-            
-            # Clean old user context (keep last 30 days)
-            thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-            cursor.execute("""
-                DELETE FROM user_context
-                WHERE last_accessed < ? AND confidence_score < 0.5
-            """, (thirty_days_ago,))
-            cleaned_context = cursor.rowcount
-            
-            # Update metadata
-            cursor.execute("""
-                INSERT INTO memory_metadata (operation_type, execution_time, memory_usage)
-                VALUES (?, ?, ?)
-            """, (
-                'optimization',
-                time.time(),
-                self.get_memory_usage()
-            ))
-            
-            conn.commit()
-            conn.close()
+            cleaned_conversations = self.prune_conversations(max_total=1000)['deleted']
             
             optimization_result = {
                 'expired_states_cleaned': expired_count,
@@ -456,6 +681,68 @@ class MITOMemoryManager:
             logger.error(f"Memory optimization failed: {e}")
             return {'error': str(e)}
     
+    def prune_conversations(self, max_total: Optional[int] = None,
+                            max_per_session: Optional[int] = None,
+                            batch_limit: int = 5000) -> Dict[str, Any]:
+        """Retention engine: delete at most batch_limit conversation rows per call.
+        
+        Per-session caps drop a session's oldest ordinary messages first.
+        The global cap then removes ordinary messages (retention_priority < 8)
+        with the lowest importance, oldest first, and only touches
+        high-priority messages once no ordinary ones remain. Every delete
+        walks an index in order with a LIMIT, and the counts it compares
+        against are maintained by triggers, so cost is bounded by
+        batch_limit rather than table size.
+        """
+        self.flush()
+        deleted = 0
+        
+        with self.pool.connection() as conn:
+            if max_per_session is not None:
+                sessions = conn.execute("""
+                    SELECT session_id, message_count FROM conversation_counts
+                    WHERE message_count > ?
+                """, (max_per_session,)).fetchall()
+                
+                for session_id, count in sessions:
+                    if deleted >= batch_limit:
+                        break
+                    excess = min(count - max_per_session, batch_limit - deleted)
+                    deleted += conn.execute("""
+                        DELETE FROM conversation_memory WHERE id IN (
+                            SELECT id FROM conversation_memory
+                            WHERE session_id = ? AND retention_priority < 8
+                            ORDER BY timestamp ASC LIMIT ?
+                        )
+                    """, (session_id, excess)).rowcount
+            
+            if max_total is not None and deleted < batch_limit:
+                total = conn.execute(
+                    "SELECT message_count FROM conversation_totals WHERE id = 1").fetchone()[0]
+                excess = min(total - max_total, batch_limit - deleted)
+                
+                if excess > 0:
+                    removed = conn.execute("""
+                        DELETE FROM conversation_memory WHERE id IN (
+                            SELECT id FROM conversation_memory
+                            WHERE retention_priority < 8
+                            ORDER BY retention_priority ASC, importance_score ASC, timestamp ASC
+                            LIMIT ?
+                        )
+                    """, (excess,)).rowcount
+                    deleted += removed
+                    excess -= removed
+                
+                if excess > 0:
+                    deleted += conn.execute("""
+                        DELETE FROM conversation_memory WHERE id IN (
+                            SELECT id FROM conversation_memory
+                            ORDER BY timestamp ASC LIMIT ?
+                        )
+                    """, (excess,)).rowcount
+        
+        return {'deleted': deleted, 'batch_limit': batch_limit}
+    
     def get_memory_usage(self) -> int:
         """Get current memory usage in bytes"""
         try:
@@ -468,29 +755,28 @@ class MITOMemoryManager:
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get comprehensive memory statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Conversation stats
-            cursor.execute("SELECT COUNT(*) FROM conversation_memory")
-            conversation_count = cursor.fetchone()[0]
-            
-            # System state stats
-            cursor.execute("SELECT COUNT(*) FROM system_memory")
-            system_state_count = cursor.fetchone()[0]
-            
-            # User context stats
-            cursor.execute("SELECT COUNT(*) FROM user_context")
-            user_context_count = cursor.fetchone()[0]
-            
-            # Recent activity
-            cursor.execute("""
-                SELECT COUNT(*) FROM conversation_memory
-                WHERE timestamp > ?
-            """, ((datetime.now() - timedelta(hours=24)).isoformat(),))
-            recent_conversations = cursor.fetchone()[0]
-            
-            conn.close()
+            self.flush()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Conversation stats
+                cursor.execute("SELECT COUNT(*) FROM conversation_memory")
+                conversation_count = cursor.fetchone()[0]
+                
+                # System state stats
+                cursor.execute("SELECT COUNT(*) FROM system_memory")
+                system_state_count = cursor.fetchone()[0]
+                
+                # User context stats
+                cursor.execute("SELECT COUNT(*) FROM user_context")
+                user_context_count = cursor.fetchone()[0]
+                
+                # Recent activity
+                cursor.execute("""
+                    SELECT COUNT(*) FROM conversation_memory
+                    WHERE timestamp > ?
+                """, ((datetime.now() - timedelta(hours=24)).isoformat(),))
+                recent_conversations = cursor.fetchone()[0]
             
             stats = {
                 'database_size_bytes': self.get_memory_usage(),
@@ -501,7 +787,9 @@ class MITOMemoryManager:
                 'active_session': self.session_id,
                 'cache_size': len(self.memory_cache),
                 'system_state_cache': len(self.system_state),
-                'current_context_length': len(self.conversation_context)
+                'current_context_length': len(self.conversation_context),
+                'pending_rows': len(self._pending_rows),
+                'dropped_rows': self.dropped_rows
             }
             
             return stats
@@ -513,29 +801,7 @@ class MITOMemoryManager:
     def load_session_context(self, session_id: str):
         """Load existing session context"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT message_type, content, timestamp, importance_score
-                FROM conversation_memory
-                WHERE session_id = ?
-                ORDER BY timestamp DESC
-                LIMIT 20
-            """, (session_id,))
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            self.conversation_context = []
-            for row in reversed(results):  # Reverse to get chronological order
-                self.conversation_context.append({
-                    'type': row[0],
-                    'content': row[1],
-                    'timestamp': row[2],
-                    'importance': row[3]
-                })
-            
+            self.conversation_context = self.get_session_context(session_id, 20)
             logger.info(f"Loaded {len(self.conversation_context)} context items for session {session_id}")
             
         except Exception as e:
@@ -548,16 +814,12 @@ class MITOMemoryManager:
             return False
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                DELETE FROM conversation_memory WHERE session_id = ?
-            """, (target_session,))
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
+            self.flush()
+            with self.pool.connection() as conn:
+                cursor = conn.execute("""
+                    DELETE FROM conversation_memory WHERE session_id = ?
+                """, (target_session,))
+                deleted_count = cursor.rowcount
             
             if target_session == self.session_id:
                 self.conversation_context = []
@@ -572,9 +834,7 @@ class MITOMemoryManager:
     def export_memory_data(self, format_type: str = 'json') -> Dict[str, Any]:
         """Export memory data for backup or analysis"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
+            self.flush()
             # Export all tables
             export_data = {
                 'export_timestamp': datetime.now().isoformat(),
@@ -582,22 +842,20 @@ class MITOMemoryManager:
                 'data': {}
             }
             
-            # Conversations
-            cursor.execute("SELECT * FROM conversation_memory ORDER BY timestamp")
-            conversations = cursor.fetchall()
-            export_data['data']['conversations'] = conversations
-            
-            # System states
-            cursor.execute("SELECT * FROM system_memory ORDER BY last_updated")
-            system_states = cursor.fetchall()
-            export_data['data']['system_states'] = system_states
-            
-            # User contexts
-            cursor.execute("SELECT * FROM user_context ORDER BY last_accessed")
-            user_contexts = cursor.fetchall()
-            export_data['data']['user_contexts'] = user_contexts
-            
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Conversations
+                cursor.execute("SELECT * FROM conversation_memory ORDER BY timestamp")
+                export_data['data']['conversations'] = cursor.fetchall()
+                
+                # System states
+                cursor.execute("SELECT * FROM system_memory ORDER BY last_updated")
+                export_data['data']['system_states'] = cursor.fetchall()
+                
+                # User contexts
+                cursor.execute("SELECT * FROM user_context ORDER BY last_accessed")
+                export_data['data']['user_contexts'] = cursor.fetchall()
             
             return export_data
             
@@ -608,12 +866,15 @@ class MITOMemoryManager:
 
 # Global memory manager instance
 _memory_manager = None
+_memory_manager_lock = threading.Lock()
 
 def get_memory_manager() -> MITOMemoryManager:
-    """Get or create global memory manager instance"""
+    """Get or create the process-wide memory manager instance"""
     global _memory_manager
     if _memory_manager is None:
-        _memory_manager = MITOMemoryManager()
+        with _memory_manager_lock:
+            if _memory_manager is None:
+                _memory_manager = MITOMemoryManager()
     return _memory_manager
 
 def store_conversation_memory(message_type: str, content: str, importance: float = 1.0) -> bool:
@@ -45,6 +45,9 @@ class MITOAgent:
         self.execution_history = []
         self.startup_tasks_completed = False
         self.last_health_check = None
+        self._status_listeners = []
+        self._published_status: Dict[str, Any] = {}
+        self._status_lock = threading.Lock()
         
         # Agent capabilities
         self.capabilities = {
@@ -223,10 +226,38 @@ class MITOAgent:
         
         logger.info("MITO Agent initialized with full autonomy")
     
+    def add_status_listener(self, callback):
+        """Call `callback(delta)` with the changed fields of each new status report"""
+        self._status_listeners.append(callback)
+    
+    def _publish_status(self):
+        """Send listeners the status fields that changed since the last publish"""
+        if not self._status_listeners:
+            return
+        # Report, diff and publish as one step so concurrent callers can
+        # never deliver an older report's delta after a newer one
+        with self._status_lock:
+            try:
+                status = self.get_status_report()
+            except Exception as e:
+                logger.debug(f"Status report failed: {e}")
+                return
+            delta = {key: value for key, value in status.items()
+                     if key not in self._published_status or self._published_status[key] != value}
+            self._published_status = status
+            if not delta:
+                return
+            for listener in self._status_listeners:
+                try:
+                    listener(delta)
+                except Exception as e:
+                    logger.error(f"Status listener failed: {e}")
+    
     def set_autonomy_level(self, level: str):
         """Set agent autonomy level: limited, standard, full"""
         self.autonomy_level = level
         logger.info(f"MITO autonomy level set to: {level}")
+        self._publish_status()
     
     def add_task(self, task_name: str, task_function: Callable, params: Dict = None, priority: str = "medium"):
         """Add task to agent's queue"""
@@ -259,6 +290,7 @@ class MITOAgent:
             self.notification_manager.notify_task_start(task_name)
         
         logger.info(f"Task added to MITO queue: {task_name} (Priority: {priority})")
+        self._publish_status()
     
     def execute_next_task(self):
         """Execute the next task in queue"""
@@ -275,6 +307,7 @@ class MITOAgent:
         self.current_task = task
         self.status = AgentStatus.WORKING
         self.last_executed_task = task['name']
+        self._publish_status()
         
         start_time = time.time()
         
@@ -295,6 +328,7 @@ class MITOAgent:
             
             self.status = AgentStatus.IDLE
             self.current_task = None
+            self._publish_status()
             
             logger.info(f"Task completed: {task['name']} in {duration:.2f}s")
             return True
@@ -333,6 +367,7 @@ class MITOAgent:
             
             self.status = AgentStatus.IDLE
             self.current_task = None
+            self._publish_status()
             return False
     
     def should_escalate_error(self, task: Dict, error: str) -> bool:
@@ -893,6 +928,7 @@ class MITOAgent:
         try:
             status = self.get_status_report()
             logger.info(f"MITO Status: {status['agent_status']} | Queue: {status['queue_length']} | Threads: {status['active_threads']}")
+            self._publish_status()
             
             if self.notification_manager:
                 try:
@@ -1126,7 +1162,7 @@ class MITOAgent:
             "current_task": self.current_task["name"] if self.current_task else None,
             "queue_length": len(self.task_queue),
             "capabilities": list(self.capabilities.keys()),
-            "last_health_check": getattr(self, 'last_health_check', datetime.now()).isoformat() if hasattr(self, 'last_health_check') else None,
+            "last_health_check": self.last_health_check.isoformat() if self.last_health_check else None,
             "active_threads": len(self.active_threads),
             "decision_params": self.decision_params,
             "execution_history_count": len(self.execution_history),
@@ -9,6 +9,11 @@ Description: AI Agent & Tool Creator
 
 import logging
 import time
+import atexit
+import sqlite3
+import itertools
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import json
@@ -18,6 +23,14 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+INSERT_NOTIFICATION_SQL = """
+    INSERT OR REPLACE INTO notifications
+    (seq, id, type, title, message, timestamp, priority, read, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+NOTIFICATION_COLUMNS = "seq, id, type, title, message, timestamp, priority, read, data"
+
 class NotificationType(Enum):
     API_USAGE_WARNING = "api_usage_warning"
     API_SWITCH_SUGGESTION = "api_switch_suggestion"
@@ -40,13 +53,55 @@ class Notification:
     priority: str = "medium"  # low, medium, high, urgent
     read: bool = False
     data: Optional[Dict] = None
+    seq: int = 0  # Store-wide sequence number, used as the paging cursor
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "seq": self.seq,
+            "type": self.type.value,
+            "title": self.title,
+            "message": self.message,
+            "timestamp": self.timestamp.isoformat(),
+            "priority": self.priority,
+            "read": self.read,
+            "data": self.data
+        }
+    
+    @classmethod
+    def from_row(cls, row) -> "Notification":
+        seq, notification_id, type_value, title, message, timestamp, priority, read, data = row
+        return cls(
+            id=notification_id,
+            type=NotificationType(type_value),
+            title=title,
+            message=message,
+            timestamp=datetime.fromisoformat(timestamp),
+            priority=priority,
+            read=bool(read),
+            data=json.loads(data) if data else {},
+            seq=seq
+        )
 
 class NotificationManager:
-    """Manages all MITO notifications and alerts"""
+    """Manages all MITO notifications and alerts
+    
+    The most recent `capacity` notifications are kept in an in-memory
+    ring buffer with an index of the unread ones. Every notification is
+    persisted to SQLite by a background writer that batches inserts and
+    read-marks every `flush_interval` seconds. Older notifications stay
+    reachable through get_notifications_page, which pages by sequence
+    number from memory first and then from the database. A legacy
+    mito_notifications.json is imported once into an empty store.
+    """
     
-    def __init__(self):
-        self.notifications: List[Notification] = []
+    def __init__(self, db_path: str = "mito_notifications.db", capacity: int = None,
+                 flush_interval: float = None):
+        self.db_path = db_path
         self.notification_file = "mito_notifications.json"
+        self.capacity = capacity or int(os.getenv("MITO_NOTIFICATION_BUFFER", "1000"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("MITO_NOTIFICATION_FLUSH_SECONDS", "1"))
         self.user_preferences = {
             "api_usage_threshold": 80,  # Notify at 80% usage
             "cost_threshold": 10.0,     # Notify at $10 spend
@@ -54,7 +109,62 @@ class NotificationManager:
             "task_notifications": True,
             "function_notifications": False  # Can be noisy
         }
+        self._buffer: "OrderedDict[str, Notification]" = OrderedDict()
+        self._unread: "OrderedDict[str, Notification]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending_inserts: List[Notification] = []
+        self._pending_reads: List[tuple] = []  # (id, already counted in _stored_unread)
+        self._last_seq = 0
+        self._stored_total = 0  # Rows in the database, including pending inserts
+        self._stored_unread = 0
+        self._listeners = []
+        
+        self.init_database()
         self.load_notifications()
+        
+        self._flush_event = threading.Event()
+        self._writer_thread = threading.Thread(target=self._flush_loop, daemon=True,
+                                               name="notification-writer")
+        self._writer_thread.start()
+        atexit.register(self._flush_at_exit)
+    
+    def init_database(self):
+        """Create the notification tables"""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notifications (
+                    seq INTEGER PRIMARY KEY,
+                    id TEXT UNIQUE NOT NULL,
+                    type TEXT NOT NULL,
+                    title TEXT,
+                    message TEXT,
+                    timestamp TEXT NOT NULL,
+                    priority TEXT,
+                    read BOOLEAN DEFAULT 0,
+                    data TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications (read, seq)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_notifications_timestamp ON notifications (timestamp)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notification_preferences (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+        conn.close()
+    
+    @property
+    def notifications(self) -> List[Notification]:
+        """Buffered notifications, oldest first"""
+        with self._lock:
+            return list(self._buffer.values())
+    
+    def add_listener(self, callback):
+        """Call `callback(notification)` for every new notification"""
+        self._listeners.append(callback)
     
     def create_notification(self, 
                           notification_type: NotificationType,
@@ -63,20 +173,37 @@ class NotificationManager:
                           priority: str = "medium",
                           data: Optional[Dict] = None) -> str:
         """Create a new notification"""
-        notification_id = f"notif_{int(time.time())}_{len(self.notifications)}"
+        if not isinstance(notification_type, NotificationType):
+            # Some callers pass the enum value, e.g. "system_alert"
+            notification_type = NotificationType(notification_type)
         
-        notification = Notification(
-            id=notification_id,
-            type=notification_type,
-            title=title,
-            message=message,
-            timestamp=datetime.now(),
-            priority=priority,
-            data=data or {}
-        )
+        with self._lock:
+            self._last_seq += 1
+            seq = self._last_seq
+            notification = Notification(
+                id=f"notif_{int(time.time())}_{seq}",
+                type=notification_type,
+                title=title,
+                message=message,
+                timestamp=datetime.now(),
+                priority=priority,
+                data=data or {},
+                seq=seq
+            )
+            self._buffer[notification.id] = notification
+            self._unread[notification.id] = notification
+            self._pending_inserts.append(notification)
+            self._stored_total += 1
+            self._stored_unread += 1
+            while len(self._buffer) > self.capacity:
+                _, evicted = self._buffer.popitem(last=False)
+                self._unread.pop(evicted.id, None)
         
-        self.notifications.append(notification)
-        self.save_notifications()
+        for listener in self._listeners:
+            try:
+                listener(notification)
+            except Exception as e:
+                logger.error(f"Notification listener failed: {e}")
         
         # Log high priority notifications
         if priority in ["high", "urgent"]:
@@ -84,13 +211,7 @@ class NotificationManager:
         else:
             logger.info(f"NOTIFICATION: {title}")
         
-        return notification_id
-    
-    def get_recent_notifications(self, limit: int = 50) -> List[Notification]:
-        """Get recent notifications, limited by count"""
-        # Sort by timestamp descending and return limited results
-        sorted_notifications = sorted(self.notifications, key=lambda x: x.timestamp, reverse=True)
-        return sorted_notifications[:limit]
+        return notification.id
     
     def notify_api_usage(self, provider: str, usage_percent: float, requests_made: int, limit: int):
         """Notify about API usage levels"""
@@ -290,14 +411,73 @@ class NotificationManager:
                 }
             )
     
-    def get_unread_notifications(self) -> List[Notification]:
-        """Get all unread notifications"""
-        return [n for n in self.notifications if not n.read]
+    def get_unread_notifications(self, limit: int = None) -> List[Notification]:
+        """Get buffered unread notifications, oldest first"""
+        with self._lock:
+            unread = list(self._unread.values())
+        return unread[-limit:] if limit else unread
     
-    def get_recent_notifications(self, hours: int = 24) -> List[Notification]:
-        """Get notifications from the last N hours"""
+    def get_unread_count(self) -> int:
+        """Unread notifications in the store, including ones no longer buffered"""
+        with self._lock:
+            return self._stored_unread
+    
+    def get_recent_notifications(self, hours: int = 24, limit: int = None) -> List[Notification]:
+        """Get buffered notifications from the last N hours, oldest first"""
         cutoff_time = datetime.now() - timedelta(hours=hours)
-        return [n for n in self.notifications if n.timestamp >= cutoff_time]
+        recent = []
+        with self._lock:
+            for notification in reversed(self._buffer.values()):
+                if notification.timestamp < cutoff_time or (limit and len(recent) >= limit):
+                    break
+                recent.append(notification)
+        recent.reverse()
+        return recent
+    
+    def get_notifications_page(self, cursor: int = None, limit: int = 50,
+                               unread_only: bool = False) -> Dict[str, Any]:
+        """Page through notifications newest first.
+        
+        `cursor` is the `next_cursor` of the previous page (a sequence
+        number); pages start in the ring buffer and continue from the
+        database once they run past it.
+        """
+        limit = max(1, min(int(limit), 500))
+        page: List[Notification] = []
+        with self._lock:
+            source = self._unread if unread_only else self._buffer
+            oldest_buffered = next(iter(self._buffer.values())).seq if self._buffer else self._last_seq + 1
+            for notification in reversed(source.values()):
+                if cursor is not None and notification.seq >= cursor:
+                    continue
+                page.append(notification)
+                if len(page) > limit:
+                    break
+        
+        if len(page) <= limit:
+            # Continue below the ring buffer from the database
+            before = oldest_buffered if cursor is None else min(cursor, oldest_buffered)
+            self.flush()
+            page.extend(self._load_page(before, limit + 1 - len(page), unread_only))
+        
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            "notifications": page,
+            "next_cursor": page[-1].seq if has_more and page else None
+        }
+    
+    def _load_page(self, before: int, limit: int, unread_only: bool) -> List[Notification]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(f"""
+                SELECT {NOTIFICATION_COLUMNS} FROM notifications
+                WHERE seq < ? {"AND read = 0" if unread_only else ""}
+                ORDER BY seq DESC LIMIT ?
+            """, (before, limit)).fetchall()
+        finally:
+            conn.close()
+        return [Notification.from_row(row) for row in rows]
     
     def add_notification(self, title: str, message: str, notification_type: str = "info"):
         """Add notification with simple interface for compatibility"""
@@ -315,82 +495,170 @@ class NotificationManager:
     
     def mark_as_read(self, notification_id: str):
         """Mark a notification as read"""
-        for notification in self.notifications:
-            if notification.id == notification_id:
+        with self._lock:
+            notification = self._unread.pop(notification_id, None)
+            if notification is not None:
                 notification.read = True
-                self.save_notifications()
-                break
+                self._stored_unread -= 1
+            elif notification_id in self._buffer:
+                return
+            self._pending_reads.append((notification_id, notification is not None))
     
     def clear_old_notifications(self, days: int = 30):
         """Clear notifications older than N days"""
         cutoff_time = datetime.now() - timedelta(days=days)
-        self.notifications = [n for n in self.notifications if n.timestamp >= cutoff_time]
-        self.save_notifications()
+        with self._lock:
+            while self._buffer:
+                notification = next(iter(self._buffer.values()))
+                if notification.timestamp >= cutoff_time:
+                    break
+                self._buffer.popitem(last=False)
+                self._unread.pop(notification.id, None)
+        
+        self.flush()
+        with self._flush_lock:
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                conn.execute("DELETE FROM notifications WHERE timestamp < ?", (cutoff_time.isoformat(),))
+            conn.close()
+        self._refresh_counts()
     
     def update_preferences(self, preferences: Dict[str, Any]):
         """Update notification preferences"""
         self.user_preferences.update(preferences)
-        self.save_notifications()
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO notification_preferences (key, value) VALUES (?, ?)",
+                             [(key, json.dumps(value)) for key, value in self.user_preferences.items()])
+        conn.close()
     
     def save_notifications(self):
-        """Save notifications to file"""
-        try:
-            data = {
-                "notifications": [
-                    {
-                        "id": n.id,
-                        "type": n.type.value,
-                        "title": n.title,
-                        "message": n.message,
-                        "timestamp": n.timestamp.isoformat(),
-                        "priority": n.priority,
-                        "read": n.read,
-                        "data": n.data
-                    }
-                    for n in self.notifications
-                ],
-                "preferences": self.user_preferences
-            }
+        """Write pending notifications now"""
+        self.flush()
+    
+    def flush(self) -> int:
+        """Write pending inserts and read-marks in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                inserts, self._pending_inserts = self._pending_inserts, []
+                reads, self._pending_reads = self._pending_reads, []
+                # Pending inserts carry their current read flag
+                insert_rows = [
+                    (n.seq, n.id, n.type.value, n.title, n.message, n.timestamp.isoformat(),
+                     n.priority, n.read, json.dumps(n.data) if n.data else None)
+                    for n in inserts
+                ]
+            if not insert_rows and not reads:
+                return 0
             
-            with open(self.notification_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
-            logger.error(f"Failed to save notifications: {e}")
+            try:
+                conn = sqlite3.connect(self.db_path)
+                with conn:
+                    conn.executemany(INSERT_NOTIFICATION_SQL, insert_rows)
+                    conn.executemany("UPDATE notifications SET read = 1 WHERE id = ?",
+                                     [(notification_id,) for notification_id, counted in reads if counted])
+                    # Notifications no longer buffered are counted as the database reports them
+                    uncounted = conn.executemany("UPDATE notifications SET read = 1 WHERE id = ? AND read = 0",
+                                                 [(notification_id,) for notification_id, counted in reads
+                                                  if not counted]).rowcount
+                conn.close()
+            except Exception as e:
+                logger.error(f"Failed to save notifications: {e}")
+                with self._lock:
+                    self._pending_inserts[:0] = inserts
+                    self._pending_reads[:0] = reads
+                return 0
+            if uncounted > 0:
+                with self._lock:
+                    self._stored_unread -= uncounted
+            return len(insert_rows) + len(reads)
+    
+    def _flush_loop(self):
+        while not self._flush_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Notification writer error: {e}")
+    
+    def _flush_at_exit(self):
+        self._flush_event.set()
+        self.flush()
+    
+    def close(self):
+        """Stop the background writer after a final flush"""
+        self._flush_event.set()
+        self._writer_thread.join(timeout=5)
+        self.flush()
+    
+    def _refresh_counts(self):
+        conn = sqlite3.connect(self.db_path)
+        total, unread = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(read = 0), 0) FROM notifications").fetchone()
+        conn.close()
+        with self._lock:
+            self._stored_total = total + len(self._pending_inserts)
+            self._stored_unread = unread + sum(1 for n in self._pending_inserts if not n.read)
     
     def load_notifications(self):
-        """Load notifications from file"""
+        """Load preferences and the most recent notifications from the store"""
         try:
-            if os.path.exists(self.notification_file):
-                with open(self.notification_file, 'r') as f:
-                    data = json.load(f)
-                
-                self.user_preferences.update(data.get("preferences", {}))
-                
-                for n_data in data.get("notifications", []):
-                    notification = Notification(
-                        id=n_data["id"],
-                        type=NotificationType(n_data["type"]),
-                        title=n_data["title"],
-                        message=n_data["message"],
-                        timestamp=datetime.fromisoformat(n_data["timestamp"]),
-                        priority=n_data["priority"],
-                        read=n_data["read"],
-                        data=n_data.get("data", {})
-                    )
-                    self.notifications.append(notification)
+            conn = sqlite3.connect(self.db_path)
+            for key, value in conn.execute("SELECT key, value FROM notification_preferences"):
+                self.user_preferences[key] = json.loads(value)
+            empty = conn.execute("SELECT 1 FROM notifications LIMIT 1").fetchone() is None
+            conn.close()
+            
+            if empty and os.path.exists(self.notification_file):
+                self._import_legacy_file()
+            
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute(f"""
+                SELECT {NOTIFICATION_COLUMNS} FROM notifications
+                ORDER BY seq DESC LIMIT ?
+            """, (self.capacity,)).fetchall()
+            self._last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM notifications").fetchone()[0]
+            conn.close()
+            
+            for row in reversed(rows):
+                notification = Notification.from_row(row)
+                self._buffer[notification.id] = notification
+                if not notification.read:
+                    self._unread[notification.id] = notification
+            self._refresh_counts()
                     
         except Exception as e:
             logger.error(f"Failed to load notifications: {e}")
     
+    def _import_legacy_file(self):
+        """One-time import of the old mito_notifications.json store"""
+        with open(self.notification_file, 'r') as f:
+            data = json.load(f)
+        
+        rows = []
+        for seq, n_data in enumerate(data.get("notifications", []), start=1):
+            rows.append((seq, n_data["id"], n_data["type"], n_data["title"], n_data["message"],
+                         n_data["timestamp"], n_data["priority"], n_data["read"],
+                         json.dumps(n_data.get("data")) if n_data.get("data") else None))
+        
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(INSERT_NOTIFICATION_SQL, rows)
+        conn.close()
+        if data.get("preferences"):
+            self.update_preferences(data["preferences"])
+        logger.info(f"Imported {len(rows)} notifications from {self.notification_file}")
+    
     def get_notification_summary(self) -> Dict[str, Any]:
         """Get summary of current notifications"""
         unread = self.get_unread_notifications()
         recent = self.get_recent_notifications()
+        with self._lock:
+            latest = list(itertools.islice(reversed(self._buffer.values()), 5))
+            total, unread_total = self._stored_total, self._stored_unread
         
         return {
-            "total_notifications": len(self.notifications),
-            "unread_count": len(unread),
+            "total_notifications": total,
+            "unread_count": unread_total,
             "recent_count": len(recent),
             "high_priority_unread": len([n for n in unread if n.priority in ["high", "urgent"]]),
             "latest_notifications": [
@@ -401,6 +669,6 @@ class NotificationManager:
                     "timestamp": n.timestamp.isoformat(),
                     "read": n.read
                 }
-                for n in sorted(self.notifications, key=lambda x: x.timestamp, reverse=True)[:5]
+                for n in latest
             ]
         }
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+MITO Engine - AI Agent & Tool Creator
+Name: MITO Engine
+Version: 1.2.0
+Created by: Daniel Guzman
+Contact: guzman.danield@outlook.com
+Description: Per-provider latency, error statistics and circuit breakers for AI routing
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class ProviderStats:
+    """Rolling window of call outcomes per AI provider"""
+
+    def __init__(self, window: int = 100, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._outcomes: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, latency: float, success: bool):
+        """Record one provider call (latency in seconds)"""
+        with self._lock:
+            outcomes = self._outcomes.get(provider)
+            if outcomes is None:
+                outcomes = self._outcomes[provider] = deque(maxlen=self.window)
+            outcomes.append((latency, success))
+
+    def latency_percentile(self, provider: str, fraction: float) -> Optional[float]:
+        """Latency percentile of recent successful calls, or None if too few samples"""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._outcomes.get(provider, ()) if ok)
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(int(round(fraction * (len(latencies) - 1))), len(latencies) - 1)
+        return latencies[index]
+
+    def p95(self, provider: str) -> Optional[float]:
+        return self.latency_percentile(provider, 0.95)
+
+    def error_rate(self, provider: str) -> float:
+        """Fraction of recent calls that failed (0.0 with no history)"""
+        with self._lock:
+            outcomes = list(self._outcomes.get(provider, ()))
+        if not outcomes:
+            return 0.0
+        return sum(1 for _, ok in outcomes if not ok) / len(outcomes)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Summary of recent calls per provider"""
+        with self._lock:
+            providers = list(self._outcomes)
+        report = {}
+        for provider in providers:
+            p50 = self.latency_percentile(provider, 0.50)
+            p95 = self.p95(provider)
+            report[provider] = {
+                'samples': len(self._outcomes[provider]),
+                'error_rate': round(self.error_rate(provider), 3),
+                'p50_latency_ms': round(p50 * 1000, 2) if p50 is not None else None,
+                'p95_latency_ms': round(p95 * 1000, 2) if p95 is not None else None
+            }
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._outcomes.clear()
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker with half-open probing.
+
+    A provider's circuit opens after `failure_threshold` consecutive
+    failures. While open, requests are refused until `reset_timeout`
+    seconds have passed; then up to `half_open_max_calls` probe requests
+    are let through. A successful probe closes the circuit, a failed one
+    re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None,
+                 half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold or int(os.getenv("MITO_BREAKER_FAILURES", "5"))
+        self.reset_timeout = reset_timeout if reset_timeout is not None else float(
+            os.getenv("MITO_BREAKER_RESET_SECONDS", "30"))
+        self.half_open_max_calls = half_open_max_calls
+        self._circuits: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, provider: str) -> Dict[str, Any]:
+        circuit = self._circuits.get(provider)
+        if circuit is None:
+            circuit = self._circuits[provider] = {
+                'state': self.CLOSED,
+                'consecutive_failures': 0,
+                'opened_at': None,
+                'probes_in_flight': 0,
+                'times_opened': 0
+            }
+        return circuit
+
+    def allow_request(self, provider: str) -> bool:
+        """Whether a request may be sent to the provider right now"""
+        with self._lock:
+            circuit = self._circuit(provider)
+            if circuit['state'] == self.CLOSED:
+                return True
+
+            if circuit['state'] == self.OPEN:
+                if time.monotonic() - circuit['opened_at'] < self.reset_timeout:
+                    return False
+                circuit['state'] = self.HALF_OPEN
+                circuit['probes_in_flight'] = 0
+
+            if circuit['probes_in_flight'] >= self.half_open_max_calls:
+                return False
+            circuit['probes_in_flight'] += 1
+            return True
+
+    def record_success(self, provider: str):
+        with self._lock:
+            circuit = self._circuit(provider)
+            circuit['state'] = self.CLOSED
+            circuit['consecutive_failures'] = 0
+            circuit['opened_at'] = None
+            circuit['probes_in_flight'] = 0
+
+    def record_failure(self, provider: str):
+        with self._lock:
+            circuit = self._circuit(provider)
+            circuit['consecutive_failures'] += 1
+            if (circuit['state'] == self.HALF_OPEN or
+                    circuit['consecutive_failures'] >= self.failure_threshold):
+                if circuit['state'] != self.OPEN:
+                    circuit['times_opened'] += 1
+                circuit['state'] = self.OPEN
+                circuit['opened_at'] = time.monotonic()
+                circuit['probes_in_flight'] = 0
+
+    def release(self, provider: str):
+        """Return an unused half-open probe slot (request was never sent or finished)"""
+        with self._lock:
+            circuit = self._circuit(provider)
+            if circuit['state'] == self.HALF_OPEN and circuit['probes_in_flight'] > 0:
+                circuit['probes_in_flight'] -= 1
+
+    def get_state(self, provider: str) -> Dict[str, Any]:
+        """Current breaker state for a provider"""
+        with self._lock:
+            circuit = dict(self._circuit(provider))
+        retry_in = None
+        if circuit['state'] == self.OPEN:
+            retry_in = max(self.reset_timeout - (time.monotonic() - circuit['opened_at']), 0)
+        return {
+            'state': circuit['state'],
+            'consecutive_failures': circuit['consecutive_failures'],
+            'times_opened': circuit['times_opened'],
+            'retry_in_seconds': round(retry_in, 1) if retry_in is not None else None
+        }
+
+    def reset(self):
+        with self._lock:
+            self._circuits.clear()
+
+
+# Global provider statistics and circuit breaker
+_provider_stats = ProviderStats()
+_circuit_breaker = CircuitBreaker()
+
+
+def get_provider_stats() -> ProviderStats:
+    """Get the global provider statistics"""
+    return _provider_stats
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the global provider circuit breaker"""
+    return _circuit_breaker
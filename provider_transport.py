@@ -0,0 +1,197 @@
+"""
+MITO Engine - AI Agent & Tool Creator
+Name: MITO Engine
+Version: 1.2.0
+Created by: Daniel Guzman
+Contact: guzman.danield@outlook.com
+Description: Pooled keep-alive HTTP transport for AI providers
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Default request timeouts per provider in seconds: (connect, read)
+DEFAULT_TIMEOUTS = {
+    "openai": (5.0, 30.0),
+    "llama": (5.0, 30.0),
+    "claude": (5.0, 30.0),
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back on bad values"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an int from the environment, falling back on bad values"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ProviderTransport:
+    """One pooled keep-alive requests.Session per AI provider"""
+
+    def __init__(self,
+                 pool_size: Optional[int] = None,
+                 timeouts: Optional[Dict[str, tuple]] = None,
+                 latency_window: int = 200):
+        self.pool_size = pool_size or _env_int("MITO_PROVIDER_POOL_SIZE", 10)
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        for provider, (connect, read) in DEFAULT_TIMEOUTS.items():
+            prefix = f"MITO_{provider.upper()}"
+            self.timeouts[provider] = (
+                _env_float(f"{prefix}_CONNECT_TIMEOUT", connect),
+                _env_float(f"{prefix}_READ_TIMEOUT", read))
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        self.latency_window = latency_window
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _new_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": 0,
+            "errors": 0,
+            "latencies": deque(maxlen=self.latency_window)
+        }
+
+    def get_session(self, provider: str) -> requests.Session:
+        """Get (or lazily create) the pooled session for a provider"""
+        session = self._sessions.get(provider)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=self.pool_size,
+                                      max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Connection": "keep-alive"})
+                self._sessions[provider] = session
+                self._stats.setdefault(provider, self._new_stats())
+        return session
+
+    def get_timeout(self, provider: str) -> tuple:
+        """Get the (connect, read) timeout for a provider"""
+        return self.timeouts.get(provider, (5.0, 30.0))
+
+    def post(self, provider: str, url: str, **kwargs) -> requests.Response:
+        """POST through the provider's pooled session, recording latency"""
+        session = self.get_session(provider)
+        kwargs.setdefault("timeout", self.get_timeout(provider))
+        with self._lock:
+            stats = self._stats.setdefault(provider, self._new_stats())
+
+        start_time = time.perf_counter()
+        try:
+            response = session.post(url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                stats["requests"] += 1
+                stats["errors"] += 1
+            raise
+
+        with self._lock:
+            stats["requests"] += 1
+            stats["latencies"].append(time.perf_counter() - start_time)
+        return response
+
+    def _pool_counters(self, session: requests.Session) -> Dict[str, int]:
+        """Sum urllib3 connection/request counters across a session's pools"""
+        connections = 0
+        pool_requests = 0
+        seen = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += getattr(pool, "num_connections", 0)
+                pool_requests += getattr(pool, "num_requests", 0)
+        return {"connections": connections, "pool_requests": pool_requests}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection reuse and latency statistics per provider"""
+        report = {}
+        with self._lock:
+            snapshot = {
+                provider: (stats["requests"], stats["errors"],
+                           sorted(stats["latencies"]))
+                for provider, stats in self._stats.items()
+            }
+
+        for provider, (total, errors, latencies) in snapshot.items():
+            session = self._sessions.get(provider)
+            if session is None:
+                continue
+            counters = self._pool_counters(session)
+            opened = counters["connections"]
+            reused = max(counters["pool_requests"] - opened, 0)
+            report[provider] = {
+                "requests": total,
+                "errors": errors,
+                "connections_opened": opened,
+                "connections_reused": reused,
+                "reuse_ratio": round(reused / max(counters["pool_requests"], 1), 3),
+                "p50_latency_ms": _percentile_ms(latencies, 0.50),
+                "p95_latency_ms": _percentile_ms(latencies, 0.95),
+                "pool_size": self.pool_size,
+                "timeout": self.get_timeout(provider)
+            }
+        return report
+
+    def close(self):
+        """Close all pooled sessions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._stats.clear()
+
+
+def _percentile_ms(sorted_values, fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a sorted list of seconds, in milliseconds"""
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[index] * 1000, 2)
+
+
+# Global transport instance
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> ProviderTransport:
+    """Get or create the global provider transport"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = ProviderTransport()
+    return _transport
@@ -0,0 +1,209 @@
+"""
+MITO Engine - AI Agent & Tool Creator
+Name: MITO Engine
+Version: 1.2.0
+Created by: Daniel Guzman
+Contact: guzman.danield@outlook.com
+Description: Response cache for AI generation
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, Optional, Set
+
+from simple_memory_system import extract_keywords
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    text = re.sub(r'\s+', ' ', (text or '').lower()).strip()
+    return text.rstrip('.!?;: ')
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of AI responses with TTL.
+
+    Entries are keyed on a hash of the normalized prompt, the requested
+    provider and the conversation context. Near-duplicate lookups compare
+    prompt keyword sets (Jaccard similarity) within the same provider and
+    context, using an inverted keyword index so only candidates sharing a
+    keyword are scored.
+    """
+
+    def __init__(self,
+                 max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 near_duplicates: Optional[bool] = None,
+                 similarity_threshold: float = 0.9,
+                 usage_tracker=None):
+        self.max_entries = max_entries or int(os.getenv("MITO_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("MITO_CACHE_TTL_SECONDS", "3600"))
+        if near_duplicates is None:
+            near_duplicates = os.getenv("MITO_CACHE_NEAR_DUPLICATES", "false").lower() == "true"
+        self.near_duplicates = near_duplicates
+        self.similarity_threshold = similarity_threshold
+        self.usage_tracker = usage_tracker
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._keyword_index: Dict[tuple, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'near_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    @staticmethod
+    def _context_hash(context: str) -> str:
+        return hashlib.sha256(normalize_prompt(context).encode()).hexdigest()[:16] if context else ''
+
+    def make_key(self, prompt: str, provider: str, context: str = '') -> str:
+        """Exact-match key for a prompt, provider and context"""
+        raw = f"{provider}\x00{self._context_hash(context)}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, prompt: str, provider: str, context: str = '') -> Optional[Dict[str, Any]]:
+        """Look up a cached response; returns the entry or None"""
+        key = self.make_key(prompt, provider, context)
+        match_type = 'exact'
+
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None and self.near_duplicates:
+                entry = self._near_duplicate(prompt, provider, context)
+                match_type = 'near_duplicate'
+
+            if entry is None:
+                self.stats['misses'] += 1
+            else:
+                self._entries.move_to_end(entry['key'])
+                self.stats['hits' if match_type == 'exact' else 'near_hits'] += 1
+
+        if self.usage_tracker:
+            if entry is None:
+                self.usage_tracker.log_cache_event(provider, False, prompt)
+            else:
+                # Savings are priced with the provider and model that produced the response
+                self.usage_tracker.log_cache_event(entry['provider'], True, prompt, entry['response'],
+                                                   match_type, entry['model'])
+        if entry is None:
+            return None
+        return dict(entry, match_type=match_type)
+
+    def put(self, prompt: str, provider: str, response: str, context: str = '',
+            served_by: Optional[str] = None, model: Optional[str] = None):
+        """Store a successful response, with the provider and model that served it"""
+        key = self.make_key(prompt, provider, context)
+        namespace = (provider, self._context_hash(context))
+        keywords = set(extract_keywords(prompt))
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                'key': key,
+                'response': response,
+                'provider': served_by or provider,
+                'model': model,
+                'namespace': namespace,
+                'keywords': keywords,
+                'stored_at': time.monotonic()
+            }
+            for keyword in keywords:
+                self._keyword_index[namespace][keyword].add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats['evictions'] += 1
+
+    def _live_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['stored_at'] > self.ttl_seconds:
+            self._remove(key)
+            self.stats['expired'] += 1
+            return None
+        return entry
+
+    def _near_duplicate(self, prompt: str, provider: str, context: str) -> Optional[Dict[str, Any]]:
+        keywords = set(extract_keywords(prompt))
+        if not keywords:
+            return None
+        index = self._keyword_index.get((provider, self._context_hash(context)))
+        if not index:
+            return None
+
+        candidates = set()
+        for keyword in keywords:
+            candidates |= index.get(keyword, set())
+
+        best_entry, best_score = None, 0.0
+        for key in candidates:
+            entry = self._live_entry(key)
+            if entry is None:
+                continue
+            score = len(keywords & entry['keywords']) / len(keywords | entry['keywords'])
+            if score > best_score:
+                best_entry, best_score = entry, score
+
+        if best_score >= self.similarity_threshold:
+            return best_entry
+        return None
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        index = self._keyword_index.get(entry['namespace'])
+        if index is None:
+            return
+        for keyword in entry['keywords']:
+            postings = index.get(keyword)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del index[keyword]
+        if not index:
+            del self._keyword_index[entry['namespace']]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keyword_index.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['near_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['near_hits']) / max(lookups, 1), 4)
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+
+# Global response cache instance
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global response cache"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                tracker = None
+                try:
+                    from api_usage import APIUsageTracker
+                    tracker = APIUsageTracker()
+                except Exception as e:
+                    logger.warning(f"Usage tracking unavailable for response cache: {e}")
+                _response_cache = ResponseCache(usage_tracker=tracker)
+    return _response_cache
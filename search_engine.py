@@ -1,10 +1,10 @@
 # Import necessary libraries
 from flask import Flask, request, jsonify
 import numpy as np
+from scipy import sparse
 import logging
 import re
 from collections import defaultdict
-import math
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO)
@@ -15,14 +15,19 @@ class SearchEngine:
     """
     A class used to create a search engine using TF-IDF similarity.
 
+    Documents are indexed incrementally: each batch only updates document
+    frequencies and appends its term-frequency rows to a sparse CSR matrix.
+    IDF weights are recomputed lazily at query time, so a search is a single
+    sparse matrix-vector product followed by an argpartition top-k.
+
     Attributes:
     ----------
     documents : list
         List of stored documents.
-    document_vectors : dict
-        TF-IDF vectors for each document.
     vocabulary : dict
-        Vocabulary mapping words to indices.
+        Vocabulary mapping words to column indices.
+    doc_freq : dict
+        Number of documents containing each word.
 
     Methods:
     -------
@@ -34,12 +39,17 @@ class SearchEngine:
         """
         Initializes the search engine.
 
-        Creates storage for documents and TF-IDF vectors.
+        Creates storage for documents, document frequencies and the sparse
+        term-frequency matrix.
         """
         self.documents = []
-        self.document_vectors = {}
         self.vocabulary = {}
-        self.idf = {}
+        self.doc_freq = defaultdict(int)
+        self._tf_blocks = []
+        self._tf_matrix = None
+        self._tf_squared = None
+        self._idf = None
+        self._doc_norms = None
         
     def _tokenize(self, text):
         """Tokenize text into words."""
@@ -56,51 +66,45 @@ class SearchEngine:
             tf[token] = tf[token] / doc_length
         return tf
     
-    def _compute_idf(self):
-        """Compute inverse document frequency for all terms."""
-        num_docs = len(self.documents)
-        doc_freq = defaultdict(int)
-        
-        for doc in self.documents:
-            tokens = set(self._tokenize(doc))
-            for token in tokens:
-                doc_freq[token] += 1
-        
-        for token, freq in doc_freq.items():
-            self.idf[token] = math.log(num_docs / freq)
+    def _tf_rows(self, documents):
+        """Build a CSR block of term frequencies, growing the vocabulary."""
+        indptr = [0]
+        indices = []
+        data = []
+        for doc in documents:
+            tf = self._compute_tf(self._tokenize(doc))
+            for token, value in tf.items():
+                column = self.vocabulary.get(token)
+                if column is None:
+                    column = self.vocabulary[token] = len(self.vocabulary)
+                self.doc_freq[token] += 1
+                indices.append(column)
+                data.append(value)
+            indptr.append(len(indices))
+        return indptr, indices, data
     
-    def _vectorize_document(self, doc_index):
-        """Create TF-IDF vector for a document."""
-        doc = self.documents[doc_index]
-        tokens = self._tokenize(doc)
-        tf = self._compute_tf(tokens)
-        
-        vector = {}
-        for token in tf:
-            if token in self.idf:
-                vector[token] = tf[token] * self.idf[token]
-        
-        return vector
-    
-    def _cosine_similarity(self, vec1, vec2):
-        """Compute cosine similarity between two vectors."""
-        # Get intersection of keys
-        common_keys = set(vec1.keys()) & set(vec2.keys())
-        
-        if not common_keys:
-            return 0.0
-        
-        # Compute dot product
-        dot_product = sum(vec1[key] * vec2[key] for key in common_keys)
-        
-        # Compute magnitudes
-        mag1 = math.sqrt(sum(val**2 for val in vec1.values()))
-        mag2 = math.sqrt(sum(val**2 for val in vec2.values()))
-        
-        if mag1 == 0 or mag2 == 0:
-            return 0.0
-        
-        return dot_product / (mag1 * mag2)
+    def _ensure_weights(self):
+        """Stack pending rows and reweight IDF if documents were added."""
+        if self._idf is not None:
+            return
+        num_terms = len(self.vocabulary)
+        blocks = []
+        if self._tf_matrix is not None:
+            previous = self._tf_matrix
+            previous.resize((previous.shape[0], num_terms))
+            blocks.append(previous)
+        for indptr, indices, data in self._tf_blocks:
+            blocks.append(sparse.csr_matrix((data, indices, indptr),
+                                            shape=(len(indptr) - 1, num_terms)))
+        self._tf_matrix = sparse.vstack(blocks, format='csr') if len(blocks) > 1 else blocks[0]
+        self._tf_squared = self._tf_matrix.multiply(self._tf_matrix).tocsr()
+        self._tf_blocks = []
+        
+        doc_freq = np.zeros(num_terms)
+        for token, column in self.vocabulary.items():
+            doc_freq[column] = self.doc_freq[token]
+        self._idf = np.log(len(self.documents) / doc_freq)
+        self._doc_norms = np.sqrt(self._tf_squared @ (self._idf ** 2))
 
     def add_documents(self, documents):
         """
@@ -111,15 +115,12 @@ class SearchEngine:
         documents : list
             A list of strings representing the documents to be added.
         """
-        start_index = len(self.documents)
+        if not documents:
+            return
+        self._tf_blocks.append(self._tf_rows(documents))
         self.documents.extend(documents)
-        
-        # Recompute IDF for all documents
-        self._compute_idf()
-        
-        # Vectorize all documents (including previously added ones)
-        for i in range(len(self.documents)):
-            self.document_vectors[i] = self._vectorize_document(i)
+        # IDF and document norms are reweighted lazily on the next search
+        self._idf = None
         
         logger.info(f"Added {len(documents)} documents. Total documents: {len(self.documents)}")
 
@@ -141,30 +142,33 @@ class SearchEngine:
         """
         if not self.documents:
             return np.array([[]]), np.array([[]])
+        self._ensure_weights()
         
         # Vectorize query
-        query_tokens = self._tokenize(query)
-        query_tf = self._compute_tf(query_tokens)
-        query_vector = {}
-        for token in query_tf:
-            if token in self.idf:
-                query_vector[token] = query_tf[token] * self.idf[token]
-        
-        # Compute similarities
-        similarities = []
-        for doc_index in range(len(self.documents)):
-            sim = self._cosine_similarity(query_vector, self.document_vectors[doc_index])
-            similarities.append((sim, doc_index))
-        
-        # Sort by similarity (descending)
-        similarities.sort(reverse=True)
+        query_vector = np.zeros(len(self.vocabulary))
+        for token, value in self._compute_tf(self._tokenize(query)).items():
+            column = self.vocabulary.get(token)
+            if column is not None:
+                query_vector[column] = value * self._idf[column]
+        query_norm = np.linalg.norm(query_vector)
+        
+        # Cosine similarity against every document in one sparse product
+        if query_norm == 0:
+            similarities = np.zeros(len(self.documents))
+        else:
+            dot_products = self._tf_matrix @ (query_vector * self._idf)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                similarities = np.where(self._doc_norms > 0,
+                                        dot_products / (self._doc_norms * query_norm), 0.0)
         
         # Get top k results
-        top_k = similarities[:k]
-        sim_scores = [sim for sim, _ in top_k]
-        indices = [idx for _, idx in top_k]
+        k = max(min(int(k), len(similarities)), 0)
+        if k == 0:
+            return np.array([[]]), np.array([[]])
+        top_k = np.argpartition(-similarities, k - 1)[:k]
+        top_k = top_k[np.argsort(-similarities[top_k], kind='stable')]
         
-        return np.array([sim_scores]), np.array([indices])
+        return np.array([similarities[top_k]]), np.array([top_k])
 
 
 # Create a Flask application
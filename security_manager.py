@@ -20,21 +20,67 @@ import sqlite3
 import hashlib
 import time
 import logging
+import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from flask import session, request
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any
+from flask import session, request, has_request_context
 import json
+import atexit
 
 logger = logging.getLogger(__name__)
 
+INSERT_ACCESS_LOG_SQL = """
+    INSERT INTO access_log
+    (secret_name, user_id, action, timestamp, ip_address, success)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# SQLite's default limit on bound parameters is 999
+SECRET_LOOKUP_CHUNK = 500
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in SQLite CURRENT_TIMESTAMP format"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+INSERT_RBAC_LOG_SQL = """
+    INSERT INTO rbac_log
+    (user_id, role, permission, resource, action, granted, timestamp, ip_address, user_agent, context)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 class SecretVault:
-    """Encrypted secrets management system"""
+    """Encrypted secrets management system
+
+    Decrypted values are kept in a lock-guarded cache for `cache_ttl`
+    seconds (0 disables it); store_secret/rotate_secret evict the entry
+    in this process, other processes pick up a rotation within the TTL.
+    Access counters and access_log rows are aggregated in memory and
+    written every `flush_interval` seconds, at exit, and before
+    list_secrets reports them.
+    """
     
-    def __init__(self, vault_path: str = "mito_vault.db"):
+    def __init__(self, vault_path: str = "mito_vault.db", cache_ttl: float = None,
+                 flush_interval: float = None):
         self.vault_path = vault_path
         self.master_key = self._get_or_create_master_key()
         self.cipher = Fernet(self.master_key)
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(
+            os.getenv("MITO_VAULT_CACHE_TTL", "60"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("MITO_VAULT_FLUSH_SECONDS", "10"))
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()
+        self._pending_counts: Dict[str, List[Any]] = {}
+        self._pending_log: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_thread = None
+        self.cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
         self.init_vault_db()
+        atexit.register(self._flush_at_exit)
         
     def _get_or_create_master_key(self) -> bytes:
         """Get or create master encryption key"""
@@ -105,6 +151,7 @@ class SecretVault:
             
             conn.commit()
             conn.close()
+            self.invalidate(name)
             
             self._log_access(name, "store", True)
             return True
@@ -114,41 +161,175 @@ class SecretVault:
             self._log_access(name, "store", False)
             return False
             
-    def get_secret(self, name: str) -> Optional[str]:
-        """Retrieve and decrypt secret"""
+    def rotate_secret(self, name: str, value: str) -> bool:
+        """Replace a secret's value, keeping its description and tags"""
         try:
+            encrypted_value = self.cipher.encrypt(value.encode())
             conn = sqlite3.connect(self.vault_path)
             cursor = conn.cursor()
+            cursor.execute("UPDATE secrets SET encrypted_value = ? WHERE name = ?", (encrypted_value, name))
+            rotated = cursor.rowcount > 0
+            conn.commit()
+            conn.close()
+            self.invalidate(name)
             
-            cursor.execute("SELECT encrypted_value FROM secrets WHERE name = ?", (name,))
-            result = cursor.fetchone()
+            self._log_access(name, "rotate", rotated)
+            return rotated
             
-            if result:
-                # Update access statistics
-                cursor.execute("""
-                    UPDATE secrets 
-                    SET accessed_at = CURRENT_TIMESTAMP, access_count = access_count + 1 
-                    WHERE name = ?
-                """, (name,))
-                conn.commit()
-                
-                decrypted_value = self.cipher.decrypt(result[0]).decode()
-                self._log_access(name, "retrieve", True)
-                conn.close()
-                return decrypted_value
+        except Exception as e:
+            logger.error(f"Failed to rotate secret {name}: {e}")
+            self._log_access(name, "rotate", False)
+            return False
             
-            conn.close()
-            self._log_access(name, "retrieve", False)
-            return None
+    def invalidate(self, name: str = None):
+        """Drop one secret (or all secrets) from the decrypted cache"""
+        with self._cache_lock:
+            if name is None:
+                self.cache_stats['invalidations'] += len(self._cache)
+                self._cache.clear()
+            elif self._cache.pop(name, None) is not None:
+                self.cache_stats['invalidations'] += 1
             
+    def get_secret(self, name: str) -> Optional[str]:
+        """Retrieve and decrypt secret"""
+        return self.get_secrets([name]).get(name)
+        
+    def get_secrets(self, names: List[str]) -> Dict[str, Optional[str]]:
+        """Retrieve and decrypt many secrets; missing ones map to None"""
+        values: Dict[str, Optional[str]] = {}
+        missing = []
+        now = time.monotonic()
+        with self._cache_lock:
+            for name in dict.fromkeys(names):
+                entry = self._cache.get(name)
+                if entry is not None and entry[1] > now:
+                    values[name] = entry[0]
+                    self.cache_stats['hits'] += 1
+                else:
+                    missing.append(name)
+            self.cache_stats['misses'] += len(missing)
+        
+        if missing:
+            try:
+                rows = []
+                conn = sqlite3.connect(self.vault_path)
+                for i in range(0, len(missing), SECRET_LOOKUP_CHUNK):
+                    chunk = missing[i:i + SECRET_LOOKUP_CHUNK]
+                    rows.extend(conn.execute(
+                        f"SELECT name, encrypted_value FROM secrets WHERE name IN ({','.join('?' * len(chunk))})",
+                        chunk).fetchall())
+                conn.close()
+            except Exception as e:
+                logger.error(f"Failed to retrieve secrets {missing}: {e}")
+                rows = []
+            
+            decrypted = {}
+            for name, encrypted_value in rows:
+                try:
+                    decrypted[name] = self.cipher.decrypt(encrypted_value).decode()
+                except Exception as e:
+                    logger.error(f"Failed to retrieve secret {name}: {e}")
+            
+            if self.cache_ttl > 0 and decrypted:
+                expires_at = time.monotonic() + self.cache_ttl
+                with self._cache_lock:
+                    for name, value in decrypted.items():
+                        self._cache[name] = (value, expires_at)
+            for name in missing:
+                values[name] = decrypted.get(name)
+        
+        self._record_access(values)
+        return values
+        
+    def _record_access(self, values: Dict[str, Optional[str]]):
+        """Aggregate access statistics and log rows for the next flush"""
+        user_id, ip_address = self._access_context()
+        timestamp = _utc_timestamp()
+        with self._pending_lock:
+            for name, value in values.items():
+                found = value is not None
+                if found:
+                    counter = self._pending_counts.get(name)
+                    if counter is None:
+                        self._pending_counts[name] = [1, timestamp]
+                    else:
+                        counter[0] += 1
+                        counter[1] = timestamp
+                self._pending_log.append((name, user_id, "retrieve", timestamp, ip_address, found))
+        
+        if self.flush_interval <= 0:
+            self.flush_access_stats()
+        elif self._flush_thread is None:
+            self._start_flush_thread()
+            
+    def _start_flush_thread(self):
+        with self._flush_lock:
+            if self._flush_thread is not None:
+                return
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True,
+                                                  name="vault-access-flush")
+            self._flush_thread.start()
+            
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush_access_stats()
+            except Exception as e:
+                logger.error(f"Failed to flush vault access statistics: {e}")
+                
+    def _flush_at_exit(self):
+        try:
+            self.flush_access_stats()
         except Exception as e:
-            logger.error(f"Failed to retrieve secret {name}: {e}")
-            self._log_access(name, "retrieve", False)
-            return None
+            logger.warning(f"Dropped unflushed vault access statistics at exit: {e}")
+            
+    def flush_access_stats(self) -> int:
+        """Write aggregated access counters and log rows in one transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                counts, self._pending_counts = self._pending_counts, {}
+                log_rows, self._pending_log = self._pending_log, []
+            if not counts and not log_rows:
+                return 0
+            
+            conn = sqlite3.connect(self.vault_path)
+            try:
+                with conn:
+                    conn.executemany("""
+                        UPDATE secrets
+                        SET accessed_at = ?, access_count = access_count + ?
+                        WHERE name = ?
+                    """, [(accessed_at, count, name) for name, (count, accessed_at) in counts.items()])
+                    conn.executemany(INSERT_ACCESS_LOG_SQL, log_rows)
+            except Exception:
+                # Put the batch back so the next flush retries it
+                with self._pending_lock:
+                    for name, (count, accessed_at) in counts.items():
+                        counter = self._pending_counts.setdefault(name, [0, accessed_at])
+                        counter[0] += count
+                    self._pending_log[:0] = log_rows
+                raise
+            finally:
+                conn.close()
+            return len(log_rows)
+            
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Decrypted cache hit rate and pending access records"""
+        with self._cache_lock:
+            stats = dict(self.cache_stats)
+            stats['entries'] = len(self._cache)
+        with self._pending_lock:
+            stats['pending_log_rows'] = len(self._pending_log)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / max(lookups, 1), 4)
+        stats['ttl_seconds'] = self.cache_ttl
+        return stats
             
     def list_secrets(self) -> List[Dict[str, Any]]:
         """List all secrets (without values)"""
         try:
+            self.flush_access_stats()
             conn = sqlite3.connect(self.vault_path)
             cursor = conn.cursor()
             
@@ -175,27 +356,20 @@ class SecretVault:
             logger.error(f"Failed to list secrets: {e}")
             return []
             
+    @staticmethod
+    def _access_context() -> tuple:
+        """(user_id, ip_address) of the current request, or system defaults"""
+        if has_request_context():
+            return session.get('user_id', 'anonymous'), request.remote_addr
+        return 'system', 'localhost'
+            
     def _log_access(self, secret_name: str, action: str, success: bool):
         """Log secret access"""
+        user_id, ip_address = self._access_context()
+        with self._pending_lock:
+            self._pending_log.append((secret_name, user_id, action, _utc_timestamp(), ip_address, success))
         try:
-            conn = sqlite3.connect(self.vault_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO access_log 
-                (secret_name, user_id, action, ip_address, success) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                secret_name,
-                session.get('user_id', 'anonymous') if 'session' in globals() else 'system',
-                action,
-                request.remote_addr if 'request' in globals() and request else 'localhost',
-                success
-            ))
-            
-            conn.commit()
-            conn.close()
-            
+            self.flush_access_stats()
         except Exception as e:
             logger.error(f"Failed to log access: {e}")
 
@@ -347,9 +521,24 @@ class TwoFactorAuth:
             return False
 
 class RBACManager:
-    """Role-Based Access Control with detailed logging"""
+    """Role-Based Access Control with detailed logging
+
+    The permission table is compiled into one bitset per role, and
+    decisions are memoized per (role, permission) in a plain dict that
+    request threads read without locking; update_permission recompiles
+    and swaps in a fresh cache. `permissions` is a read-only view;
+    assigning a new table also recompiles. Access log rows are captured
+    in the request thread and appended to a bounded queue that a
+    background writer drains in executemany batches. A batch that fails
+    to write goes back to the front of the queue for the next flush.
+    When the queue is full, callers wait up to `block_timeout` seconds for
+    space before the row is dropped; denials wait until the writer makes
+    room unless writes are failing. get_rbac_audit_log flushes the queue
+    before reading, and queued rows are flushed at interpreter exit.
+    """
     
-    def __init__(self, db_path: str = "mito_sessions.db"):
+    def __init__(self, db_path: str = "mito_sessions.db", max_queue_size: int = None,
+                 block_timeout: float = None):
         self.db_path = db_path
         self.init_rbac_db()
         
@@ -366,6 +555,24 @@ class RBACManager:
             'system_admin': ['admin']
         }
         
+        self.max_queue_size = max_queue_size or int(os.getenv("MITO_RBAC_LOG_QUEUE_SIZE", "10000"))
+        self.block_timeout = block_timeout if block_timeout is not None else float(
+            os.getenv("MITO_RBAC_LOG_BLOCK_SECONDS", "0.5"))
+        self.batch_size = 500
+        self.flush_interval = 1  # seconds
+        self.log_queue: deque = deque()
+        self.stats = {'written': 0, 'dropped': 0, 'failed': 0, 'flushes': 0}
+        self._stats_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queue_ready = threading.Event()
+        self._queue_space = threading.Condition()
+        self._conn = None
+        self._write_failing = False
+        self.running = True
+        self.writer_thread = threading.Thread(target=self._process_log, daemon=True)
+        self.writer_thread.start()
+        atexit.register(self._close_at_exit)
+        
     def init_rbac_db(self):
         """Initialize RBAC database"""
         try:
@@ -394,10 +601,45 @@ class RBACManager:
         except Exception as e:
             logger.error(f"Failed to initialize RBAC database: {e}")
             
+    @property
+    def permissions(self) -> Mapping[str, tuple]:
+        """Read-only permission table; use update_permission or assign a new table"""
+        return MappingProxyType(self._permissions)
+        
+    @permissions.setter
+    def permissions(self, table: Dict[str, List[str]]):
+        self._permissions = {permission: tuple(roles) for permission, roles in table.items()}
+        self.compile_permissions()
+        
+    def compile_permissions(self):
+        """Rebuild the role bitsets from the permission table and reset the decision cache"""
+        permission_bits = {permission: 1 << index for index, permission in enumerate(self._permissions)}
+        role_masks: Dict[str, int] = {}
+        for permission, roles in self._permissions.items():
+            for role in roles:
+                role_masks[role] = role_masks.get(role, 0) | permission_bits[permission]
+        self._permission_bits = permission_bits
+        self._role_masks = role_masks
+        self._decisions: Dict[tuple, bool] = {}
+        
+    def update_permission(self, permission: str, roles: List[str]):
+        """Set the roles granted a permission"""
+        self._permissions[permission] = tuple(roles)
+        self.compile_permissions()
+        
+    def _decide(self, user_role: str, permission: str) -> bool:
+        decisions = self._decisions
+        key = (user_role, permission)
+        decision = decisions.get(key)
+        if decision is None:
+            decision = bool(self._role_masks.get(user_role, 0) & self._permission_bits.get(permission, 0))
+            decisions[key] = decision
+        return decision
+            
     def check_permission(self, user_id: str, user_role: str, permission: str, resource: str = None) -> bool:
         """Check if user has permission and log the access"""
         try:
-            has_permission = user_role in self.permissions.get(permission, [])
+            has_permission = self._decide(user_role, permission)
             
             # Log the access attempt
             self._log_rbac_access(user_id, user_role, permission, resource, 'check', has_permission)
@@ -416,7 +658,8 @@ class RBACManager:
                 user_id = session.get('user_id', 'anonymous')
                 user_role = session.get('user_role', 'guest')
                 
-                if not self.check_permission(user_id, user_role, permission, resource):
+                # One log row per guarded call records the decision
+                if not self._decide(user_role, permission):
                     self._log_rbac_access(user_id, user_role, permission, resource, 'denied', False)
                     return {'error': 'Access denied', 'required_permission': permission}, 403
                     
@@ -426,40 +669,146 @@ class RBACManager:
         return decorator
         
     def _log_rbac_access(self, user_id: str, role: str, permission: str, resource: str, action: str, granted: bool):
-        """Log RBAC access attempt"""
+        """Queue an RBAC access record for the background writer"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO rbac_log 
-                (user_id, role, permission, resource, action, granted, ip_address, user_agent, context) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                user_id, role, permission, resource, action, granted,
-                request.remote_addr if 'request' in globals() and request else 'localhost',
-                request.headers.get('User-Agent') if 'request' in globals() and request else 'system',
-                json.dumps({'session_id': session.get('mito_session_id')}) if 'session' in globals() else '{}'
-            ))
-            
-            conn.commit()
-            conn.close()
+            if has_request_context():
+                ip_address = request.remote_addr
+                user_agent = request.headers.get('User-Agent')
+                context = json.dumps({'session_id': session.get('mito_session_id')})
+            else:
+                ip_address, user_agent, context = 'localhost', 'system', '{}'
+            
+            row = (user_id, role, permission, resource, action, granted,
+                   time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+                   ip_address, user_agent, context)
+            
+            if len(self.log_queue) >= self.max_queue_size and not self._wait_for_space(granted):
+                with self._stats_lock:
+                    self.stats['dropped'] += 1
+                    dropped = self.stats['dropped']
+                if dropped == 1 or dropped % 10000 == 0:
+                    logger.warning(f"RBAC log queue full; {dropped} records dropped so far")
+                return
+            
+            self.log_queue.append(row)
+            if len(self.log_queue) >= self.batch_size:
+                self._queue_ready.set()
             
         except Exception as e:
             logger.error(f"Failed to log RBAC access: {e}")
             
+    def _wait_for_space(self, granted: bool) -> bool:
+        self._queue_ready.set()
+        with self._queue_space:
+            return self._queue_space.wait_for(
+                lambda: (len(self.log_queue) < self.max_queue_size or not self.running
+                         or self._write_failing),
+                self.block_timeout if granted else None)
+            
+    def _process_log(self):
+        """Background writer for the RBAC access log"""
+        while self.running or (self.log_queue and not self._write_failing):
+            if (len(self.log_queue) < self.batch_size or self._write_failing) and self.running:
+                self._queue_ready.wait(self.flush_interval)
+            self._queue_ready.clear()
+            try:
+                self.flush_log()
+            except Exception as e:
+                logger.error(f"Error writing RBAC log: {e}")
+                
+    def flush_log(self) -> int:
+        """Write every queued access record; returns the number written"""
+        written = 0
+        with self._flush_lock:
+            while self.log_queue:
+                rows = []
+                popleft = self.log_queue.popleft
+                try:
+                    while len(rows) < self.batch_size:
+                        rows.append(popleft())
+                except IndexError:
+                    pass
+                with self._queue_space:
+                    self._queue_space.notify_all()
+                
+                try:
+                    if self._conn is None:
+                        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    with self._conn:
+                        self._conn.executemany(INSERT_RBAC_LOG_SQL, rows)
+                except Exception as e:
+                    with self._stats_lock:
+                        self.stats['failed'] += len(rows)
+                    logger.error(f"Failed to write RBAC log batch: {e}")
+                    self._requeue(rows)
+                    break
+                
+                self._write_failing = False
+                written += len(rows)
+                with self._stats_lock:
+                    self.stats['written'] += len(rows)
+                    self.stats['flushes'] += 1
+        return written
+        
+    def _requeue(self, rows: List[tuple]):
+        """Put a failed batch back at the front of the queue, ahead of newer rows"""
+        self._write_failing = True
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+        keep = max(0, self.max_queue_size - len(self.log_queue))
+        if keep < len(rows):
+            with self._stats_lock:
+                self.stats['dropped'] += len(rows) - keep
+        self.log_queue.extendleft(reversed(rows[:keep]))
+        with self._queue_space:
+            self._queue_space.notify_all()
+        
+    def _close_at_exit(self):
+        try:
+            self.close()
+        except Exception as e:
+            logger.warning(f"Dropped unwritten RBAC log records at exit: {e}")
+        
+    def close(self):
+        """Stop the writer after draining queued records"""
+        atexit.unregister(self._close_at_exit)
+        self.running = False
+        self._queue_ready.set()
+        with self._queue_space:
+            self._queue_space.notify_all()
+        self.writer_thread.join(timeout=10)
+        self.flush_log()
+        with self._flush_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                
+    def get_log_stats(self) -> Dict[str, Any]:
+        """Access log writer counters and queue depth"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = len(self.log_queue)
+        stats['max_queue_size'] = self.max_queue_size
+        stats['cached_decisions'] = len(self._decisions)
+        return stats
+            
     def get_rbac_audit_log(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get RBAC audit log"""
         try:
+            self.flush_log()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute("""
                 SELECT * FROM rbac_log 
-                WHERE timestamp >= datetime('now', '-{} days') 
-                ORDER BY timestamp DESC 
+                WHERE timestamp >= datetime('now', ?) 
+                ORDER BY timestamp DESC, id DESC 
                 LIMIT 1000
-            """.format(days))
+            """, (f"-{int(days)} days",))
             
             columns = [desc[0] for desc in cursor.description]
             results = cursor.fetchall()
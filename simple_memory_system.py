@@ -13,6 +13,10 @@ from collections import defaultdict
 import logging
 import os
 import re
+import math
+import heapq
+import atexit
+import threading
 
 @dataclass
 class MemoryEntry:
@@ -61,38 +65,284 @@ class IdentitySignature:
     security_hash: str
     created_at: str
 
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
+
+def tokenize(text: str) -> List[str]:
+    """Split text into index terms, keeping repeats"""
+    words = re.findall(r'\b\w+\b', text.lower())
+    # Filter out common words
+    return [word for word in words if len(word) > 2 and word not in STOP_WORDS]
+
+def extract_keywords(text: str) -> List[str]:
+    """Extract keywords from text"""
+    return list(set(tokenize(text)))  # Remove duplicates
+
+class KeywordIndex:
+    """Incrementally maintained inverted index with BM25 scoring.
+    
+    Posting lists map each term to {doc_id: term frequency}, and a per-type
+    set of doc ids lets type filters be applied while walking postings, so a
+    query only touches documents that share at least one term with it.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.doc_types: Dict[str, str] = {}
+        self.type_index: Dict[str, set] = defaultdict(set)
+        self.total_length = 0
+        
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+        
+    def add(self, doc_id: str, terms: List[str], doc_type: Optional[str] = None):
+        """Index a document, replacing any previous version of it"""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        frequencies = defaultdict(int)
+        for term in terms:
+            frequencies[term] += 1
+        for term, frequency in frequencies.items():
+            self.postings[term][doc_id] = frequency
+        self.doc_lengths[doc_id] = len(terms)
+        self.doc_terms[doc_id] = list(frequencies)
+        self.total_length += len(terms)
+        if doc_type is not None:
+            self.doc_types[doc_id] = doc_type
+            self.type_index[doc_type].add(doc_id)
+            
+    def remove(self, doc_id: str):
+        """Drop a document from the index"""
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, ()):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+        doc_type = self.doc_types.pop(doc_id, None)
+        if doc_type is not None:
+            self.type_index[doc_type].discard(doc_id)
+            if not self.type_index[doc_type]:
+                del self.type_index[doc_type]
+                
+    def search(self, query_terms: List[str], doc_type: Optional[str] = None,
+               limit: Optional[int] = None) -> List[tuple]:
+        """Return (doc_id, score) pairs for documents matching any query term"""
+        if not self.doc_lengths:
+            return []
+        allowed = None
+        if doc_type is not None:
+            allowed = self.type_index.get(doc_type)
+            if not allowed:
+                return []
+                
+        doc_count = len(self.doc_lengths)
+        average_length = self.total_length / doc_count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        
+        for term in set(query_terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+                
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+class AppendOnlyJournal:
+    """Append-only operation log beside a JSON snapshot file.
+    
+    Mutations are appended as one JSON line each and fsynced (set
+    MITO_JOURNAL_FSYNC=false to trade durability for latency). Every
+    record carries an increasing sequence number. The snapshot is only
+    rewritten on compaction (atomically, via a temp file, os.replace and
+    a directory fsync) and stores the last sequence number it covers, so
+    records left behind by a crash mid-compaction are skipped on replay.
+    A torn final line is ignored. A plain snapshot with no journal (the
+    old storage format) loads unchanged.
+    """
+    
+    SEQ_KEY = '__journal_seq__'
+    
+    def __init__(self, snapshot_path: str, compact_threshold: int = 1000, durable: bool = None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + '.journal'
+        self.compact_threshold = compact_threshold
+        if durable is None:
+            durable = os.getenv("MITO_JOURNAL_FSYNC", "true").lower() == "true"
+        self.durable = durable
+        self.pending_ops = 0
+        self.seq = 0  # last sequence number written
+        self.snapshot_seq = 0  # last sequence number covered by the snapshot
+        self._handle = None
+        self._lock = threading.Lock()
+        
+    def load_snapshot(self) -> Optional[Any]:
+        """Read the snapshot file, or None if there is none"""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and self.SEQ_KEY in data:
+            self.snapshot_seq = data[self.SEQ_KEY]
+            self.seq = max(self.seq, self.snapshot_seq)
+            return data['snapshot']
+        return data
+            
+    def replay(self) -> List[Dict[str, Any]]:
+        """Read journal records written since the last compaction.
+        
+        A torn tail is cut off the file, so records appended afterwards
+        are not stranded behind it on the next replay.
+        """
+        records = []
+        if not os.path.exists(self.journal_path):
+            return records
+        good_end = 0
+        with open(self.journal_path, 'rb') as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b'\n'):
+                        raise ValueError("unterminated record")
+                    line = raw.strip()
+                    record = json.loads(line) if line else None
+                except ValueError:
+                    # Torn write from a crash; nothing after it was acknowledged
+                    logging.warning(f"Truncating incomplete journal record in {self.journal_path}")
+                    break
+                good_end += len(raw)
+                if record is None:
+                    continue
+                # Records from before sequence numbers were written have none
+                seq = record.get('seq', 0)
+                self.seq = max(self.seq, seq)
+                if seq and seq <= self.snapshot_seq:
+                    continue  # already in the snapshot
+                records.append(record)
+        if good_end < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_end)
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending_ops = len(records)
+        return records
+        
+    def append(self, *records: Dict[str, Any]):
+        """Append records to the journal"""
+        with self._lock:
+            if self._handle is None:
+                self._handle = open(self.journal_path, 'a')
+            lines = []
+            for record in records:
+                self.seq += 1
+                lines.append(json.dumps(dict(record, seq=self.seq)) + '\n')
+            self._handle.write(''.join(lines))
+            self._handle.flush()
+            if self.durable:
+                os.fsync(self._handle.fileno())
+            self.pending_ops += len(records)
+            
+    def needs_compaction(self) -> bool:
+        return self.pending_ops >= self.compact_threshold
+        
+    def compact(self, snapshot: Any):
+        """Atomically replace the snapshot and truncate the journal"""
+        with self._lock:
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({self.SEQ_KEY: self.seq, 'snapshot': snapshot}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._fsync_directory()
+            self.snapshot_seq = self.seq
+            
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            open(self.journal_path, 'w').close()
+            self.pending_ops = 0
+            
+    def _fsync_directory(self):
+        """Make the snapshot rename durable before the journal is truncated"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return  # Windows cannot open directories; the rename is durable there
+        fd = os.open(os.path.dirname(os.path.abspath(self.snapshot_path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
 class MemoryStore:
     """Core memory storage and retrieval system"""
     
     def __init__(self, store_path: str = "memory_store.json"):
         self.store_path = store_path
         self.memories: Dict[str, MemoryEntry] = {}
+        self.journal = AppendOnlyJournal(store_path)
+        self.index = KeywordIndex()
+        self._dirty: set = set()
         self.load_memories()
+        atexit.register(self.flush)
         
     def load_memories(self):
-        """Load memories from storage"""
+        """Load memories from snapshot and replay the journal"""
         try:
-            if os.path.exists(self.store_path):
-                with open(self.store_path, 'r') as f:
-                    data = json.load(f)
-                    for memory_data in data.get('memories', []):
-                        memory = MemoryEntry(**memory_data)
-                        self.memories[memory.id] = memory
+            data = self.journal.load_snapshot() or {}
+            for memory_data in data.get('memories', []):
+                memory = MemoryEntry(**memory_data)
+                self.memories[memory.id] = memory
+            for record in self.journal.replay():
+                if record['op'] == 'put':
+                    memory = MemoryEntry(**record['memory'])
+                    self.memories[memory.id] = memory
         except Exception as e:
             logging.error(f"Error loading memories: {e}")
+        for memory in self.memories.values():
+            self.index.add(memory.id, tokenize(memory.content), memory.memory_type)
             
     def save_memories(self):
-        """Save memories to storage"""
+        """Compact all memories into the snapshot file"""
         try:
             data = {
                 'memories': [asdict(memory) for memory in self.memories.values()],
                 'last_updated': datetime.now().isoformat()
             }
-            with open(self.store_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.journal.compact(data)
+            self._dirty.clear()
+        except Exception as e:
+            logging.error(f"Error saving memories: {e}")
+            
+    def _journal_put(self, memory: MemoryEntry):
+        try:
+            self.journal.append({'op': 'put', 'memory': asdict(memory)})
+            self._dirty.discard(memory.id)
+            if self.journal.needs_compaction():
+                self.save_memories()
         except Exception as e:
             logging.error(f"Error saving memories: {e}")
             
+    def flush(self):
+        """Persist access statistics changed by reads"""
+        dirty = [self.memories[memory_id] for memory_id in self._dirty if memory_id in self.memories]
+        self._dirty.clear()
+        if dirty:
+            try:
+                self.journal.append(*({'op': 'put', 'memory': asdict(memory)} for memory in dirty))
+            except Exception as e:
+                logging.error(f"Error saving memories: {e}")
+            
     def store_memory(self, content: str, memory_type: str, context: Dict[str, Any], 
                     importance: float = 0.5, tags: List[str] = None) -> str:
         """Store new memory"""
@@ -110,7 +360,8 @@ class MemoryStore:
         )
         
         self.memories[memory_id] = memory
-        self.save_memories()
+        self.index.add(memory_id, tokenize(content), memory_type)
+        self._journal_put(memory)
         return memory_id
         
     def recall_memory(self, memory_id: str) -> Optional[MemoryEntry]:
@@ -119,20 +370,28 @@ class MemoryStore:
             memory = self.memories[memory_id]
             memory.access_count += 1
             memory.last_accessed = datetime.now().isoformat()
-            self.save_memories()
+            self._dirty.add(memory_id)
             return memory
         return None
         
     def search_memories(self, query: str, memory_type: str = None, 
                        limit: int = 10) -> List[MemoryEntry]:
         """Search memories by content and type"""
+        query_terms = tokenize(query)
+        if query_terms:
+            # Rank by BM25, then importance and recency
+            matches = self.index.search(query_terms, memory_type)
+            results = [self.memories[memory_id] for memory_id, _ in matches]
+            scores = dict(matches)
+            results.sort(key=lambda m: (round(scores[m.id], 6), m.importance, m.access_count), reverse=True)
+            return results[:limit]
+            
+        # Queries with no indexable terms fall back to a substring scan
         results = []
         query_lower = query.lower()
-        
-        for memory in self.memories.values():
-            if memory_type and memory.memory_type != memory_type:
-                continue
-                
+        candidates = self.index.type_index.get(memory_type, ()) if memory_type else self.memories
+        for memory_id in candidates:
+            memory = self.memories[memory_id]
             if query_lower in memory.content.lower():
                 results.append(memory)
                 
@@ -231,32 +490,45 @@ class KnowledgeGraph:
         self.graph_path = graph_path
         self.nodes: Dict[str, KnowledgeNode] = {}
         self.connections: Dict[str, List[str]] = defaultdict(list)
+        self.journal = AppendOnlyJournal(graph_path)
         self.load_graph()
         
     def load_graph(self):
-        """Load knowledge graph from storage"""
+        """Load knowledge graph from snapshot and replay the journal"""
         try:
-            if os.path.exists(self.graph_path):
-                with open(self.graph_path, 'r') as f:
-                    data = json.load(f)
-                    for node_data in data.get('nodes', []):
-                        node = KnowledgeNode(**node_data)
-                        self.nodes[node.node_id] = node
-                        
-                    self.connections = defaultdict(list, data.get('connections', {}))
+            data = self.journal.load_snapshot() or {}
+            for node_data in data.get('nodes', []):
+                node = KnowledgeNode(**node_data)
+                self.nodes[node.node_id] = node
+                
+            self.connections = defaultdict(list, data.get('connections', {}))
+            
+            for record in self.journal.replay():
+                if record['op'] == 'put_node':
+                    node = KnowledgeNode(**record['node'])
+                    self.nodes[node.node_id] = node
+                elif record['op'] == 'put_connections':
+                    self.connections[record['node_id']] = record['connections']
         except Exception as e:
             logging.error(f"Error loading knowledge graph: {e}")
             
     def save_graph(self):
-        """Save knowledge graph to storage"""
+        """Compact the knowledge graph into the snapshot file"""
         try:
             data = {
                 'nodes': [asdict(node) for node in self.nodes.values()],
                 'connections': dict(self.connections),
                 'last_updated': datetime.now().isoformat()
             }
-            with open(self.graph_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.journal.compact(data)
+        except Exception as e:
+            logging.error(f"Error saving knowledge graph: {e}")
+            
+    def _journal(self, *records: Dict[str, Any]):
+        try:
+            self.journal.append(*records)
+            if self.journal.needs_compaction():
+                self.save_graph()
         except Exception as e:
             logging.error(f"Error saving knowledge graph: {e}")
             
@@ -275,7 +547,7 @@ class KnowledgeGraph:
         )
         
         self.nodes[node_id] = node
-        self.save_graph()
+        self._journal({'op': 'put_node', 'node': asdict(node)})
         return node_id
         
     def connect_nodes(self, node1_id: str, node2_id: str, strength: float = 1.0):
@@ -286,7 +558,12 @@ class KnowledgeGraph:
             
             self.nodes[node1_id].connections.append(node2_id)
             self.nodes[node2_id].connections.append(node1_id)
-            self.save_graph()
+            self._journal(
+                {'op': 'put_node', 'node': asdict(self.nodes[node1_id])},
+                {'op': 'put_node', 'node': asdict(self.nodes[node2_id])},
+                {'op': 'put_connections', 'node_id': node1_id, 'connections': self.connections[node1_id]},
+                {'op': 'put_connections', 'node_id': node2_id, 'connections': self.connections[node2_id]}
+            )
             
     def find_related_concepts(self, concept: str, depth: int = 2) -> List[KnowledgeNode]:
         """Find concepts related to given concept"""
@@ -449,25 +726,43 @@ class VectorMemory:
     def __init__(self, vector_path: str = "vector_memory.json"):
         self.vector_path = vector_path
         self.memories: Dict[str, Dict[str, Any]] = {}
+        self.journal = AppendOnlyJournal(vector_path)
+        self.index = KeywordIndex()
+        self._dirty: set = set()
         self.load_memories()
+        atexit.register(self.flush)
         
     def load_memories(self):
-        """Load vector memories from storage"""
+        """Load vector memories from snapshot and replay the journal"""
         try:
-            if os.path.exists(self.vector_path):
-                with open(self.vector_path, 'r') as f:
-                    self.memories = json.load(f)
+            self.memories = self.journal.load_snapshot() or {}
+            for record in self.journal.replay():
+                if record['op'] == 'put':
+                    self.memories[record['memory']['id']] = record['memory']
         except Exception as e:
             logging.error(f"Error loading vector memories: {e}")
+        for memory_id, memory_data in self.memories.items():
+            self.index.add(memory_id, tokenize(memory_data.get('content', '')),
+                           memory_data.get('memory_type'))
             
     def save_memories(self):
-        """Save vector memories to storage"""
+        """Compact vector memories into the snapshot file"""
         try:
-            with open(self.vector_path, 'w') as f:
-                json.dump(self.memories, f, indent=2)
+            self.journal.compact(self.memories)
+            self._dirty.clear()
         except Exception as e:
             logging.error(f"Error saving vector memories: {e}")
             
+    def flush(self):
+        """Persist access counts changed by searches"""
+        dirty = [self.memories[memory_id] for memory_id in self._dirty if memory_id in self.memories]
+        self._dirty.clear()
+        if dirty:
+            try:
+                self.journal.append(*({'op': 'put', 'memory': memory} for memory in dirty))
+            except Exception as e:
+                logging.error(f"Error saving vector memories: {e}")
+            
     def store_vector_memory(self, content: str, memory_type: str, 
                            metadata: Dict[str, Any] = None) -> str:
         """Store content for text-based search"""
@@ -484,52 +779,42 @@ class VectorMemory:
         }
         
         self.memories[memory_id] = memory_entry
-        self.save_memories()
+        self.index.add(memory_id, tokenize(content), memory_type)
+        try:
+            self.journal.append({'op': 'put', 'memory': memory_entry})
+            self._dirty.discard(memory_id)
+            if self.journal.needs_compaction():
+                self.save_memories()
+        except Exception as e:
+            logging.error(f"Error saving vector memories: {e}")
         return memory_id
         
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text"""
-        # Simple keyword extraction
-        words = re.findall(r'\b\w+\b', text.lower())
-        # Filter out common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
-        keywords = [word for word in words if len(word) > 2 and word not in stop_words]
-        return list(set(keywords))  # Remove duplicates
+        return extract_keywords(text)
         
     def search_similar(self, query: str, k: int = 10, 
                       memory_type: str = None) -> List[Dict[str, Any]]:
-        """Search for similar content using simple text matching"""
-        query_keywords = self._extract_keywords(query)
+        """Search for similar content using BM25 keyword scoring"""
         results = []
         
-        for memory_id, memory_data in self.memories.items():
-            # Filter by memory type if specified
-            if memory_type and memory_data.get('memory_type') != memory_type:
-                continue
-                
-            # Calculate simple similarity score
-            memory_keywords = memory_data.get('keywords', [])
-            common_keywords = set(query_keywords) & set(memory_keywords)
+        for memory_id, score in self.index.search(tokenize(query), memory_type, limit=k):
+            memory_data = self.memories[memory_id]
             
-            if common_keywords:
-                similarity_score = len(common_keywords) / max(len(query_keywords), len(memory_keywords))
-                
-                # Update access count
-                memory_data['access_count'] += 1
-                
-                results.append({
-                    'id': memory_id,
-                    'content': memory_data['content'],
-                    'memory_type': memory_data['memory_type'],
-                    'metadata': memory_data['metadata'],
-                    'similarity_score': similarity_score,
-                    'access_count': memory_data['access_count']
-                })
-                
-        # Sort by similarity score
-        results.sort(key=lambda x: x['similarity_score'], reverse=True)
-        self.save_memories()
-        return results[:k]
+            # Update access count (persisted lazily by flush)
+            memory_data['access_count'] += 1
+            self._dirty.add(memory_id)
+            
+            results.append({
+                'id': memory_id,
+                'content': memory_data['content'],
+                'memory_type': memory_data['memory_type'],
+                'metadata': memory_data['metadata'],
+                'similarity_score': round(score, 4),
+                'access_count': memory_data['access_count']
+            })
+            
+        return results
 
 class SimpleMemorySystem:
     """Unified simple memory management system"""
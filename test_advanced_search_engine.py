@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental AdvancedSearchEngine indexes
+Uses a deterministic hashing encoder in place of the transformer model
+"""
+
+import sys
+import os
+import pickle
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import time
+import numpy as np
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("aiohttp")
+
+from advanced_search_engine import (AdvancedSearchDatabase, AdvancedSearchEngine, Document,
+                                    EmbeddingManager, IncrementalTfidfIndex, SearchQueryLog,
+                                    select_index_type)
+
+
+class HashingEncoder:
+    """Bag-of-words vectors so similar texts get similar embeddings"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        single = isinstance(texts, str)
+        self.encoded += 1 if single else len(texts)
+        vectors = np.zeros((1 if single else len(texts), 384), dtype=np.float32)
+        for row, text in enumerate([texts] if single else texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % 384] += 1.0
+        return vectors[0] if single else vectors
+
+
+class LocalEmbeddingManager(EmbeddingManager):
+    def load_model(self):
+        self.model = HashingEncoder()
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    """Thousands of small pages with ETags, plus a robots.txt that blocks /private/"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    requested = []
+    robots_status = 200
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            cls.requested.append(self.path)
+        try:
+            time.sleep(0.002)
+            if self.path == "/robots.txt":
+                self._send(cls.robots_status, b"User-agent: *\nDisallow: /private/\n", "text/plain")
+            elif self.path.startswith("/page/"):
+                number = self.path.rsplit("/", 1)[-1]
+                etag = f'"v1-{number}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", headers={"ETag": etag})
+                else:
+                    body = (f"<html><head><title>Page {number}</title></head><body><article>"
+                            f"Python deployment guide number {number}. " + "Kubernetes clusters and docker images. " * 5 +
+                            "</article></body></html>").encode()
+                    self._send(200, body, "text/html", {"ETag": etag})
+            else:
+                self._send(404, b"missing", "text/plain")
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _send(self, status, body, content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_site():
+    FixtureSiteHandler.active = FixtureSiteHandler.max_active = 0
+    FixtureSiteHandler.requested = []
+    FixtureSiteHandler.robots_status = 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureSiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_engine(tmp):
+    return AdvancedSearchEngine(db_path=os.path.join(tmp, "search.db"),
+                                index_path=os.path.join(tmp, "index.faiss"),
+                                embedding_manager=LocalEmbeddingManager())
+
+
+def make_document(doc_id, text, category="general"):
+    return Document(id=doc_id, title=doc_id, content=text, url=f"https://example.com/{doc_id}",
+                    category=category, tags=[], metadata={})
+
+
+def test_tfidf_index_incremental():
+    """Batches, replacements and removals keep document frequencies exact"""
+    index = IncrementalTfidfIndex(n_features=2 ** 12)
+    index.add(["a", "b"], ["python flask web", "rust systems programming"])
+    index.add(["c"], ["python data science"])
+    scores = index.similarities("python")
+    assert scores[index.doc_rows["b"]] == 0
+    assert scores[index.doc_rows["a"]] > 0 and scores[index.doc_rows["c"]] > 0
+
+    index.add(["a"], ["kubernetes clusters"])
+    assert len(index) == 3
+    assert index.similarities("flask").max() == 0
+
+    index.remove(["b", "c"])
+    assert len(index) == 1 and not index.dead_rows
+    assert index.doc_freq.sum() == index.vectorizer.transform(["kubernetes clusters"]).nnz
+    assert index.similarities("kubernetes clusters")[index.doc_rows["a"]] > 0.99
+
+
+def test_tfidf_filters_before_top_k():
+    """Category and tag masks apply before top-k and match a full scan"""
+    index = IncrementalTfidfIndex(n_features=2 ** 14)
+    docs = {f"d{i}": f"python guide part {i} " + ("flask web" if i % 2 else "pandas data")
+            for i in range(40)}
+    index.add(list(docs), list(docs.values()),
+              ["web" if i % 2 else "data" for i in range(40)],
+              [["flask"] if i % 2 else ["pandas"] for i in range(40)])
+    index.remove(["d1"])
+
+    hits = index.search("python flask", limit=5, category="web")
+    assert len(hits) == 5 and all(int(doc_id[1:]) % 2 for doc_id, _ in hits)
+    assert "d1" not in dict(hits)
+    full = index.similarities("python flask")
+    best = sorted((score, index.row_ids[row]) for row, score in enumerate(full)
+                  if index.row_ids[row] and int(index.row_ids[row][1:]) % 2)[-5:]
+    assert sorted(score for score, _ in best) == pytest.approx(sorted(score for _, score in hits))
+
+    assert all(int(doc_id[1:]) % 2 == 0 for doc_id, _ in index.search("python", 50, tags=["pandas"]))
+    assert index.search("python", category="missing") == []
+    assert index.search("python", min_score=1.1) == []
+
+
+def test_embedding_tombstones_and_compaction():
+    """Replaced vectors are hidden immediately and purged on compaction"""
+    manager = LocalEmbeddingManager(compact_ratio=0.5)
+    vectors = np.eye(4, 384, dtype=np.float32)
+    manager.add_embeddings(vectors, ["a", "b", "c", "d"])
+    manager.add_embeddings(vectors[3:], ["a"])
+
+    hits = manager.search_similar(vectors[3], k=4)
+    assert [doc_id for doc_id, _ in hits].count("a") == 1
+    assert manager.faiss_index.ntotal == 5 and len(manager.tombstones) == 1
+
+    manager.remove_documents(["b", "c"])
+    assert manager.faiss_index.ntotal == 2 and not manager.tombstones
+    assert sorted(manager.document_ids) == ["a", "d"]
+
+
+def test_search_refetches_past_tombstones():
+    """Over-fetch stays small but still fills k when the nearest hits are tombstoned"""
+    manager = LocalEmbeddingManager(compact_ratio=1.0)
+    rng = np.random.default_rng(1)
+    query = np.eye(1, 384, dtype=np.float32)[0]
+    near = query + 0.01 * rng.standard_normal((40, 384)).astype(np.float32)
+    far = rng.standard_normal((200, 384)).astype(np.float32)
+    manager.add_embeddings(np.vstack([near, far]), [f"near{i}" for i in range(40)] + [f"far{i}" for i in range(200)])
+    manager.remove_documents([f"near{i}" for i in range(37)])
+    assert len(manager.tombstones) == 37
+
+    hits = manager.search_similar(query, k=5)
+    assert {doc_id for doc_id, _ in hits[:3]} == {"near37", "near38", "near39"}
+    assert len(hits) == 5 and all(doc_id.startswith("far") for doc_id, _ in hits[3:])
+
+
+def test_legacy_index_migrates_on_load():
+    """A positional index with pickled ids is rebuilt as an ID-mapped index"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy.faiss")
+        vectors = np.eye(3, 384, dtype=np.float32)
+        legacy = faiss.IndexFlatIP(384)
+        legacy.add(vectors)
+        faiss.write_index(legacy, path)
+        with open(path + ".ids", "wb") as f:
+            pickle.dump(["a", "b", "c"], f)
+
+        manager = LocalEmbeddingManager()
+        assert manager.load_index(path)
+        assert sorted(manager.document_ids) == ["a", "b", "c"]
+        assert manager.search_similar(vectors[1], k=1)[0][0] == "b"
+
+
+def test_engine_indexes_without_rebuild():
+    """Indexing appends to both indexes and survives a restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(tmp)
+        engine.index_documents_batch([
+            make_document("py", "python web framework flask routing"),
+            make_document("k8s", "kubernetes pods deployments clusters")
+        ])
+        engine.index_document(make_document("ml", "machine learning python models", "ai_ml"))
+
+        assert engine.search("kubernetes clusters", "keyword", limit=1)[0].id == "k8s"
+        assert [r.id for r in engine.search("python", "keyword", category="ai_ml")] == ["ml"]
+        assert engine.search("flask routing", "semantic", limit=1)[0].id == "py"
+        assert engine.remove_document("k8s")
+        assert engine.search("kubernetes clusters", "keyword") == []
+        engine.persist_indexes()
+        assert engine.get_search_analytics()["embedding_cache"]["writes"] == 3  # queries stay in memory
+
+        restarted = make_engine(tmp)
+        assert sorted(restarted.embedding_manager.document_ids) == ["ml", "py"]
+        assert restarted.search("machine learning", "keyword", limit=1)[0].id == "ml"
+        restarted.close()
+        engine.close()
+
+
+def test_restart_reloads_reembedded_documents():
+    """A document re-indexed after the last index save gets its new vector on restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(tmp)
+        engine.index_document(make_document("doc", "kubernetes pods deployments clusters"))
+        engine.index_document(make_document("other", "python web framework flask routing"))
+        engine.persist_indexes()
+
+        # Re-indexed, but the process dies before the index is saved again
+        engine.index_document(make_document("doc", "gardening tomatoes compost soil"))
+
+        restarted = make_engine(tmp)
+        assert sorted(restarted.embedding_manager.document_ids) == ["doc", "other"]
+        hits = restarted.embedding_manager.search_similar(
+            restarted.embedding_manager.encode_text("doc gardening tomatoes compost soil"), k=1)
+        assert hits[0][0] == "doc" and hits[0][1] > 0.99
+        assert restarted.embedding_manager.doc_sources == {"doc": 2, "other": 1}
+        restarted.close()
+        engine.close()
+
+
+def test_embedding_matrix_compacts_dead_rows():
+    """Rows left behind by re-embedding are reclaimed on restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(tmp)
+        engine.index_document(make_document("other", "python web framework flask routing"))
+        for text in ("kubernetes pods", "docker images", "gardening tomatoes compost soil"):
+            engine.index_document(make_document("doc", text))
+        assert engine.get_search_analytics()["embedding_matrix"] == {'rows': 4, 'live_rows': 2, 'dead_rows': 2}
+        engine.close()
+
+        restarted = make_engine(tmp)
+        assert restarted.db.embedding_row_stats() == {'rows': 2, 'live_rows': 2, 'dead_rows': 0}
+        assert restarted.embedding_manager.doc_sources == {"other": 0, "doc": 1}
+        hits = restarted.embedding_manager.search_similar(
+            restarted.embedding_manager.encode_text("doc gardening tomatoes compost soil"), k=1)
+        assert hits[0][0] == "doc" and hits[0][1] > 0.99
+        restarted.close()
+
+
+def test_interrupted_compaction_recovers():
+    """A compaction cut off after its commit is finished on the next start; before it, discarded"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "search.db")
+        db = AdvancedSearchDatabase(db_path)
+        vectors = np.eye(3, 384, dtype=np.float32)
+        db.embeddings.append(vectors)
+        conn = sqlite3.connect(db_path)
+        conn.executemany("INSERT INTO documents (id, title, content, embedding_row) VALUES (?, 't', 'c', ?)",
+                         [("a", 0), ("c", 2)])
+        conn.commit()
+        conn.close()
+
+        class Crash(Exception):
+            pass
+
+        def crash(*args):
+            raise Crash()
+
+        # Crash before the commit: the old file and row numbers stay
+        with pytest.raises(Crash):
+            db.embeddings.compact([0, 2], crash)
+        assert AdvancedSearchDatabase(db_path).embedding_row_stats()["rows"] == 3
+        assert not os.path.exists(db.embeddings.compact_path)
+
+        # Crash after the commit: the compacted file is swapped in on restart
+        db.embeddings._swap_compacted = crash
+        with pytest.raises(Crash):
+            db.compact_embeddings()
+        assert db.embeddings.rows == 3
+
+        reopened = AdvancedSearchDatabase(db_path)
+        assert reopened.embedding_row_stats() == {'rows': 2, 'live_rows': 2, 'dead_rows': 0}
+        assert np.array_equal(reopened.embeddings.get([1])[0], vectors[2])
+
+
+def test_pickled_embeddings_migrate_to_matrix():
+    """Legacy pickled rows move into the memory-mapped matrix on startup"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "search.db")
+        vector = HashingEncoder().encode("legacy kubernetes page")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE documents (id TEXT PRIMARY KEY, title TEXT NOT NULL, content TEXT NOT NULL,
+                                    url TEXT, category TEXT, tags TEXT, metadata TEXT, embedding BLOB,
+                                    tfidf_scores TEXT, indexed_at TIMESTAMP, updated_at TIMESTAMP)
+        """)
+        conn.execute("INSERT INTO documents (id, title, content, url, category, tags, metadata, embedding) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     ("old", "legacy", "kubernetes page", "", "general", "[]", "{}", pickle.dumps(vector)))
+        conn.execute("INSERT INTO documents (id, title, content, embedding) VALUES (?, ?, ?, ?)",
+                     ("evil", "bad", "blob", pickle.dumps(os.getcwd)))
+        conn.commit()
+        conn.close()
+
+        engine = make_engine(tmp)
+        assert engine.db.embeddings.rows == 1
+        assert np.array_equal(engine.db.embeddings.get([0])[0], vector)
+        assert engine.search("legacy kubernetes page", "semantic", limit=1)[0].id == "old"
+
+        engine.index_document(make_document("new", "fresh flask content"))
+        conn = sqlite3.connect(db_path)
+        rows = dict(conn.execute("SELECT id, embedding_row FROM documents"))
+        assert conn.execute("SELECT COUNT(*) FROM documents WHERE embedding IS NOT NULL").fetchone()[0] == 0
+        conn.close()
+        assert rows["old"] == 0 and rows["new"] == 1 and rows["evil"] is None
+        engine.close()
+
+
+def test_embedding_cache_skips_model_for_known_text():
+    """Only cache misses reach the model; the cache persists and is namespaced"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "search.db")
+        manager = LocalEmbeddingManager(cache_db_path=db_path)
+        first = manager.encode_batch(["alpha beta", "gamma", "alpha beta"])
+        assert manager.model.encoded == 2
+        assert np.array_equal(first[0], first[2])
+
+        again = manager.encode_batch(["gamma", "delta", "alpha   beta"])
+        assert manager.model.encoded == 3
+        assert np.array_equal(again[0], first[1]) and np.array_equal(again[2], first[0])
+        assert np.array_equal(manager.encode_text("delta"), again[1])
+        assert manager.model.encoded == 3
+        assert manager.cache.get_stats()["hit_rate"] == 0.5
+
+        restarted = LocalEmbeddingManager(cache_db_path=db_path)
+        assert np.array_equal(restarted.encode_text("gamma"), first[1])
+        assert restarted.model.encoded == 0 and restarted.cache.get_stats()["db_hits"] == 1
+
+        os.environ["MITO_EMBEDDING_MODEL_VERSION"] = "2"
+        try:
+            upgraded = LocalEmbeddingManager(cache_db_path=db_path)
+            upgraded.encode_text("gamma")
+            assert upgraded.model.encoded == 1
+        finally:
+            os.environ.pop("MITO_EMBEDDING_MODEL_VERSION")
+
+
+def test_index_tier_selection():
+    """Auto mode picks larger tiers as the corpus grows"""
+    assert select_index_type(1_000) == "flat"
+    assert select_index_type(200_000) == "ivf_flat"
+    assert select_index_type(2_000_000) == "ivf_pq"
+
+
+def test_background_tier_builds():
+    """IVF and HNSW tiers are built off-thread and keep search and deletes working"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((3000, 384)).astype(np.float32)
+    doc_ids = [f"doc{i}" for i in range(3000)]
+
+    for index_type in ("ivf_flat", "hnsw"):
+        manager = LocalEmbeddingManager(index_type=index_type, compact_ratio=0.1)
+        manager.add_embeddings(vectors, doc_ids)
+        assert manager.wait_for_index(timeout=60)
+        info = manager.get_index_info()
+        assert info["index_type"] == index_type and info["vectors"] == 3000
+
+        assert manager.search_similar(vectors[42], k=1, nprobe=4, ef_search=32)[0][0] == "doc42"
+        manager.remove_documents(doc_ids[:500])
+        assert manager.wait_for_index(timeout=60)
+        assert manager.get_index_info()["vectors"] == 2500
+        assert manager.search_similar(vectors[42], k=1)[0][0] != "doc42"
+
+
+def test_hybrid_fusion_and_timings():
+    """Both fusion modes rank the document both retrievers agree on first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(tmp)
+        engine.index_documents_batch([
+            make_document("py", "python web framework flask routing"),
+            make_document("data", "python pandas dataframes", "data"),
+            make_document("k8s", "kubernetes pods deployments clusters")
+        ])
+
+        rrf = engine.search_detailed("flask routing", "hybrid", limit=2)
+        assert rrf["results"][0].id == "py"
+        assert rrf["results"][0].tfidf_score > 0 and rrf["results"][0].embedding_score > 0
+        assert set(rrf["timings"]) >= {"semantic", "keyword", "fusion", "hydrate", "total"}
+
+        weighted = engine.search_detailed("flask routing", "hybrid", limit=2, fusion="weighted")
+        assert weighted["results"][0].id == "py"
+        assert abs(weighted["results"][0].combined_score - 1.0) < 1e-6
+
+        # Analytics log retriever similarity, not the fused rank score
+        engine.query_log.flush()
+        conn = sqlite3.connect(os.path.join(tmp, "search.db"))
+        logged = [row[0] for row in conn.execute("SELECT avg_score FROM search_queries ORDER BY id")]
+        conn.close()
+        for score, response in zip(logged, (rrf, weighted)):
+            expected = [0.6 * r.embedding_score + 0.4 * r.tfidf_score for r in response["results"]]
+            assert abs(score - sum(expected) / len(expected)) < 1e-6
+
+        filtered = engine.search("python", "hybrid", category="data")
+        assert [r.id for r in filtered] == ["data"]
+
+        # Repeated queries reuse the cached embedding
+        model = engine.embedding_manager.model
+        encoded = model.encoded
+        engine.search("flask routing", "semantic")
+        assert model.encoded == encoded
+        assert engine.get_search_analytics()["query_embedding_cache"]["hits"] >= 2
+        engine.close()
+
+
+def test_async_crawler_politeness_and_conditional_get():
+    """Crawls thousands of pages under the per-host limit and skips unchanged pages"""
+    server, base = start_fixture_site()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(tmp)
+            engine.crawler.per_host_limit = 6
+            urls = [f"{base}/page/{i}" for i in range(2000)] + [f"{base}/private/secret", f"{base}/nothing"]
+
+            result = engine.crawl_and_index_urls(urls)
+            assert result["documents_crawled"] == 2000 and result["documents_indexed"] == 2000
+            assert result["blocked"] == 1 and result["failed"] == 1
+            assert FixtureSiteHandler.max_active <= 6
+            assert FixtureSiteHandler.requested.count("/robots.txt") == 1
+            assert "/private/secret" not in FixtureSiteHandler.requested
+            assert engine.search("deployment guide number 1234", "keyword", limit=1)[0].url == f"{base}/page/1234"
+
+            engine.crawler.per_host_limit = 2
+            recrawl = engine.crawl_and_index_urls(urls[:500], recrawl=True)
+            assert recrawl["not_modified"] == 500 and recrawl["documents_crawled"] == 0
+            assert FixtureSiteHandler.requested.count("/robots.txt") == 1  # cached
+
+            conn = sqlite3.connect(os.path.join(tmp, "search.db"))
+            statuses = dict(conn.execute("SELECT status, COUNT(*) FROM crawl_queue GROUP BY status").fetchall())
+            history = conn.execute("SELECT COUNT(*) FROM crawl_history").fetchone()[0]
+            conn.close()
+            assert statuses == {"completed": 1500, "not_modified": 500, "blocked": 1, "failed": 1}
+            conn = sqlite3.connect(os.path.join(tmp, "search.db"))
+            retries = dict(conn.execute("SELECT status, MAX(retry_count) FROM crawl_queue GROUP BY status").fetchall())
+            conn.close()
+            assert retries == {"completed": 0, "not_modified": 0, "blocked": 0, "failed": 1}
+            assert history == 2002 + 500
+            engine.close()
+    finally:
+        server.shutdown()
+
+
+def test_robots_server_error_disallows_host():
+    """A 5xx on robots.txt blocks the host until the cached answer expires"""
+    server, base = start_fixture_site()
+    FixtureSiteHandler.robots_status = 503
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(tmp)
+            engine.crawler.add_urls_to_queue([f"{base}/page/{i}" for i in range(3)])
+            assert engine.crawler.crawl_pending_urls(10) == []
+            assert FixtureSiteHandler.requested == ["/robots.txt"]
+
+            FixtureSiteHandler.robots_status = 200
+            engine.crawler.add_urls_to_queue([f"{base}/page/3"])
+            assert engine.crawler.crawl_pending_urls(10) == []
+            assert FixtureSiteHandler.requested == ["/robots.txt"]  # still cached
+
+            engine.crawler.robots_ttl = 0
+            engine.crawler.add_urls_to_queue([f"{base}/page/4"])
+            assert len(engine.crawler.crawl_pending_urls(10)) == 1
+            engine.close()
+    finally:
+        server.shutdown()
+
+
+def test_crawler_host_delay():
+    """Requests to one host are spaced by the configured delay"""
+    server, base = start_fixture_site()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(tmp)
+            engine.crawler.host_delay = 0.05
+            engine.crawler.add_urls_to_queue([f"{base}/page/{i}" for i in range(6)])
+            start = time.monotonic()
+            documents = engine.crawler.crawl_pending_urls(10)
+            assert len(documents) == 6
+            assert time.monotonic() - start >= 0.25
+            engine.close()
+    finally:
+        server.shutdown()
+
+
+def test_query_log_ring_buffer_and_rollups():
+    """Queries are buffered, flushed in batches and rolled up; old history is backfilled"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "search.db")
+        AdvancedSearchDatabase(db_path)
+        log = SearchQueryLog(db_path, capacity=5, flush_interval=60, batch_size=1000)
+        for i in range(7):
+            log.record(f"query {i}", "keyword" if i % 2 else "hybrid", i % 3, 0.5, 0.01 * i)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM search_queries").fetchone()[0] == 0
+        assert log.get_stats()["dropped"] == 2 and log.get_stats()["buffered"] == 5
+        assert log.flush() == 5
+        rollup = dict(conn.execute("""SELECT search_type, query_count FROM search_rollup_hour""").fetchall())
+        assert rollup == {"hybrid": 3, "keyword": 2}
+        zero, peak = conn.execute("""SELECT SUM(zero_result_count), MAX(execution_max)
+                                     FROM search_rollup_minute""").fetchone()
+        assert zero == 2 and abs(peak - 0.06) < 1e-9
+
+        conn.execute("DELETE FROM search_rollup_hour")
+        conn.execute("DELETE FROM search_rollup_minute")
+        conn.execute("""INSERT INTO search_queries (query, search_type, results_count, avg_score, execution_time)
+                        VALUES ('legacy', 'semantic', NULL, NULL, 0.2)""")
+        conn.commit()
+        AdvancedSearchDatabase(db_path)
+        backfilled = dict(conn.execute("SELECT search_type, query_count FROM search_rollup_hour").fetchall())
+        assert backfilled == {"hybrid": 3, "keyword": 2, "semantic": 1}
+        conn.close()
+
+        engine = make_engine(tmp)
+        engine.index_document(make_document("py", "python web framework flask routing"))
+        engine.search("flask", "keyword")
+        engine.search("nothing matches this", "keyword")
+        analytics = engine.get_search_analytics()
+        assert analytics["search_statistics"]["keyword"]["count"] == 4
+        assert analytics["searches_last_hour"]["count"] == 8
+        assert analytics["query_log"]["buffered"] == 0
+        log.close()
+        engine.close()
+
+
+def test_query_log_retries_failed_batch():
+    """A failed flush keeps its queries for the next one instead of discarding them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "search.db")
+        log = SearchQueryLog(db_path, capacity=5, flush_interval=60, batch_size=1000)
+        for i in range(3):
+            log.record(f"query {i}", "keyword", 1, 0.5, 0.01)
+        assert log.flush() == 0  # tables do not exist yet
+        assert log.get_stats()["buffered"] == 3 and log.get_stats()["dropped"] == 0
+
+        log.record("query 3", "keyword", 1, 0.5, 0.01)
+        AdvancedSearchDatabase(db_path)
+        assert log.flush() == 4
+        conn = sqlite3.connect(db_path)
+        assert [row[0] for row in conn.execute("SELECT query FROM search_queries ORDER BY id")] == \
+            [f"query {i}" for i in range(4)]
+        conn.close()
+        log.close()
+
+
+if __name__ == "__main__":
+    test_tfidf_index_incremental()
+    test_tfidf_filters_before_top_k()
+    test_embedding_tombstones_and_compaction()
+    test_search_refetches_past_tombstones()
+    test_legacy_index_migrates_on_load()
+    test_engine_indexes_without_rebuild()
+    test_restart_reloads_reembedded_documents()
+    test_embedding_matrix_compacts_dead_rows()
+    test_interrupted_compaction_recovers()
+    test_pickled_embeddings_migrate_to_matrix()
+    test_embedding_cache_skips_model_for_known_text()
+    test_index_tier_selection()
+    test_background_tier_builds()
+    test_hybrid_fusion_and_timings()
+    test_async_crawler_politeness_and_conditional_get()
+    test_robots_server_error_disallows_host()
+    test_crawler_host_delay()
+    test_query_log_ring_buffer_and_rollups()
+    test_query_log_retries_failed_batch()
+    print("✓ Advanced search engine tests completed successfully!")
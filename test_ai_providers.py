@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test script for AI provider generation, streaming and fallback
+Runs against a local stand-in HTTP server
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_providers
+import memory_manager
+from provider_transport import get_transport
+from test_provider_transport import start_stand_in_server
+
+# Keep conversation memory out of the working tree's mito_memory.db
+_memory_dir = tempfile.mkdtemp()
+memory_manager._memory_manager = memory_manager.MITOMemoryManager(os.path.join(_memory_dir, 'memory.db'))
+
+PROVIDER_ENV = ("GROQ_API_KEY", "LLAMA_API_KEY", "LLAMA_API_URL", "OPENAI_API_KEY", "CLAUDE_API_KEY")
+
+
+class provider_env:
+    """Temporarily replace AI provider environment variables"""
+
+    def __init__(self, **values):
+        self.values = values
+        self.saved = {}
+
+    def __enter__(self):
+        for key in PROVIDER_ENV:
+            self.saved[key] = os.environ.pop(key, None)
+        os.environ.update(self.values)
+        return self
+
+    def __exit__(self, *exc):
+        for key in PROVIDER_ENV:
+            os.environ.pop(key, None)
+            if self.saved[key] is not None:
+                os.environ[key] = self.saved[key]
+        get_transport().close()
+
+
+def test_llama_stream_yields_tokens():
+    """llama_stream relays SSE deltas token by token"""
+    server, url = start_stand_in_server()
+    try:
+        with provider_env(GROQ_API_KEY="test-key", LLAMA_API_URL=url):
+            tokens = list(ai_providers.llama_stream("hello"))
+        assert tokens == ["echo:", " ", "hello"]
+    finally:
+        server.shutdown()
+
+
+def test_stream_falls_back_before_first_token():
+    """A provider that fails up front is skipped for the next in the chain"""
+    server, url = start_stand_in_server()
+    try:
+        # No OpenAI key: openai_stream raises, llama takes over
+        served = {}
+        with provider_env(GROQ_API_KEY="test-key", LLAMA_API_URL=url):
+            text = "".join(ai_providers.ai_generate_stream("hi", provider="openai", served=served))
+        assert text == "echo: hi"
+        assert served == {'provider': "llama"}
+    finally:
+        server.shutdown()
+
+
+def test_stream_local_fallback():
+    """With no providers configured the local fallback is streamed"""
+    served = {}
+    with provider_env():
+        text = "".join(ai_providers.ai_generate_stream("hi", provider="llama", served=served))
+    assert "MITO" in text and not text.startswith("Error:")
+    assert served == {'provider': "local"}
+
+
+class fake_providers:
+    """Temporarily replace provider generate functions"""
+
+    def __init__(self, **functions):
+        self.functions = functions
+        self.saved = dict(ai_providers.GENERATE_FUNCTIONS)
+
+    def __enter__(self):
+        ai_providers.GENERATE_FUNCTIONS.update(self.functions)
+        ai_providers.get_provider_stats().reset()
+        ai_providers.get_circuit_breaker().reset()
+        return self
+
+    def __exit__(self, *exc):
+        ai_providers.GENERATE_FUNCTIONS.clear()
+        ai_providers.GENERATE_FUNCTIONS.update(self.saved)
+        ai_providers.get_provider_stats().reset()
+        ai_providers.get_circuit_breaker().reset()
+
+
+def slow_provider(prompt):
+    time.sleep(1.0)
+    return "slow answer"
+
+
+def fast_provider(prompt):
+    return "fast answer"
+
+
+def failing_provider(prompt):
+    return "Error: provider down"
+
+
+def test_hedge_races_next_provider():
+    """A slow primary is raced by the next provider after the hedge delay"""
+    os.environ["MITO_HEDGE_DELAY"] = "0.1"
+    try:
+        with fake_providers(openai=slow_provider, llama=fast_provider):
+            start_time = time.perf_counter()
+            result = ai_providers.ai_generate_detailed("hi", provider="openai", hedge=True, use_cache=False)
+            elapsed = time.perf_counter() - start_time
+    finally:
+        os.environ.pop("MITO_HEDGE_DELAY", None)
+
+    assert result == {'response': "fast answer", 'provider': "llama", 'hedged': True, 'cached': False}
+    assert elapsed < 0.8
+
+
+def test_hedge_delay_uses_observed_latency():
+    """Without MITO_HEDGE_DELAY the delay is the p95, and no hedge without one"""
+    os.environ.pop("MITO_HEDGE_DELAY", None)
+    with fake_providers():
+        stats = ai_providers.get_provider_stats()
+        assert ai_providers._hedge_delay("openai") == float("inf")
+        for _ in range(20):
+            stats.record("openai", 3.0, True)
+        assert ai_providers._hedge_delay("openai") == 3.0
+
+        os.environ["MITO_HEDGE_DELAY"] = "soon"
+        try:
+            assert ai_providers._hedge_delay("openai") == 3.0
+        finally:
+            os.environ.pop("MITO_HEDGE_DELAY", None)
+
+
+def test_hedging_off_by_default():
+    """Without MITO_PROVIDER_HEDGING a slow primary is not raced"""
+    os.environ.pop("MITO_PROVIDER_HEDGING", None)
+    os.environ["MITO_HEDGE_DELAY"] = "0.1"
+    try:
+        with fake_providers(openai=slow_provider, llama=fast_provider):
+            result = ai_providers.ai_generate_detailed("hi", provider="openai", use_cache=False)
+    finally:
+        os.environ.pop("MITO_HEDGE_DELAY", None)
+
+    assert result == {'response': "slow answer", 'provider': "openai", 'hedged': False, 'cached': False}
+
+
+def test_serial_fallback_without_hedging():
+    """Without hedging the next provider only runs after a failure"""
+    with fake_providers(claude=failing_provider, openai=fast_provider):
+        result = ai_providers.ai_generate_detailed("hi", provider="claude", hedge=False, use_cache=False)
+        assert ai_providers.get_provider_stats().error_rate("claude") == 1.0
+
+    assert result == {'response': "fast answer", 'provider': "openai", 'hedged': False, 'cached': False}
+
+
+def test_all_providers_fail_uses_local():
+    with fake_providers(llama=failing_provider, openai=failing_provider):
+        result = ai_providers.ai_generate_detailed("hi", provider="llama", use_cache=False)
+    assert result['provider'] == "local"
+    assert not result['response'].startswith("Error:")
+
+
+def test_open_circuit_is_skipped():
+    """After N consecutive failures the provider is skipped outright"""
+    calls = []
+
+    def counting_failure(prompt):
+        calls.append(prompt)
+        return "Error: provider down"
+
+    with fake_providers(openai=counting_failure, llama=fast_provider):
+        breaker = ai_providers.get_circuit_breaker()
+        for _ in range(breaker.failure_threshold):
+            ai_providers.ai_generate_detailed("hi", provider="openai", hedge=False, use_cache=False)
+        assert breaker.get_state("openai")["state"] == "open"
+
+        result = ai_providers.ai_generate_detailed("hi", provider="openai", hedge=False, use_cache=False)
+        assert result['provider'] == "llama"
+        assert len(calls) == breaker.failure_threshold
+
+        os.environ["OPENAI_API_KEY"] = "test-key"
+        try:
+            info = ai_providers.get_available_providers()["openai"]
+        finally:
+            os.environ.pop("OPENAI_API_KEY", None)
+        assert info["status"] == "circuit_open" and not info["available"]
+
+
+def test_half_open_probe_closes_circuit():
+    """A successful probe after the reset timeout closes the circuit"""
+    from provider_health import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure("claude")
+    breaker.record_failure("claude")
+    assert not breaker.allow_request("claude")
+
+    time.sleep(0.06)
+    assert breaker.allow_request("claude")
+    assert breaker.get_state("claude")["state"] == "half_open"
+    # Only one probe at a time
+    assert not breaker.allow_request("claude")
+
+    breaker.record_success("claude")
+    assert breaker.get_state("claude")["state"] == "closed"
+
+
+def test_missing_key_releases_half_open_probe():
+    """A probe that fails for a missing key leaves the circuit half-open, not stuck"""
+    with fake_providers(openai=lambda prompt: ai_providers.MISSING_KEY_ERRORS["openai"],
+                        llama=fast_provider):
+        breaker = ai_providers.get_circuit_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure("openai")
+        # Past the reset timeout the next call is the half-open probe
+        breaker._circuit("openai")['opened_at'] -= breaker.reset_timeout
+
+        result = ai_providers.ai_generate_detailed("hi", provider="openai", hedge=False, use_cache=False)
+        assert result['provider'] == "llama"
+        assert breaker.get_state("openai")["state"] == "half_open"
+        assert breaker.allow_request("openai")
+
+
+if __name__ == "__main__":
+    test_llama_stream_yields_tokens()
+    test_stream_falls_back_before_first_token()
+    test_stream_local_fallback()
+    test_hedge_races_next_provider()
+    test_hedge_delay_uses_observed_latency()
+    test_hedging_off_by_default()
+    test_serial_fallback_without_hedging()
+    test_all_providers_fail_uses_local()
+    test_open_circuit_is_skipped()
+    test_half_open_probe_closes_circuit()
+    test_missing_key_releases_half_open_probe()
+    print("✓ AI provider tests completed successfully!")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test script for the MITO audit ingest pipeline
+"""
+
+import sys
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timedelta
+from audit import (AuditDatabase, AuditEvent, AuditLogger, AuditLevel, AuditCategory,
+                   ComplianceMonitor, ComplianceRule, SlidingWindowCounter)
+
+
+class PausedAuditLogger(AuditLogger):
+    """Writer thread starts only when the test asks for it"""
+
+    def start_processor(self):
+        pass
+
+    def resume(self):
+        AuditLogger.start_processor(self)
+
+
+def test_batched_ingest_from_many_threads():
+    """Concurrent events land in batches with unique, time-ordered ids and shared system info"""
+    with tempfile.TemporaryDirectory() as tmp:
+        audit_logger = AuditLogger(AuditDatabase(os.path.join(tmp, "audit.db")), system_info_interval=3600)
+
+        def produce(thread_id):
+            for i in range(2500):
+                audit_logger.log_api_call("/api/items", "GET", user_id=f"user{i % 7}",
+                                          session_id=f"s{thread_id}", duration_ms=1.5)
+
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        audit_logger.stop_processor()
+
+        stats = audit_logger.get_stats()
+        assert stats["written"] == 10000 and stats["dropped"] == 0
+        assert stats["flushes"] < 100
+
+        conn = sqlite3.connect(os.path.join(tmp, "audit.db"))
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        ids = [row[0] for row in conn.execute("SELECT id FROM audit_events ORDER BY rowid")]
+        system_infos = {row[0] for row in conn.execute("SELECT DISTINCT system_info FROM audit_events")}
+        conn.close()
+        assert len(set(ids)) == 10000
+        assert len(system_infos) == 1 and "memory_percent" in json.loads(system_infos.pop())
+
+
+def test_drop_policy_keeps_security_events():
+    """A full queue drops ordinary events but never security events"""
+    with tempfile.TemporaryDirectory() as tmp:
+        audit_logger = PausedAuditLogger(AuditDatabase(os.path.join(tmp, "audit.db")),
+                                         max_queue_size=10, overflow_policy="drop")
+        for i in range(15):
+            audit_logger.log_data_access("user1", "reports", f"read_{i}")
+        audit_logger.log_security_event("intrusion", AuditLevel.SECURITY, user_id="user1")
+        assert audit_logger.get_stats()["dropped"] == 5
+
+        audit_logger.resume()
+        audit_logger.stop_processor()
+        conn = sqlite3.connect(os.path.join(tmp, "audit.db"))
+        categories = dict(conn.execute("SELECT category, COUNT(*) FROM audit_events GROUP BY category").fetchall())
+        conn.close()
+        assert categories == {"data_access": 10, "security_event": 1}
+
+
+def test_block_policy_times_out_then_resumes():
+    """Blocked producers give up after the timeout and succeed once the writer drains"""
+    with tempfile.TemporaryDirectory() as tmp:
+        audit_logger = PausedAuditLogger(AuditDatabase(os.path.join(tmp, "audit.db")),
+                                         max_queue_size=5, block_timeout=0.05)
+        audit_logger.running = True
+        for i in range(5):
+            audit_logger.log_system_operation(f"op_{i}", True)
+
+        start = time.monotonic()
+        audit_logger.log_system_operation("late", True)
+        assert time.monotonic() - start >= 0.05
+        assert audit_logger.get_stats()["dropped"] == 1
+
+        audit_logger.resume()
+        audit_logger.block_timeout = 5
+        audit_logger.log_system_operation("after_drain", True)
+        audit_logger.stop_processor()
+        assert audit_logger.get_stats()["written"] == 6
+
+
+def make_event(n, category, user_id, success=True, resource=None, when=None):
+    return AuditEvent(id=f"e{n}", timestamp=(when or datetime.now()).isoformat(), level="info",
+                      category=category, action="login_attempt", user_id=user_id, session_id=None,
+                      resource=resource, details={}, ip_address=None, user_agent=None,
+                      success=success, duration_ms=None, system_info={})
+
+
+def make_rule(rule_id, rule_type, conditions, category="authentication"):
+    return ComplianceRule(id=rule_id, name=rule_id, description="", category=category,
+                          rule_type=rule_type, conditions=conditions, severity="high",
+                          enabled=True, created_at=datetime.now().isoformat())
+
+
+def test_sliding_window_counter_expires_buckets():
+    counter = SlidingWindowCounter(60, buckets=6)
+    for second in range(0, 60, 5):
+        counter.add(1000 + second)
+    assert counter.count(1059) == 12
+    assert counter.count(1090) == 4  # buckets before 1040 have expired
+    counter.add(1000)  # older than the window
+    assert counter.count(1090) == 4
+    assert counter.count(1200) == 0
+
+
+def test_compliance_windows_stream_and_rebuild():
+    """Windowed rules trigger from memory and pick up history after a restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AuditDatabase(os.path.join(tmp, "audit.db"))
+        monitor = ComplianceMonitor(db)
+        monitor.add_rule(make_rule("failed_login_limit", "failed_attempts",
+                                   {"max_failures": 3, "time_window_minutes": 15}))
+        monitor.add_rule(make_rule("data_access_frequency", "data_access_pattern",
+                                   {"sensitive_resources": ["user_data"], "max_resources_per_hour": 2},
+                                   category="data_access"))
+
+        assert monitor.check_events([make_event(i, "authentication", "mallory", success=False)
+                                     for i in range(2)]) == []
+        assert monitor.check_events([make_event(2, "authentication", "alice", success=False)]) == []
+        assert len(monitor.check_event_compliance(make_event(3, "authentication", "mallory", success=False))) == 1
+
+        accesses = [make_event(10 + i, "data_access", "bob", resource=name)
+                    for i, name in enumerate(["orders", "invoices", "orders", "user_data"])]
+        assert len(monitor.check_events(accesses)) == 1  # third distinct resource, sensitive
+
+        # History in audit_events is replayed into fresh windows; stale rows are ignored
+        audit_logger = AuditLogger(db)
+        for _ in range(2):
+            audit_logger.log_authentication("eve", "login_attempt", False)
+        audit_logger.stop_processor()
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("""INSERT INTO audit_events (id, timestamp, level, category, action, user_id, success)
+                        VALUES ('old', ?, 'security', 'authentication', 'login_attempt', 'eve', 0)""",
+                     ((datetime.now() - timedelta(hours=1)).isoformat(),))
+        conn.commit()
+        conn.close()
+
+        restarted = ComplianceMonitor(db)
+        assert set(restarted.rules) == {"failed_login_limit", "data_access_frequency"}
+        assert len(restarted.check_event_compliance(make_event(20, "authentication", "eve", success=False))) == 1
+        conn = sqlite3.connect(db.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM compliance_violations").fetchone()[0] == 3
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_batched_ingest_from_many_threads()
+    test_drop_policy_keeps_security_events()
+    test_block_policy_times_out_then_resumes()
+    test_sliding_window_counter_expires_buckets()
+    test_compliance_windows_stream_and_rebuild()
+    print("✓ Audit tests completed successfully!")
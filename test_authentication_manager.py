@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for AuthenticationManager session validation caching
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from authentication_manager import AuthenticationManager
+
+PASSWORD = "TestPass123!"
+
+
+def make_manager(tmp, **kwargs):
+    manager = AuthenticationManager(os.path.join(tmp, "auth.db"), secret_key="test-secret-key-for-session-cache-tests", **kwargs)
+    manager.register_user("alice", "alice@example.com", PASSWORD)
+    return manager
+
+
+def login(manager):
+    result = manager.authenticate_user("alice", PASSWORD, "127.0.0.1", "test")
+    assert result["success"], result
+    return result["session_id"], result["user"]["user_id"]
+
+
+def stored_last_activity(manager, session_id):
+    conn = sqlite3.connect(manager.db_path)
+    value = conn.execute("SELECT last_activity FROM sessions WHERE session_id = ?",
+                         (session_id,)).fetchone()[0]
+    conn.close()
+    return value
+
+
+def test_cached_validation_coalesces_touches():
+    """Repeat validations are served from memory and touches flush in one batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, session_cache_ttl=60, touch_flush_interval=3600)
+        session_id, user_id = login(manager)
+        created = stored_last_activity(manager, session_id)
+
+        for _ in range(50):
+            result = manager.validate_session(session_id)
+            assert result["success"]
+            assert result["user"]["user_id"] == user_id
+
+        stats = manager.get_session_cache_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 49
+        assert stats["pending_touches"] == 1
+        assert stored_last_activity(manager, session_id) == created
+
+        assert manager.flush_session_touches() == 1
+        assert stored_last_activity(manager, session_id) > created
+        assert manager.flush_session_touches() == 0
+
+
+def test_logout_and_password_change_invalidate():
+    """Logout and password changes take effect immediately in this process"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, session_cache_ttl=60, touch_flush_interval=3600)
+        session_id, _ = login(manager)
+        assert manager.validate_session(session_id)["success"]
+        assert manager.logout_user(session_id)["success"]
+        assert manager.validate_session(session_id)["error"] == "Session or user is inactive"
+
+        session_a, user_id = login(manager)
+        session_b, _ = login(manager)
+        assert manager.validate_session(session_a)["success"]
+        assert manager.validate_session(session_b)["success"]
+        assert manager.get_session_cache_stats()["entries"] == 2
+
+        assert manager.update_password(user_id, PASSWORD, "NewPass456!")["success"]
+        assert manager.get_session_cache_stats()["entries"] == 0
+
+        # Deactivating the user directly is picked up on the next database read
+        conn = sqlite3.connect(manager.db_path)
+        conn.execute("UPDATE users SET active = 0 WHERE user_id = ?", (user_id,))
+        conn.commit()
+        conn.close()
+        assert not manager.validate_session(session_a)["success"]
+        manager.flush_session_touches()
+
+
+def test_expired_session_is_not_served_from_cache():
+    """Sessions past the timeout are expired even when cached"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, session_cache_ttl=60, touch_flush_interval=3600)
+        session_id, _ = login(manager)
+        assert manager.validate_session(session_id)["success"]
+
+        stale = datetime.now() - timedelta(seconds=manager.session_timeout + 60)
+        manager._session_cache[session_id]["last_activity_time"] = stale
+        manager._pending_touches.clear()
+        conn = sqlite3.connect(manager.db_path)
+        conn.execute("UPDATE sessions SET last_activity = ? WHERE session_id = ?",
+                     (stale.isoformat(), session_id))
+        conn.commit()
+        conn.close()
+
+        assert manager.validate_session(session_id)["error"] == "Session expired"
+        assert manager.get_session_cache_stats()["entries"] == 0
+
+
+def test_write_through_without_cache():
+    """With caching disabled every validation reads and writes the database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, session_cache_ttl=0, touch_flush_interval=0)
+        session_id, _ = login(manager)
+        created = stored_last_activity(manager, session_id)
+        assert manager.validate_session(session_id)["success"]
+        assert manager.validate_session(session_id)["success"]
+
+        stats = manager.get_session_cache_stats()
+        assert stats["hits"] == 0 and stats["misses"] == 2
+        assert stats["pending_touches"] == 0
+        assert stored_last_activity(manager, session_id) > created
+
+
+if __name__ == "__main__":
+    test_cached_validation_coalesces_touches()
+    test_logout_and_password_change_invalidate()
+    test_expired_session_is_not_served_from_cache()
+    test_write_through_without_cache()
+    print("✓ Authentication manager tests completed successfully!")
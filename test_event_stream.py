@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for the dashboard event broker (SSE fan-out)
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, Response, request
+from event_stream import EventBroker
+
+
+def parse_sse(text):
+    """Split an event-stream body into (id, event, data) tuples"""
+    events = []
+    for block in text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_fan_out_and_channels():
+    """Each event is published once and delivered to matching subscribers"""
+    broker = EventBroker(heartbeat_seconds=0.01)
+    everything = broker.subscribe()
+    status_only = broker.subscribe(["status"])
+
+    broker.publish("notifications", "notification", {"title": "hello"})
+    broker.publish("status", "status", {"queue_length": 2})
+
+    assert [e["type"] for e in everything.get(0)] == ["notification", "status"]
+    assert [e["data"] for e in status_only.get(0)] == [{"queue_length": 2}]
+    assert broker.get_stats()["delivered"] == 3
+    everything.close()
+    status_only.close()
+    assert broker.get_stats()["subscribers"] == 0
+
+
+def test_resume_from_last_event_id():
+    """A reconnecting client receives exactly the events it missed"""
+    broker = EventBroker(replay_size=5)
+    ids = [broker.publish("status", "status", {"n": i}) for i in range(4)]
+
+    resumed = broker.subscribe(last_event_id=ids[1])
+    assert [e["data"]["n"] for e in resumed.get(0)] == [2, 3]
+
+    for i in range(4, 10):
+        broker.publish("status", "status", {"n": i})
+    stale = broker.subscribe(last_event_id=ids[0])
+    reset = stale.get(0)
+    assert [e["type"] for e in reset] == ["reset"]
+    assert reset[0]["id"] == broker.last_event_id()
+
+    # An id from before a server restart is also reset
+    assert EventBroker().subscribe(last_event_id=42).get(0)[0]["type"] == "reset"
+
+
+def test_slow_client_is_disconnected_without_gaps():
+    """Overflowing clients are cut off; queued events stay contiguous"""
+    broker = EventBroker(client_queue_size=3, heartbeat_seconds=0.01)
+    stream = broker.stream(["status"])
+    assert next(stream) == "retry: 3000\n\n"
+    for i in range(6):
+        broker.publish("status", "status", {"n": i})
+
+    body = "".join(stream)
+    delivered = parse_sse(body)
+    assert [data["n"] for _, _, data in delivered] == [0, 1, 2]
+    assert broker.get_stats()["overflows"] == 1
+
+    # Resuming from the last delivered id picks up the rest
+    resumed = broker.subscribe(["status"], last_event_id=delivered[-1][0])
+    assert [e["data"]["n"] for e in resumed.get(0)] == [3, 4, 5]
+
+
+def test_concurrent_publishers_deliver_ids_in_order():
+    """Queues receive ids in publish order, so resuming never skips one"""
+    broker = EventBroker(client_queue_size=10000)
+    subscription = broker.subscribe()
+
+    def publish_many():
+        for i in range(500):
+            broker.publish("status", "status", {"n": i})
+
+    threads = [threading.Thread(target=publish_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [event["id"] for event in subscription.get(0)]
+    assert ids == list(range(1, 2001))
+
+
+def test_stream_ends_before_worker_timeout():
+    """Streams close after stream_seconds even while idle"""
+    broker = EventBroker(heartbeat_seconds=10, stream_seconds=0.2)
+    started = time.monotonic()
+    body = "".join(broker.stream())
+    assert time.monotonic() - started < 1
+    assert body.startswith("retry: 3000")
+    assert broker.get_stats()["subscribers"] == 0
+
+
+def test_sse_endpoint_streams_and_resumes():
+    """Flask responses stream events and honour Last-Event-ID"""
+    broker = EventBroker(heartbeat_seconds=0.05)
+    app = Flask(__name__)
+
+    @app.route("/events")
+    def events():
+        last_event_id = request.headers.get("Last-Event-ID")
+        return Response(broker.stream(None, int(last_event_id) if last_event_id else None, max_seconds=0.3),
+                        mimetype="text/event-stream")
+
+    first = broker.publish("notifications", "notification", {"title": "one"})
+    timer = threading.Timer(0.1, broker.publish, ("status", "status", {"agent_status": "working"}))
+    timer.start()
+    body = app.test_client().get("/events", headers={"Last-Event-ID": str(first - 1)}).get_data(as_text=True)
+    timer.join()
+
+    events = parse_sse(body)
+    assert [(event, data) for _, event, data in events] == [
+        ("notification", {"title": "one"}), ("status", {"agent_status": "working"})]
+    assert ": keepalive" in body
+
+
+def test_agent_publishes_status_deltas():
+    """MITOAgent sends only the status fields that changed"""
+    from mito_agent import MITOAgent
+
+    agent = MITOAgent()
+    deltas = []
+    agent.add_status_listener(deltas.append)
+    agent.add_task("noop", lambda: None)
+    agent.execute_next_task()
+
+    assert deltas[0]["queue_length"] == 1 and "capabilities" in deltas[0]
+    assert deltas[1] == {"agent_status": "working", "current_task": "noop", "queue_length": 0}
+    assert deltas[2] == {"agent_status": "idle", "current_task": None}
+    agent._publish_status()
+    assert len(deltas) == 3
+
+
+if __name__ == "__main__":
+    test_fan_out_and_channels()
+    test_resume_from_last_event_id()
+    test_slow_client_is_disconnected_without_gaps()
+    test_concurrent_publishers_deliver_ids_in_order()
+    test_stream_ends_before_worker_timeout()
+    test_sse_endpoint_streams_and_resumes()
+    test_agent_publishes_status_deltas()
+    print("✓ Event stream tests completed successfully!")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Test script for the MITO memory manager
+"""
+
+import sys
+import os
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory_manager import MITOMemoryManager
+
+
+def test_session_scoped_messages_are_isolated():
+    """Concurrent sessions sharing one manager never see each other's messages"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'))
+
+        def converse(session_id):
+            for i in range(20):
+                assert manager.store_session_message(session_id, "user", f"{session_id}-{i}")
+
+        threads = [threading.Thread(target=converse, args=(f"s{n}",)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for n in range(8):
+            context = manager.get_session_context(f"s{n}", limit=50)
+            assert len(context) == 20
+            assert all(entry['content'].startswith(f"s{n}-") for entry in context)
+
+        assert manager.pool._created <= manager.pool.size
+        manager.close()
+
+
+def test_wal_mode_and_context_prompt():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'))
+        with manager.pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        manager.store_session_message("abc", "user", "How do I sort a list?")
+        manager.store_session_message("abc", "mito", "Use sorted().")
+        prompt = manager.build_session_prompt("abc", "And in reverse?")
+        assert "User: How do I sort a list?" in prompt
+        assert "MITO: Use sorted()." in prompt
+        assert prompt.endswith("Current message: And in reverse?")
+        assert manager.build_session_prompt("empty", "hi") == "hi"
+
+        # Legacy single-session API still works
+        manager.start_session("legacy")
+        manager.store_conversation("user", "hello")
+        assert manager.get_conversation_context()[0]['content'] == "hello"
+        manager.close()
+
+
+def test_write_behind_batches_and_reads_own_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'), flush_interval=60)
+        for i in range(5):
+            manager.store_session_message("wb", "user", f"m{i}")
+
+        # Not yet on disk, but visible to readers
+        with manager.pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM conversation_memory").fetchone()[0] == 0
+        assert [e['content'] for e in manager.get_session_context("wb", 3)] == ["m2", "m3", "m4"]
+
+        assert manager.flush() == 5
+        assert [e['content'] for e in manager.get_session_context("wb", 10)] == [f"m{i}" for i in range(5)]
+        manager.close()
+
+
+def test_failed_flush_keeps_rows_in_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'), flush_interval=60)
+        manager.store_session_message("ff", "user", "first")
+        with manager.pool.connection() as conn:
+            conn.execute("DROP TRIGGER trg_conversation_count_insert")
+            conn.execute("""
+                CREATE TRIGGER trg_conversation_count_insert AFTER INSERT ON conversation_memory
+                BEGIN SELECT RAISE(ABORT, 'disk full'); END
+            """)
+        assert manager.flush() == 0
+        manager.store_session_message("ff", "user", "second")
+        # Rows from the failed batch are still visible, once, ahead of newer ones
+        assert [e['content'] for e in manager.get_session_context("ff", 10)] == ["first", "second"]
+
+        with manager.pool.connection() as conn:
+            conn.execute("DROP TRIGGER trg_conversation_count_insert")
+        manager.init_database()
+        assert manager.flush() == 2
+        assert [e['content'] for e in manager.get_session_context("ff", 10)] == ["first", "second"]
+        manager.close()
+
+
+def test_pending_rows_are_capped_while_database_is_down():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'), flush_interval=60, max_pending=3)
+        with manager.pool.connection() as conn:
+            conn.execute("DROP TRIGGER trg_conversation_count_insert")
+            conn.execute("""
+                CREATE TRIGGER trg_conversation_count_insert AFTER INSERT ON conversation_memory
+                BEGIN SELECT RAISE(ABORT, 'disk full'); END
+            """)
+        for i in range(4):
+            manager.store_session_message("cap", "user", f"m{i}")
+        assert manager.flush() == 0
+        manager.store_session_message("cap", "user", "m4")
+        # The oldest rows go first, and every one dropped is counted
+        assert [e['content'] for e in manager.get_session_context("cap", 10)] == ["m2", "m3", "m4"]
+        assert manager.dropped_rows == 2
+
+        with manager.pool.connection() as conn:
+            conn.execute("DROP TRIGGER trg_conversation_count_insert")
+        manager.init_database()
+        writer = manager._writer_thread
+        manager.close()
+        assert not writer.is_alive()
+        assert manager._pending_rows == []
+
+
+def test_concurrent_flush_never_hides_or_duplicates_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'), flush_interval=60)
+        done = threading.Event()
+        errors = []
+
+        def writer():
+            for i in range(200):
+                manager.store_session_message("race", "user", f"r{i}")
+                if i % 10 == 0:
+                    manager.flush()
+            done.set()
+
+        def reader():
+            while not done.is_set():
+                contents = [e['content'] for e in manager.get_session_context("race", 500)]
+                if len(contents) != len(set(contents)):
+                    errors.append("duplicate")
+                expected = [f"r{i}" for i in range(len(contents))]
+                if contents != expected:
+                    errors.append("gap")
+
+        threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        manager.close()
+
+
+def test_retention_prunes_with_bounded_cost():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = MITOMemoryManager(os.path.join(tmp, 'memory.db'), write_behind=False)
+        for i in range(30):
+            manager.store_session_message("chatty", "user", f"c{i}")
+        for i in range(5):
+            manager.store_session_message("pinned", "user", f"p{i}", retention_priority=9)
+
+        result = manager.prune_conversations(max_per_session=10, batch_limit=15)
+        assert result['deleted'] == 15
+        result = manager.prune_conversations(max_per_session=10, batch_limit=15)
+        assert result['deleted'] == 5
+        assert [e['content'] for e in manager.get_session_context("chatty", 50)] == [f"c{i}" for i in range(20, 30)]
+
+        with manager.pool.connection() as conn:
+            counts = dict(conn.execute("SELECT session_id, message_count FROM conversation_counts").fetchall())
+            total = conn.execute("SELECT message_count FROM conversation_totals").fetchone()[0]
+        assert counts == {"chatty": 10, "pinned": 5} and total == 15
+
+        # Global cap removes ordinary messages before high-priority ones
+        manager.prune_conversations(max_total=6)
+        assert len(manager.get_session_context("pinned", 50)) == 5
+        assert len(manager.get_session_context("chatty", 50)) == 1
+        manager.close()
+
+
+if __name__ == "__main__":
+    test_session_scoped_messages_are_isolated()
+    test_wal_mode_and_context_prompt()
+    test_write_behind_batches_and_reads_own_writes()
+    test_failed_flush_keeps_rows_in_order()
+    test_pending_rows_are_capped_while_database_is_down()
+    test_concurrent_flush_never_hides_or_duplicates_rows()
+    test_retention_prunes_with_bounded_cost()
+    print("✓ Memory manager tests completed successfully!")
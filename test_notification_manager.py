@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded, SQLite-backed NotificationManager
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from notification_manager import NotificationManager, NotificationType
+
+
+def make_manager(tmp, **kwargs):
+    # A legacy mito_notifications.json is looked up in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        return NotificationManager(os.path.join(tmp, "notifications.db"), **kwargs)
+    finally:
+        os.chdir(cwd)
+
+
+def test_ring_buffer_and_unread_index():
+    """Memory holds the newest notifications; the store keeps all of them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, capacity=100, flush_interval=3600)
+        ids = [manager.add_notification(f"Note {i}", f"message {i}") for i in range(250)]
+        manager.mark_as_read(ids[-1])
+        manager.mark_as_read(ids[0])  # Already evicted from the buffer
+
+        assert len(manager.notifications) == 100
+        assert manager.notifications[0].title == "Note 150"
+        unread = manager.get_unread_notifications()
+        assert len(unread) == 99 and ids[-1] not in {n.id for n in unread}
+
+        summary = manager.get_notification_summary()
+        assert summary["total_notifications"] == 250
+        assert summary["latest_notifications"][0]["title"] == "Note 249"
+
+        assert manager.flush() == 252
+        assert manager.get_notification_summary()["unread_count"] == 248
+        manager.close()
+
+        reloaded = make_manager(tmp, capacity=100, flush_interval=3600)
+        assert len(reloaded.notifications) == 100
+        assert reloaded.get_notification_summary()["unread_count"] == 248
+        new_id = reloaded.add_notification("After restart", "m")
+        assert reloaded.notifications[-1].seq == 251 and new_id.endswith("_251")
+        reloaded.close()
+
+
+def test_cursor_paging_spans_buffer_and_database():
+    """Cursor pages walk newest to oldest across memory and SQLite"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, capacity=30, flush_interval=3600)
+        for i in range(95):
+            manager.create_notification(NotificationType.TASK_START, f"Task {i}", "m", "low")
+        manager.create_notification("system_alert", "Alert", "string type", "urgent")
+        assert manager.notifications[-1].type == NotificationType.SYSTEM_ALERT
+        for n in manager.notifications[:10]:
+            manager.mark_as_read(n.id)
+
+        seen, cursor = [], None
+        while True:
+            page = manager.get_notifications_page(cursor, limit=20)
+            seen.extend(n.title for n in page["notifications"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == ["Alert"] + [f"Task {i}" for i in reversed(range(95))]
+
+        unread, cursor = [], None
+        while True:
+            page = manager.get_notifications_page(cursor, limit=25, unread_only=True)
+            unread.extend(n.seq for n in page["notifications"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(unread) == 86 and unread == sorted(unread, reverse=True)
+        manager.close()
+
+
+def test_legacy_json_import_and_preferences():
+    """An existing mito_notifications.json is imported once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "mito_notifications.json"), "w") as f:
+            json.dump({
+                "notifications": [
+                    {"id": f"notif_1_{i}", "type": "system_alert", "title": f"Old {i}",
+                     "message": "m", "timestamp": f"2025-06-20T10:00:{i:02d}",
+                     "priority": "medium", "read": i % 2 == 0, "data": {"i": i}}
+                    for i in range(10)
+                ],
+                "preferences": {"function_notifications": True}
+            }, f)
+
+        manager = make_manager(tmp, capacity=5, flush_interval=3600)
+        assert manager.user_preferences["function_notifications"] is True
+        assert [n.title for n in manager.notifications] == [f"Old {i}" for i in range(5, 10)]
+        assert manager.notifications[-1].data == {"i": 9}
+        assert manager.get_notification_summary()["unread_count"] == 5
+
+        manager.clear_old_notifications(days=1)
+        assert manager.notifications == []
+        assert manager.get_notification_summary()["total_notifications"] == 0
+        manager.close()
+
+
+if __name__ == "__main__":
+    test_ring_buffer_and_unread_index()
+    test_cursor_paging_spans_buffer_and_database()
+    test_legacy_json_import_and_preferences()
+    print("✓ Notification manager tests completed successfully!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled AI provider transport
+Runs against a local stand-in HTTP server
+"""
+
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from provider_transport import ProviderTransport
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible chat completions endpoint"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+        if payload.get("stream"):
+            # OpenAI-compatible SSE: one chunk per word, then [DONE]
+            lines = [
+                "data: " + json.dumps({"choices": [{"delta": {"content": word}}]})
+                for word in ["echo:", " ", prompt]
+            ]
+            body = ("\n\n".join(lines + ["data: [DONE]"]) + "\n\n").encode()
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps({
+                "choices": [{"message": {"content": f"echo: {prompt}"}}]
+            }).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+def test_connection_reuse():
+    """Sequential requests share one keep-alive connection"""
+    server, url = start_stand_in_server()
+    transport = ProviderTransport(pool_size=2)
+    try:
+        for i in range(10):
+            response = transport.post("llama", url, json={"messages": [{"content": str(i)}]})
+            assert response.json()["choices"][0]["message"]["content"] == f"echo: {i}"
+
+        stats = transport.get_stats()["llama"]
+        assert stats["requests"] == 10
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 9
+        assert stats["p50_latency_ms"] is not None
+    finally:
+        transport.close()
+        server.shutdown()
+
+
+def test_per_provider_timeouts():
+    """Per-provider timeouts override defaults"""
+    transport = ProviderTransport(timeouts={"claude": (1.0, 2.0)})
+    assert transport.get_timeout("claude") == (1.0, 2.0)
+    assert transport.get_timeout("openai") == (5.0, 30.0)
+    assert transport.get_session("claude") is transport.get_session("claude")
+    assert transport.get_session("claude") is not transport.get_session("openai")
+    transport.close()
+
+
+def test_llama_generate_uses_pool():
+    """llama_generate goes through the shared transport"""
+    import ai_providers
+    from provider_transport import get_transport
+
+    server, url = start_stand_in_server()
+    old_env = {k: os.environ.get(k) for k in ("GROQ_API_KEY", "LLAMA_API_URL")}
+    os.environ["GROQ_API_KEY"] = "test-key"
+    os.environ["LLAMA_API_URL"] = url
+    try:
+        assert ai_providers.llama_generate("hello") == "echo: hello"
+        assert ai_providers.llama_generate("again") == "echo: again"
+        stats = get_transport().get_stats()["llama"]
+        assert stats["connections_reused"] >= 1
+    finally:
+        for key, value in old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        get_transport().close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_per_provider_timeouts()
+    test_llama_generate_uses_pool()
+    print("✓ Provider transport tests completed successfully!")
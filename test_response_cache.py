@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the AI response cache
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from response_cache import ResponseCache, normalize_prompt
+from api_usage import APIUsageTracker
+
+
+def test_exact_match_on_normalized_prompt():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, near_duplicates=False)
+    cache.put("Generate Python code for a web scraper", "openai", "code!", served_by="llama")
+
+    hit = cache.get("  generate python   code for a web scraper? ", "openai")
+    assert hit['response'] == "code!" and hit['provider'] == "llama"
+    assert hit['match_type'] == "exact"
+    # Provider and context are part of the key
+    assert cache.get("generate python code for a web scraper", "claude") is None
+    assert cache.get("generate python code for a web scraper", "openai", "User: hi") is None
+    assert normalize_prompt("Hello  World!!") == "hello world"
+
+
+def test_near_duplicate_hits():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, near_duplicates=True,
+                          similarity_threshold=0.75)
+    cache.put("generate python code for sorting a list", "openai", "sorted()")
+
+    hit = cache.get("please generate python code for sorting a list", "openai")
+    assert hit['response'] == "sorted()" and hit['match_type'] == "near_duplicate"
+    assert cache.get("generate rust code for parsing json", "openai") is None
+
+
+def test_ttl_and_lru_eviction():
+    cache = ResponseCache(max_entries=2, ttl_seconds=0.05, near_duplicates=False)
+    cache.put("one", "openai", "1")
+    cache.put("two", "openai", "2")
+    assert cache.get("one", "openai")  # refresh "one"
+    cache.put("three", "openai", "3")  # evicts least recently used "two"
+    assert cache.get("two", "openai") is None
+    assert cache.get("one", "openai")['response'] == "1"
+    assert cache.get_stats()['evictions'] == 1
+
+    time.sleep(0.06)
+    assert cache.get("three", "openai") is None
+    assert cache.get_stats()['expired'] >= 1
+
+
+def test_hits_feed_usage_tracker():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = APIUsageTracker(log_file=os.path.join(tmp, 'usage.log'))
+        cache = ResponseCache(max_entries=10, ttl_seconds=60, usage_tracker=tracker)
+
+        assert cache.get("explain recursion", "openai") is None
+        cache.put("explain recursion", "openai", "x" * 4000, model="gpt-4")
+        assert cache.get("explain recursion", "openai")
+
+        summary = tracker.get_cache_summary()
+        assert summary['hits'] == 1 and summary['misses'] == 1
+        # ~4 prompt and 1000 output tokens at the cached model's (gpt-4) price
+        assert summary['estimated_savings'] == 0.06012
+        # Cache lookups are not counted as provider requests
+        assert tracker.get_usage_summary()['total_requests'] == 0
+
+
+def test_cache_events_are_aggregated_in_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, 'usage.log')
+        tracker = APIUsageTracker(log_file=log_file)
+        tracker.cache_flush_interval = 3600
+        cache = ResponseCache(max_entries=10, ttl_seconds=60, usage_tracker=tracker)
+        # Requested from openai, served by the claude fallback
+        cache.put("summarize this", "openai", "y" * 400, served_by="claude", model="claude-3-opus-20240229")
+
+        for _ in range(50):
+            assert cache.get("summarize this", "openai")
+            assert cache.get("something else", "openai") is None
+        assert os.path.getsize(log_file) == 0
+
+        assert tracker.flush_cache_events() == 2
+        with open(log_file) as f:
+            assert len(f.readlines()) == 2
+        summary = tracker.get_cache_summary()
+        assert summary['hits'] == 50 and summary['misses'] == 50
+        # Priced as claude-3-opus: 50 hits x (3 prompt + 100 output tokens)
+        assert summary['estimated_savings'] == 0.37725
+
+
+if __name__ == "__main__":
+    test_exact_match_on_normalized_prompt()
+    test_near_duplicate_hits()
+    test_ttl_and_lru_eviction()
+    test_hits_feed_usage_tracker()
+    test_cache_events_are_aggregated_in_memory()
+    print("✓ Response cache tests completed successfully!")
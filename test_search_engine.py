@@ -97,6 +97,57 @@ def test_flask_endpoints():
     
     return True
 
+
+def test_incremental_batches_match_single_batch():
+    """Adding documents in batches gives the same scores as one batch"""
+    docs = [
+        "Python is a programming language used for web development",
+        "Flask is a lightweight web framework for Python",
+        "Machine learning algorithms learn from data",
+        "Data visualization presents complex information",
+        "Python data science uses machine learning"
+    ]
+    single = SearchEngine()
+    single.add_documents(docs)
+    batched = SearchEngine()
+    batched.add_documents(docs[:2])
+    batched.search("python")
+    batched.add_documents(docs[2:4])
+    batched.add_documents(docs[4:])
+
+    for query in ["python web", "machine learning data", "unknown words"]:
+        sims_a, idx_a = single.search(query, k=3)
+        sims_b, idx_b = batched.search(query, k=3)
+        assert sims_a.shape == (1, 3)
+        assert abs(sims_a - sims_b).max() < 1e-12
+        assert list(idx_a[0]) == list(idx_b[0]) or query == "unknown words"
+
+    sims, idx = single.search("flask framework", k=10)
+    assert idx[0][0] == 1
+    assert list(sims[0]) == sorted(sims[0], reverse=True)
+    assert len(idx[0]) == len(docs)
+
+
+def test_endpoint_contracts():
+    """/add_documents and /search keep their request and response shapes"""
+    import search_engine
+
+    search_engine.search_engine = SearchEngine()
+    client = search_engine.app.test_client()
+
+    response = client.post('/add_documents', json={'documents': ["alpha beta", "beta gamma", "delta"]})
+    assert response.status_code == 200
+    assert response.get_json() == {'message': 'Documents added successfully'}
+
+    response = client.post('/search', json={'query': 'gamma', 'k': 2})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['indices'][0][0] == 1
+    assert len(body['similarities'][0]) == 2
+
+    response = client.post('/search', json={})
+    assert response.status_code == 500
+
 if __name__ == "__main__":
     try:
         # Run tests
@@ -106,6 +157,8 @@ if __name__ == "__main__":
         
         success1 = test_search_engine()
         success2 = test_flask_endpoints()
+        test_incremental_batches_match_single_batch()
+        test_endpoint_contracts()
         
         print("\n" + "=" * 60)
         if success1 and success2:
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script for the security manager: RBAC decisions and access log
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, session
+from security_manager import RBACManager, SecretVault
+
+
+def test_rbac_decisions_match_permission_table():
+    """Compiled bitsets agree with the permission table"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rbac = RBACManager(os.path.join(tmp, "rbac.db"))
+        try:
+            roles = {role for roles in rbac.permissions.values() for role in roles} | {'guest'}
+            for permission, allowed in rbac.permissions.items():
+                for role in roles:
+                    assert rbac.check_permission("u1", role, permission) == (role in allowed)
+            assert not rbac.check_permission("u1", "admin", "unknown_permission")
+
+            rbac.update_permission('read_audit', ['analyst'])
+            assert rbac.check_permission("u1", "analyst", "read_audit")
+            assert not rbac.check_permission("u1", "admin", "read_audit")
+        finally:
+            rbac.close()
+
+
+def test_rbac_log_is_batched_and_complete():
+    """Queued checks are written in batches and all show up in the audit log"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rbac = RBACManager(os.path.join(tmp, "rbac.db"))
+        try:
+            for i in range(1200):
+                rbac.check_permission(f"user{i % 7}", "developer", "write_code", f"repo{i}")
+            rbac.check_permission("intruder", "guest", "manage_secrets")
+
+            log = rbac.get_rbac_audit_log(days=1)
+            assert len(log) == 1000
+            assert log[0]['user_id'] == "intruder" and not log[0]['granted']
+            assert log[0]['ip_address'] == 'localhost'
+
+            stats = rbac.get_log_stats()
+            assert stats['written'] == 1201
+            assert stats['queue_depth'] == 0
+            assert stats['flushes'] < 1201
+        finally:
+            rbac.close()
+
+
+def test_require_permission_logs_one_decision():
+    """Guarded routes record one row with the request context"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rbac = RBACManager(os.path.join(tmp, "rbac.db"))
+        app = Flask(__name__)
+        app.secret_key = "test"
+
+        @rbac.require_permission('manage_users', resource='users')
+        def manage_users():
+            return "ok"
+
+        try:
+            with app.test_request_context("/", headers={"User-Agent": "pytest"},
+                                          environ_base={"REMOTE_ADDR": "10.0.0.5"}):
+                session['user_id'] = "alice"
+                session['user_role'] = "admin"
+                assert manage_users() == "ok"
+                session['user_id'] = "bob"
+                session['user_role'] = "analyst"
+                assert manage_users()[1] == 403
+
+            log = rbac.get_rbac_audit_log()
+            assert [(row['user_id'], row['action']) for row in log] == [("bob", "denied"), ("alice", "granted")]
+            assert log[0]['ip_address'] == "10.0.0.5"
+            assert log[0]['user_agent'] == "pytest"
+        finally:
+            rbac.close()
+
+
+def test_full_queue_blocks_then_drops_grants():
+    """Grants are dropped after the block timeout; denials are kept"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rbac = RBACManager(os.path.join(tmp, "rbac.db"), max_queue_size=10, block_timeout=0.05)
+        try:
+            with rbac._flush_lock:
+                # Writer is held off, so the queue cannot drain
+                for i in range(12):
+                    rbac.check_permission("u1", "admin", "system_admin")
+                assert rbac.get_log_stats()['dropped'] >= 1
+        finally:
+            rbac.close()
+        assert rbac.get_log_stats()['written'] + rbac.get_log_stats()['dropped'] == 12
+
+
+def test_failed_log_batch_is_requeued():
+    """A batch that fails to write is retried, not lost"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rbac = RBACManager(os.path.join(tmp, "rbac.db"))
+        try:
+            with rbac._flush_lock:
+                for i in range(3):
+                    rbac.check_permission(f"u{i}", "admin", "system_admin")
+                rbac._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            assert rbac.flush_log() == 0
+            stats = rbac.get_log_stats()
+            assert stats['failed'] == 3 and stats['queue_depth'] == 3
+
+            assert rbac.flush_log() == 3
+            assert [row['user_id'] for row in rbac.get_rbac_audit_log()] == ["u2", "u1", "u0"]
+        finally:
+            rbac.close()
+
+
+def test_permission_table_stays_compiled():
+    """The table cannot be edited in place, and assignment recompiles"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rbac = RBACManager(os.path.join(tmp, "rbac.db"))
+        try:
+            try:
+                rbac.permissions['read_audit'] = ['guest']
+                assert False, "permission table should be read-only"
+            except TypeError:
+                pass
+            assert rbac.check_permission("u1", "admin", "read_audit")
+
+            rbac.permissions = {'read_audit': ['guest']}
+            assert rbac.check_permission("u1", "guest", "read_audit")
+            assert not rbac.check_permission("u1", "admin", "read_audit")
+        finally:
+            rbac.close()
+
+
+def make_vault(tmp, **kwargs):
+    # The master key file is created in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        return SecretVault(os.path.join(tmp, "vault.db"), **kwargs)
+    finally:
+        os.chdir(cwd)
+
+
+def test_vault_cache_and_deferred_counters():
+    """Repeat reads are served from memory; counters are flushed in aggregate"""
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = make_vault(tmp, cache_ttl=60, flush_interval=3600)
+        assert vault.store_secret("openai_key", "sk-1", "OpenAI")
+        for _ in range(25):
+            assert vault.get_secret("openai_key") == "sk-1"
+        assert vault.get_secret("missing") is None
+
+        stats = vault.get_cache_stats()
+        assert stats['hits'] == 24 and stats['misses'] == 2
+        assert stats['pending_log_rows'] == 26
+
+        listed = {secret['name']: secret for secret in vault.list_secrets()}
+        assert listed["openai_key"]['access_count'] == 25
+        assert listed["openai_key"]['accessed_at'] is not None
+        assert vault.get_cache_stats()['pending_log_rows'] == 0
+
+
+def test_vault_rotation_invalidates_cache():
+    """Rotation and re-storing a secret evict the decrypted value"""
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = make_vault(tmp, cache_ttl=60, flush_interval=3600)
+        vault.store_secret("groq_key", "old", "Groq", ["llm"])
+        assert vault.get_secret("groq_key") == "old"
+
+        assert vault.rotate_secret("groq_key", "new")
+        assert vault.get_secret("groq_key") == "new"
+        assert vault.list_secrets()[0]['tags'] == ["llm"]
+        assert not vault.rotate_secret("unknown", "value")
+
+        vault.store_secret("groq_key", "newer")
+        assert vault.get_secret("groq_key") == "newer"
+        vault.flush_access_stats()
+
+
+def test_vault_bulk_lookup():
+    """get_secrets fetches many secrets at once and reports missing ones"""
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = make_vault(tmp, cache_ttl=60, flush_interval=3600)
+        names = [f"key_{i}" for i in range(700)]
+        for name in names:
+            vault.store_secret(name, name.upper())
+
+        values = vault.get_secrets(names + ["nope"])
+        assert len(values) == 701
+        assert values["key_699"] == "KEY_699"
+        assert values["nope"] is None
+        assert vault.get_cache_stats()['entries'] == 700
+
+        assert vault.get_secrets(["key_1", "key_2"]) == {"key_1": "KEY_1", "key_2": "KEY_2"}
+        assert vault.get_cache_stats()['hits'] == 2
+        vault.flush_access_stats()
+
+
+if __name__ == "__main__":
+    test_rbac_decisions_match_permission_table()
+    test_rbac_log_is_batched_and_complete()
+    test_require_permission_logs_one_decision()
+    test_full_queue_blocks_then_drops_grants()
+    test_failed_log_batch_is_requeued()
+    test_permission_table_stays_compiled()
+    test_vault_cache_and_deferred_counters()
+    test_vault_rotation_invalidates_cache()
+    test_vault_bulk_lookup()
+    print("✓ Security manager tests completed successfully!")
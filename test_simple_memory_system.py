@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test script for the journaled SimpleMemorySystem stores
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from simple_memory_system import MemoryStore, KnowledgeGraph, VectorMemory, KeywordIndex
+
+
+def test_memory_store_appends_and_replays():
+    """Writes go to the journal and survive a restart without compaction"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory_store.json")
+        store = MemoryStore(path)
+        first = store.store_memory("python async patterns", "fact", {}, 0.8, ["python"])
+        second = store.store_memory("flask routing notes", "fact", {})
+
+        assert not os.path.exists(path)
+        with open(path + ".journal") as f:
+            assert len(f.readlines()) == 2
+
+        reloaded = MemoryStore(path)
+        assert set(reloaded.memories) == {first, second}
+        assert reloaded.memories[first].tags == ["python"]
+
+
+def test_reads_do_not_write():
+    """recall_memory only marks entries dirty; flush persists access counts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory_store.json")
+        store = MemoryStore(path)
+        memory_id = store.store_memory("remember me", "fact", {})
+        size = os.path.getsize(path + ".journal")
+
+        for _ in range(3):
+            store.recall_memory(memory_id)
+        assert os.path.getsize(path + ".journal") == size
+
+        store.flush()
+        assert MemoryStore(path).memories[memory_id].access_count == 3
+
+
+def test_compaction_and_torn_write():
+    """Compaction rewrites the snapshot; a torn trailing record is ignored"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory_store.json")
+        store = MemoryStore(path)
+        store.journal.compact_threshold = 5
+        ids = [store.store_memory(f"memory {i}", "fact", {}) for i in range(7)]
+
+        with open(path) as f:
+            assert len(json.load(f)["snapshot"]["memories"]) == 5
+        assert store.journal.pending_ops == 2
+
+        with open(path + ".journal", "a") as f:
+            f.write('{"op": "put", "memory": {"id": "tor')
+
+        reloaded = MemoryStore(path)
+        assert set(reloaded.memories) == set(ids)
+
+
+def test_writes_after_torn_record_survive_reopen():
+    """The torn tail is truncated, so records appended after it are replayed later"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory_store.json")
+        first = MemoryStore(path).store_memory("before the crash", "fact", {})
+        with open(path + ".journal", "a") as f:
+            f.write('{"op": "put", "memory": {"id": "tor')
+
+        reopened = MemoryStore(path)
+        later = [reopened.store_memory(f"after the crash {i}", "fact", {}) for i in range(2)]
+
+        again = MemoryStore(path)
+        assert set(again.memories) == {first, *later}
+        assert set(MemoryStore(path).memories) == {first, *later}
+
+
+def test_replay_skips_records_in_snapshot():
+    """Records the snapshot already covers are not replayed after a crash mid-compaction"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge_graph.json")
+        graph = KnowledgeGraph(path)
+        a = graph.add_node("python", "language")
+        b = graph.add_node("flask", "framework")
+        graph.connect_nodes(a, b)
+        with open(path + ".journal") as f:
+            journal = f.read()
+        assert [json.loads(line)["seq"] for line in journal.splitlines()] == list(range(1, 7))
+
+        # The snapshot was replaced but the process died before truncating the journal
+        graph.save_graph()
+        with open(path + ".journal", "w") as f:
+            f.write(journal)
+        # A pre-sequence-number record is still replayed
+        with open(path + ".journal", "a") as f:
+            f.write(json.dumps({"op": "put_connections", "node_id": b, "connections": []}) + "\n")
+
+        reloaded = KnowledgeGraph(path)
+        assert reloaded.journal.snapshot_seq == 6 and reloaded.journal.pending_ops == 1
+        assert reloaded.connections[a] == [b] and reloaded.connections[b] == []
+
+        c = reloaded.add_node("django", "framework")
+        with open(path + ".journal") as f:
+            assert json.loads(f.readlines()[-1])["seq"] == 7
+        assert c in KnowledgeGraph(path).nodes
+
+
+def test_legacy_json_migrates():
+    """An existing pretty-printed JSON file loads as the initial snapshot"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vector_memory.json")
+        legacy = {"old": {"id": "old", "content": "legacy flask memory", "memory_type": "fact",
+                          "metadata": {}, "keywords": ["legacy", "flask", "memory"],
+                          "timestamp": "2025-01-01T00:00:00", "access_count": 0}}
+        with open(path, "w") as f:
+            json.dump(legacy, f, indent=2)
+
+        vectors = VectorMemory(path)
+        assert vectors.search_similar("flask memory")[0]["id"] == "old"
+        new_id = vectors.store_vector_memory("new flask note", "fact")
+        vectors.flush()
+
+        reloaded = VectorMemory(path)
+        assert set(reloaded.memories) == {"old", new_id}
+        assert reloaded.memories["old"]["access_count"] == 1
+
+
+def test_knowledge_graph_replays_connections():
+    """Nodes and connections are rebuilt from the journal"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "knowledge_graph.json")
+        graph = KnowledgeGraph(path)
+        a = graph.add_node("python", "language")
+        b = graph.add_node("flask", "framework")
+        graph.connect_nodes(a, b)
+
+        reloaded = KnowledgeGraph(path)
+        assert reloaded.connections[a] == [b]
+        assert reloaded.nodes[b].connections == [a]
+        assert [node.concept for node in reloaded.find_related_concepts("python")] == ["flask"]
+
+        reloaded.save_graph()
+        assert os.path.getsize(path + ".journal") == 0
+        assert KnowledgeGraph(path).connections[b] == [a]
+
+
+def test_keyword_index_bm25():
+    """BM25 favours rarer terms and shorter documents; removal updates postings"""
+    index = KeywordIndex()
+    index.add("a", ["python", "flask", "python"], "code")
+    index.add("b", ["python", "django", "orm", "models", "views"], "code")
+    index.add("c", ["flask", "notes"], "note")
+
+    ranked = [doc_id for doc_id, _ in index.search(["python"])]
+    assert ranked == ["a", "b"]
+    assert [doc_id for doc_id, _ in index.search(["flask"], "note")] == ["c"]
+    assert index.search(["flask"], "missing") == []
+
+    index.add("a", ["rust"], "code")
+    assert "a" not in index.postings.get("python", {})
+    assert [doc_id for doc_id, _ in index.search(["rust", "python"], limit=1)] == ["a"]
+
+    index.remove("b")
+    assert "django" not in index.postings
+    assert len(index) == 2
+
+
+def test_search_uses_index():
+    """Both stores answer queries from the index with type filters"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(os.path.join(tmp, "memory_store.json"))
+        fact = store.store_memory("Flask routes map URLs to views", "fact", {}, 0.2)
+        store.store_memory("Flask blueprints group routes", "procedure", {}, 0.9)
+        store.store_memory("SQLite WAL mode", "fact", {})
+
+        assert [m.id for m in store.search_memories("flask routes", "fact")] == [fact]
+        assert len(store.search_memories("flask")) == 2
+        assert [m.id for m in store.search_memories("WAL")] != []
+
+        vectors = VectorMemory(os.path.join(tmp, "vector_memory.json"))
+        for i in range(50):
+            vectors.store_vector_memory(f"filler document number {i}", "fact")
+        target = vectors.store_vector_memory("circuit breaker for providers", "design")
+        results = vectors.search_similar("provider circuit breaker", k=5)
+        assert [r["id"] for r in results] == [target]
+        assert results[0]["similarity_score"] > 0
+        assert vectors.search_similar("circuit", memory_type="fact") == []
+        vectors.flush()
+
+        reloaded = VectorMemory(os.path.join(tmp, "vector_memory.json"))
+        assert reloaded.search_similar("breaker")[0]["id"] == target
+        reloaded.flush()
+
+
+if __name__ == "__main__":
+    test_memory_store_appends_and_replays()
+    test_reads_do_not_write()
+    test_compaction_and_torn_write()
+    test_writes_after_torn_record_survive_reopen()
+    test_replay_skips_records_in_snapshot()
+    test_legacy_json_migrates()
+    test_knowledge_graph_replays_connections()
+    test_keyword_index_bm25()
+    test_search_uses_index()
+    print("✓ Simple memory system tests completed successfully!")
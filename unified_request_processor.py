@@ -8,7 +8,7 @@ import json
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from ai_providers import ai_generate
-from memory_manager import MITOMemoryManager
+from memory_manager import get_memory_manager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -73,7 +73,7 @@ class UnifiedRequestProcessor:
             # Initialize session if needed
             if not session_id:
                 if not self._memory_manager:
-                    self._memory_manager = MITOMemoryManager()
+                    self._memory_manager = get_memory_manager()
                 session_id = self._memory_manager.get_session_id("default_user")
             
             # Analyze user intent
@@ -145,7 +145,7 @@ class UnifiedRequestProcessor:
             
             # Store in memory
             if not self._memory_manager:
-                self._memory_manager = MITOMemoryManager()
+                self._memory_manager = get_memory_manager()
             self._memory_manager.add_memory(
                 user_id="default_user",
                 content=f"Generated {language} code for: {prompt}",